@@ -4,6 +4,10 @@ One-off script to convert flood extent GeoTIFFs to RGBA data PNGs for the seed r
 Reads flood extent rasters from the seed repo at /raster-data/flood-extents/tif/
 and writes data-encoded PNGs + metadata JSONs to /raster-data/flood-extents/data-png/
 
+Each raster is also written in tiles of TILE_SIZE x TILE_SIZE pixels, plus a tile
+index JSON, so the pipeline can decode only the tiles around a station. Tiles without
+any flooding are left out.
+
 Usage:
     cd data
     uv run python data_management/seed_data_management/convert_flood_extents_to_png.py
@@ -23,6 +27,8 @@ OUTPUT_DIR = (
 
 COUNTRIES = sorted(target_countries_iso_a3)
 
+TILE_SIZE = 1024
+
 
 def convert_flood_extent(tif_path: Path, output_name: str):
     with open(tif_path, "rb") as f:
@@ -41,6 +47,40 @@ def convert_flood_extent(tif_path: Path, output_name: str):
     file_size_mb = png_path.stat().st_size / (1024 * 1024)
     print(f"  {output_name}.png ({file_size_mb:.1f} MB)")
 
+    write_flood_extent_tiles(rgba_array, metadata, output_name)
+
+
+def write_flood_extent_tiles(rgba_array, metadata: dict, output_name: str):
+    height, width = rgba_array.shape[:2]
+    tile_filename = f"{output_name}_tile_{{row}}_{{col}}.png"
+    tiles: list[list[int]] = []
+    for row in range((height + TILE_SIZE - 1) // TILE_SIZE):
+        for col in range((width + TILE_SIZE - 1) // TILE_SIZE):
+            tile = rgba_array[
+                row * TILE_SIZE : (row + 1) * TILE_SIZE,
+                col * TILE_SIZE : (col + 1) * TILE_SIZE,
+            ]
+            # All zero is no flooding (or NoData), which the pipeline fills in
+            if not tile.any():
+                continue
+            img = Image.fromarray(tile, mode="RGBA")
+            img.save(OUTPUT_DIR / tile_filename.format(row=row, col=col), optimize=True)
+            tiles.append([row, col])
+
+    tile_index = {
+        "tile_size": TILE_SIZE,
+        "width": width,
+        "height": height,
+        "transform": metadata["transform"],
+        "crs": metadata["crs"],
+        "nodata": metadata["nodata"],
+        "tile_filename": tile_filename,
+        "tiles": tiles,
+    }
+    with open(OUTPUT_DIR / f"{output_name}_tiles.json", "w", encoding="utf-8") as f:
+        json.dump(tile_index, f, indent=2)
+    print(f"  {output_name}: {len(tiles)} non-empty tiles")
+
 
 if __name__ == "__main__":
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -68,6 +108,8 @@ if __name__ == "__main__":
         manifest = {
             "country": COUNTRY,
             "return_periods": sorted(return_periods),
+            # Tiles next to the full rasters, see write_flood_extent_tiles
+            "tiled": True,
         }
         manifest_path = OUTPUT_DIR / f"{COUNTRY}_flood_extents_manifest.json"
         with open(manifest_path, "w", encoding="utf-8") as f:
@@ -0,0 +1,105 @@
+"""
+Precompute the population exposed by each flood extent, per alert config and place code.
+
+For every country in the floods config, this loads the alert configs, GloFAS stations,
+admin areas and population raster from the IBF API and the flood extents from the seed
+repo, exactly as the pipeline does. For every return period and alert config it then
+computes the population exposed per target-level place code, and writes the table to
+/raster-data/flood-extents/data-png/{ISO3}_flood_exposure.json in your local copy of
+the seed repo. The flood extents manifest is updated to point to the table.
+
+The pipeline uses an entry only when the hashes of its inputs (population raster
+metadata, clipped flood extent and admin area geometries) match, and computes the
+exposure otherwise. Rerun this after the flood extents, population or admin areas
+change, and after convert_flood_extents_to_png.py, which rewrites the manifest.
+
+Usage:
+    cd data
+    uv run python data_management/seed_data_management/precompute_flood_exposure.py
+"""
+
+import json
+from pathlib import Path
+
+from dotenv import load_dotenv
+from pipelines.flood.precomputed_exposure import build_flood_exposure_table
+from pipelines.infra.config_reader import ConfigReader
+from pipelines.infra.data_provider import DataProvider
+from pipelines.infra.data_types.admin_area_types import AdminAreasSet
+from pipelines.infra.data_types.data_config_types import DataSource
+from pipelines.infra.data_types.flood_extent_provider import FloodExtentProvider
+from pipelines.infra.data_types.population_raster_provider import (
+    PopulationRasterProvider,
+)
+from pipelines.infra.utils.api_client import ApiClient
+from shared.data_helpers import get_seed_data_repo_path
+
+CONFIG_PATH = (
+    Path(__file__).parents[2] / "pipelines" / "infra" / "configs" / "floods.yaml"
+)
+OUTPUT_DIR = (
+    Path(get_seed_data_repo_path()) / "raster-data" / "flood-extents" / "data-png"
+)
+
+SOURCES = [
+    DataSource.ALERT_CONFIGS_IBF_API,
+    DataSource.GLOFAS_STATIONS_IBF_API,
+    DataSource.ADMIN_AREA_IBF_API,
+    DataSource.POPULATION_IBF_API,
+    DataSource.FLOOD_EXTENTS_SEED_REPO,
+]
+
+
+def precompute_country(data_provider: DataProvider, country: str, admin_level: int):
+    population_provider = data_provider.get_data(
+        DataSource.POPULATION_IBF_API, PopulationRasterProvider
+    )
+    table = build_flood_exposure_table(
+        country=country,
+        admin_level=admin_level,
+        alert_configs=data_provider.get_data(DataSource.ALERT_CONFIGS_IBF_API, list),
+        glofas_stations=data_provider.get_data(
+            DataSource.GLOFAS_STATIONS_IBF_API, dict
+        ),
+        admin_areas=data_provider.get_data(
+            DataSource.ADMIN_AREA_IBF_API, AdminAreasSet
+        ),
+        # Every flood extent is intersected with the population, so decode it in full
+        population_raster=population_provider.get_raster(),
+        population_hash=population_provider.get_metadata_hash(),
+        flood_extent_provider=data_provider.get_data(
+            DataSource.FLOOD_EXTENTS_SEED_REPO, FloodExtentProvider
+        ),
+    )
+
+    table_filename = f"{country}_flood_exposure.json"
+    with open(OUTPUT_DIR / table_filename, "w", encoding="utf-8") as f:
+        json.dump(table.to_json(), f, separators=(",", ":"))
+    print(f"  {table_filename}: {len(table.exposure)} flood extents")
+
+    manifest_path = OUTPUT_DIR / f"{country}_flood_extents_manifest.json"
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest["exposure_table"] = table_filename
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    config_reader = ConfigReader(source_target=None, infra_only=False)
+    if not config_reader.load_all(CONFIG_PATH) or config_reader.config is None:
+        raise SystemExit(f"Failed to load config from {CONFIG_PATH}")
+
+    api_client = ApiClient()
+    for country, country_config in sorted(config_reader.config.country_configs.items()):
+        print(f"Precomputing flood exposure for {country}:")
+        data_provider = DataProvider(api_client)
+        success, errors = data_provider.try_load_data(country_config, SOURCES)
+        if not success:
+            print(f"  Skipped, failed to load data: {'; '.join(errors)}")
+            continue
+        precompute_country(data_provider, country, country_config.target_admin_level)
+
+    print(f"\nOutput written to: {OUTPUT_DIR}")
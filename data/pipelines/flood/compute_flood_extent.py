@@ -1,19 +1,44 @@
 from __future__ import annotations
 
+from typing import Literal, overload
+
 import numpy as np
 
 from pipelines.flood.determine_alerts import TimeIntervalSeverity
 from pipelines.infra.data_types.flood_extent_provider import FloodExtentProvider
-from pipelines.infra.data_types.loaded_data_types import RasterData
+from pipelines.infra.data_types.loaded_data_types import RasterData, SparseRasterData
+from pipelines.infra.utils.raster import BoundingBox
+
+
+@overload
+def compute_flood_extent(
+    time_interval_severities: list[TimeIntervalSeverity],
+    flood_extent_provider: FloodExtentProvider,
+    bounds: BoundingBox | None = None,
+    sparse: Literal[False] = False,
+) -> RasterData: ...
 
 
+@overload
 def compute_flood_extent(
     time_interval_severities: list[TimeIntervalSeverity],
     flood_extent_provider: FloodExtentProvider,
-) -> RasterData:
+    bounds: BoundingBox | None = None,
+    *,
+    sparse: Literal[True],
+) -> SparseRasterData: ...
+
+
+def compute_flood_extent(
+    time_interval_severities: list[TimeIntervalSeverity],
+    flood_extent_provider: FloodExtentProvider,
+    bounds: BoundingBox | None = None,
+    sparse: bool = False,
+) -> RasterData | SparseRasterData:
     """
     Compute the flood extent raster for the alert station by resolving the appropriate return period raster.
-    Returns the flood extent as in-memory raster data.
+    With bounds (e.g. of the station's admin areas), only the part of the raster covering them is loaded.
+    Returns the flood extent as in-memory raster data, or with sparse=True as a sparse raster of its flooded pixels.
     """
 
     return_period = _resolve_requested_return_period_value(time_interval_severities)
@@ -21,6 +46,8 @@ def compute_flood_extent(
     flood_extent = _resolve_flood_extent(
         return_period=return_period,
         flood_extent_provider=flood_extent_provider,
+        bounds=bounds,
+        sparse=sparse,
     )
     return flood_extent
 
@@ -42,7 +69,9 @@ def _resolve_requested_return_period_value(
 def _resolve_flood_extent(
     return_period: float | None,
     flood_extent_provider: FloodExtentProvider,
-) -> RasterData:
+    bounds: BoundingBox | None = None,
+    sparse: bool = False,
+) -> RasterData | SparseRasterData:
     """
     Resolve the flood extent raster using this order:
     1. Exact return period raster.
@@ -56,19 +85,36 @@ def _resolve_flood_extent(
             int(return_period) if return_period == int(return_period) else None
         )
         if exact_match is not None and exact_match in available:
-            return flood_extent_provider.get_raster(exact_match)
+            return _get_raster(flood_extent_provider, exact_match, bounds, sparse)
 
         fallback_value = max(
             (rp for rp in available if rp <= return_period),
             default=None,
         )
         if fallback_value is not None:
-            return flood_extent_provider.get_raster(fallback_value)
+            return _get_raster(flood_extent_provider, fallback_value, bounds, sparse)
 
-    return _create_empty_raster(flood_extent_provider)
+    return _create_empty_raster(flood_extent_provider, bounds, sparse)
 
 
-def _create_empty_raster(flood_extent_provider: FloodExtentProvider) -> RasterData:
+def _get_raster(
+    flood_extent_provider: FloodExtentProvider,
+    return_period: int,
+    bounds: BoundingBox | None,
+    sparse: bool = False,
+) -> RasterData | SparseRasterData:
+    if sparse:
+        return flood_extent_provider.get_sparse_raster(return_period, bounds)
+    if bounds is None:
+        return flood_extent_provider.get_raster(return_period)
+    return flood_extent_provider.get_raster(return_period, bounds)
+
+
+def _create_empty_raster(
+    flood_extent_provider: FloodExtentProvider,
+    bounds: BoundingBox | None = None,
+    sparse: bool = False,
+) -> RasterData | SparseRasterData:
     """Create a zero-valued raster (indicating no flood) as fallback when no return period threshold is exceeded."""
     if not flood_extent_provider.available_return_periods:
         raise FileNotFoundError(
@@ -77,7 +123,19 @@ def _create_empty_raster(flood_extent_provider: FloodExtentProvider) -> RasterDa
         )
 
     reference_return_period = flood_extent_provider.available_return_periods[0]
-    reference_raster = flood_extent_provider.get_raster(reference_return_period)
+    reference_raster = _get_raster(
+        flood_extent_provider, reference_return_period, bounds, sparse
+    )
+    if isinstance(reference_raster, SparseRasterData):
+        return SparseRasterData(
+            indexes=reference_raster.indexes[:0],
+            values=reference_raster.values[:0],
+            shape=reference_raster.shape,
+            transform=reference_raster.transform,
+            crs=reference_raster.crs,
+            nodata=reference_raster.nodata,
+            fill_value=0,
+        )
 
     empty_array = np.zeros_like(reference_raster.array)
 
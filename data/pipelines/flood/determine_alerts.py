@@ -7,9 +7,9 @@ from typing import TypedDict
 import numpy as np
 
 from pipelines.flood.constants import MINIMUM_RETURN_PERIOD
-from pipelines.flood.extract_forecast import TimeIntervalDischarge
+from pipelines.flood.extract_forecast import StationDischarges, TimeIntervalDischarge
 from pipelines.infra.data_types.location_point import LocationPoint
-from pipelines.infra.utils.nrw_logger import log_warning, LogTag
+from pipelines.infra.utils.nrw_logger import log_info, log_warning, LogTag
 
 logger = logging.getLogger(__name__)
 
@@ -39,105 +39,237 @@ class ReturnPeriodThresholds(TypedDict):
     thresholds: list[ReturnPeriodThresholdValue]
 
 
+@dataclass
+class StationThresholdTable:
+    """
+    Return period thresholds of one station, precompiled for classification.
+
+    threshold_values is sorted ascending, and return_periods holds the return
+    period of each threshold value.
+    """
+
+    threshold_values: np.ndarray
+    return_periods: np.ndarray
+    labels: frozenset[str]
+
+    def classify(self, discharges: np.ndarray) -> np.ndarray:
+        """
+        Return period of each discharge: the one with the highest threshold value the
+        discharge exceeds, or 0.0 if it exceeds none (or is NaN).
+        """
+        exceeded_count = np.searchsorted(self.threshold_values, discharges, side="left")
+        return_periods = np.concatenate(([0.0], self.return_periods))[exceeded_count]
+        return np.where(np.isnan(discharges), 0.0, return_periods)
+
+
+def build_station_threshold_tables(
+    thresholds: list[ReturnPeriodThresholds],
+) -> dict[str, StationThresholdTable]:
+    """Precompile the return period thresholds of all stations, by station code."""
+    tables: dict[str, StationThresholdTable] = {}
+    for station_threshold in thresholds:
+        # Like a lookup in the thresholds list, the first entry of a station wins
+        if station_threshold["station_code"] in tables:
+            continue
+        tables[station_threshold["station_code"]] = _build_threshold_table(
+            station_threshold["thresholds"]
+        )
+    return tables
+
+
+def screen_alerting_stations(
+    station_codes: list[str],
+    station_discharges: StationDischarges,
+    thresholds: dict[str, StationThresholdTable],
+    minimum_return_period: str = MINIMUM_RETURN_PERIOD,
+) -> set[str]:
+    """
+    Find the stations for which determine_temporal_extent finds any severity.
+
+    All stations are screened in one vectorized pass: their discharges are stacked
+    into one (station, time interval, ensemble) array, and the NaN-aware ensemble
+    medians of all stations are classified at once against a (station, threshold)
+    table. A station alerts when the median of any time interval exceeds the lowest
+    of its threshold values, whichever return period that threshold belongs to.
+    This is the same comparison determine_temporal_extent makes.
+
+    minimum_return_period is only used for validation: stations without a threshold
+    for it (or without any thresholds) are left out, with the same warnings as
+    determine_temporal_extent.
+    """
+    tables: dict[str, StationThresholdTable] = {}
+    for station_code in station_codes:
+        table = _prepare_station_threshold(
+            station_code, thresholds, minimum_return_period
+        )
+        if table is not None and station_discharges.get(station_code):
+            tables[station_code] = table
+    if not tables:
+        return set()
+
+    screened_codes = list(tables)
+    ensemble_array = _stack_discharges(
+        [
+            [
+                np.asarray(t.ensemble_discharges, dtype=float)
+                for t in station_discharges[station_code]
+            ]
+            for station_code in screened_codes
+        ]
+    )
+    # Stations and intervals without any discharge get a NaN median, which exceeds nothing
+    has_discharge = ~np.isnan(ensemble_array).all(axis=2)
+    median_discharges = np.full(has_discharge.shape, np.nan)
+    median_discharges[has_discharge] = np.nanmedian(
+        ensemble_array[has_discharge], axis=1
+    )
+
+    # Thresholds of all stations, ascending and padded with +inf, so the number of
+    # thresholds below a median is its position in the station's threshold table
+    threshold_count = max(table.threshold_values.size for table in tables.values())
+    threshold_values = np.full((len(screened_codes), threshold_count), np.inf)
+    return_periods = np.zeros((len(screened_codes), threshold_count + 1))
+    for row, station_code in enumerate(screened_codes):
+        table = tables[station_code]
+        threshold_values[row, : table.threshold_values.size] = table.threshold_values
+        return_periods[row, 1 : table.return_periods.size + 1] = table.return_periods
+    exceeded_count = (
+        median_discharges[:, :, np.newaxis] > threshold_values[:, np.newaxis, :]
+    ).sum(axis=2)
+    median_return_periods = np.take_along_axis(return_periods, exceeded_count, axis=1)
+
+    alerting_rows = np.flatnonzero((median_return_periods > 0).any(axis=1))
+    alerting_codes = {screened_codes[row] for row in alerting_rows}
+    log_info(
+        logger,
+        LogTag.FLOOD_LOGIC,
+        f"{len(alerting_codes)} of {len(screened_codes)} stations exceed a return "
+        f"period threshold: {', '.join(sorted(alerting_codes)) or 'none'}",
+    )
+    return alerting_codes
+
+
 def determine_temporal_extent(
     station_code: str,
     time_interval_discharges: list[TimeIntervalDischarge],
-    thresholds: list[ReturnPeriodThresholds],
+    thresholds: list[ReturnPeriodThresholds] | dict[str, StationThresholdTable],
     minimum_return_period: str = MINIMUM_RETURN_PERIOD,
 ) -> list[TimeIntervalSeverity]:
     """
     Compute lead time severities for one station by comparing the median
     ensemble discharge against return period thresholds.
+    Pass the thresholds precompiled with build_station_threshold_tables when
+    calling this for many stations.
     Returns a list of lead time severities for the station.
     """
     station_thresholds = _prepare_station_threshold(
         station_code, thresholds, minimum_return_period
     )
-    if station_thresholds is None:
+    if station_thresholds is None or not time_interval_discharges:
         return []
 
+    # (time interval, ensemble member), padded with NaN when member counts differ
+    member_discharges = [
+        np.asarray(t.ensemble_discharges, dtype=float) for t in time_interval_discharges
+    ]
+    ensemble_array = _stack_discharges([member_discharges])[0]
+    has_discharge = ~np.isnan(ensemble_array).all(axis=1)
+    if not has_discharge.any():
+        return []
+
+    ensemble_array = ensemble_array[has_discharge]
+    median_discharges = np.nanmedian(ensemble_array, axis=1)
+    # Classify the medians and all members in one pass
+    return_periods = station_thresholds.classify(
+        np.concatenate((median_discharges, ensemble_array.ravel()))
+    )
+    median_return_periods = return_periods[: len(median_discharges)]
+    ensemble_return_periods = return_periods[len(median_discharges) :].reshape(
+        ensemble_array.shape
+    )
+
     time_interval_severities: list[TimeIntervalSeverity] = []
-    for time_interval_discharge in time_interval_discharges:
-        ensemble_array = np.asarray(
-            time_interval_discharge.ensemble_discharges,
-            dtype=float,
-        )
-        if np.isnan(ensemble_array).all():
+    for row, index in enumerate(np.flatnonzero(has_discharge)):
+        if median_return_periods[row] <= 0:
             continue
-        median_discharge = float(np.nanmedian(ensemble_array))
-        median_return_period = _match_return_period_numeric(
-            median_discharge, station_thresholds
-        )
-        if median_return_period > 0:
-            ensemble_return_periods = [
-                _match_return_period_numeric(d, station_thresholds)
-                for d in time_interval_discharge.ensemble_discharges
-            ]
-            time_interval_severities.append(
-                TimeIntervalSeverity(
-                    time_interval_start=time_interval_discharge.time_interval_start,
-                    time_interval_end=time_interval_discharge.time_interval_end,
-                    median_return_period=median_return_period,
-                    ensemble_return_periods=ensemble_return_periods,
-                )
+        time_interval_discharge = time_interval_discharges[index]
+        member_count = member_discharges[index].size
+        time_interval_severities.append(
+            TimeIntervalSeverity(
+                time_interval_start=time_interval_discharge.time_interval_start,
+                time_interval_end=time_interval_discharge.time_interval_end,
+                median_return_period=float(median_return_periods[row]),
+                ensemble_return_periods=ensemble_return_periods[
+                    row, :member_count
+                ].tolist(),
             )
+        )
 
     return time_interval_severities
 
 
-def _format_return_period_label(return_period: float) -> str:
-    return f"{return_period:g}yr"
-
-
-def _get_station_return_period_thresholds(
-    thresholds: list[ReturnPeriodThresholds],
-    station_code: str,
-) -> dict[str, float] | None:
-    for station_threshold in thresholds:
-        if station_threshold["station_code"] != station_code:
-            continue
-
-        return {
-            _format_return_period_label(threshold["return_period"]): threshold[
-                "threshold_value"
-            ]
-            for threshold in station_threshold["thresholds"]
-        }
-
-    return None
-
-
-def _match_return_period_numeric(
-    discharge: float,
-    station_thresholds: dict[str, float],
-) -> float:
+def _stack_discharges(discharges: list[list[np.ndarray]]) -> np.ndarray:
     """
-    Find the highest return period whose threshold the discharge exceeds.
-    Returns the numeric return period value (e.g. 5.0, 20.0), or 0.0 if none exceeded.
+    Stack per-station, per-interval ensemble discharges into one
+    (station, time interval, ensemble) array, padded with NaN.
     """
-    for label, threshold_value in sorted(
-        station_thresholds.items(), key=lambda item: item[1], reverse=True
-    ):
-        if discharge > threshold_value:
-            return _parse_return_period_label(label)
-    return 0.0
+    interval_count = max((len(intervals) for intervals in discharges), default=0)
+    member_count = max(
+        (members.size for intervals in discharges for members in intervals),
+        default=0,
+    )
+    stacked = np.full((len(discharges), interval_count, member_count), np.nan)
+    for station_index, intervals in enumerate(discharges):
+        for interval_index, members in enumerate(intervals):
+            stacked[station_index, interval_index, : members.size] = members
+    return stacked
 
 
-def _parse_return_period_label(label: str) -> float:
-    """Parse a return period label like '5yr' or '1.5yr' into its numeric value."""
-    return float(label.replace("yr", ""))
+def _format_return_period_label(return_period: float) -> str:
+    return f"{return_period:g}yr"
+
+
+def _build_threshold_table(
+    thresholds: list[ReturnPeriodThresholdValue],
+) -> StationThresholdTable:
+    # One threshold per return period label, the last one wins
+    thresholds_by_label = {
+        _format_return_period_label(threshold["return_period"]): threshold
+        for threshold in thresholds
+    }
+    labels = list(thresholds_by_label)
+    threshold_values = np.array(
+        [threshold["threshold_value"] for threshold in thresholds_by_label.values()],
+        dtype=float,
+    )
+    return_periods = np.array(
+        [threshold["return_period"] for threshold in thresholds_by_label.values()],
+        dtype=float,
+    )
+    # Sort ascending by threshold value; among equal values the first one must win
+    # (be the last in the table), as when scanning from the highest value down
+    order = np.lexsort((-np.arange(len(labels)), threshold_values))
+    return StationThresholdTable(
+        threshold_values=threshold_values[order],
+        return_periods=return_periods[order],
+        labels=frozenset(labels),
+    )
 
 
 def _prepare_station_threshold(
     station_code: str,
-    thresholds: list[ReturnPeriodThresholds],
+    thresholds: list[ReturnPeriodThresholds] | dict[str, StationThresholdTable],
     minimum_return_period: str = MINIMUM_RETURN_PERIOD,
-) -> dict[str, float] | None:
+) -> StationThresholdTable | None:
     """
     Retrieve and validate station return-period thresholds.
-    Returns the station thresholds dict, or None if validation fails.
+    Returns the station threshold table, or None if validation fails.
     """
-    station_thresholds = _get_station_return_period_thresholds(thresholds, station_code)
+    if isinstance(thresholds, list):
+        thresholds = build_station_threshold_tables(
+            [t for t in thresholds if t["station_code"] == station_code]
+        )
+    station_thresholds = thresholds.get(station_code)
     if station_thresholds is None:
         log_warning(
             logger,
@@ -146,7 +278,7 @@ def _prepare_station_threshold(
         )
         return None
 
-    if minimum_return_period not in station_thresholds:
+    if minimum_return_period not in station_thresholds.labels:
         log_warning(
             logger,
             LogTag.FLOOD_LOGIC,
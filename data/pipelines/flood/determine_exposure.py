@@ -1,19 +1,22 @@
 from __future__ import annotations
 
 from pipelines.infra.data_types.admin_area_types import AdminAreasSet
-from pipelines.infra.data_types.loaded_data_types import RasterData
+from pipelines.infra.data_types.loaded_data_types import RasterT
 from pipelines.infra.data_types.location_point import LocationPoint
-from pipelines.infra.utils.exposure import clip_raster_to_admin_areas
+from pipelines.infra.utils.exposure import clip_raster_to_admin_areas, ClipCache
 
 
 def determine_spatial_extent(
     station: LocationPoint,
     station_place_codes: list[str],
     admin_areas: AdminAreasSet,
-    flood_extent_raster: RasterData,
-) -> tuple[RasterData | None, list[str]]:
+    flood_extent_raster: RasterT,
+    clip_cache: ClipCache | None = None,
+) -> tuple[RasterT | None, list[str]]:
     """
     Determine spatial extent by filtering station place codes to valid admin areas, clipping the flood extent raster.
+    Pass a clip_cache to reuse the clip masks of place code sets across stations.
+    A sparse flood extent raster is clipped to a sparse raster.
     Return a tuple of (clipped_raster_data, place_codes).
     """
     valid_place_codes = [
@@ -30,6 +33,7 @@ def determine_spatial_extent(
         admin_areas=admin_areas,
         flood_extent_raster=flood_extent_raster,
         station_code=station.id,
+        clip_cache=clip_cache,
     )
 
     return clipped_flood_extent, valid_place_codes
@@ -38,12 +42,14 @@ def determine_spatial_extent(
 def clip_flood_extent_to_admin_areas(
     place_codes: list[str],
     admin_areas: AdminAreasSet,
-    flood_extent_raster: RasterData,
+    flood_extent_raster: RasterT,
     station_code: str,
-) -> RasterData:
+    clip_cache: ClipCache | None = None,
+) -> RasterT:
     return clip_raster_to_admin_areas(
         place_codes=place_codes,
         admin_areas=admin_areas,
         raster=flood_extent_raster,
         label=f"station {station_code}",
+        clip_cache=clip_cache,
     )
@@ -6,8 +6,14 @@ import re
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 
+import numpy as np
 import rasterio
+from rasterio.transform import Affine, rowcol
 
+from pipelines.infra.data_types.glofas_discharge_cube import GlofasDischargeCube
+from pipelines.infra.data_types.glofas_discharge_provider import (
+    read_glofas_station_pixels,
+)
 from pipelines.infra.data_types.location_point import LocationPoint
 from pipelines.infra.utils.nrw_logger import log_info, log_warning, LogTag
 
@@ -24,27 +30,79 @@ class TimeIntervalDischarge:
 StationDischarges = dict[str, list[TimeIntervalDischarge]]
 
 
-def extract_discharge_glofas_station(
-    station_code: str,
-    station: LocationPoint,
+def extract_discharge_glofas_stations(
+    stations: dict[str, LocationPoint],
     netcdf_paths: list[str],
     temporal_extent: dict[str, list],
+    discharge_cube: GlofasDischargeCube | None = None,
+    station_pixels_only: bool = False,
 ) -> StationDischarges:
     """
-    Sample discharge from pre-sliced GloFAS NetCDF files at station coordinates.
+    Sample discharge from pre-sliced GloFAS NetCDF files at the coordinates of all stations.
 
     Each NetCDF file represents one ensemble member. Each band within the file
     represents a lead time (band index = lead_time + 1).
 
-    Returns a dict containing one entry: station_code -> list of lead-time discharge
-    objects. Each lead-time object contains the time interval and one discharge per
-    ensemble.
+    Station coordinates are converted to pixel indices once, and each file is read
+    once: all lead times of all stations are then picked out of it in a single
+    indexing pass. When a discharge_cube (the same files consolidated into one array)
+    is given, all ensemble members are read from it in one lookup instead. With
+    station_pixels_only, netcdf_paths may be the global files: only the station pixels
+    are read from them (see read_glofas_station_pixels), so no slicing is needed.
+
+    Returns a dict with per station_code a list of lead-time discharge objects. Each
+    lead-time object contains the time interval and one discharge per ensemble.
+    Stations outside the grid get NaN discharges.
     """
     lead_time_min, lead_time_max = _parse_lead_time_range(temporal_extent)
-    discharges: StationDischarges = {station_code: []}
+    station_codes = list(stations)
+    lons = np.array([float(station.lon) for station in stations.values()])
+    lats = np.array([float(station.lat) for station in stations.values()])
+
+    if discharge_cube is not None:
+        member_paths = discharge_cube.member_paths
+    else:
+        member_paths = _get_existing_netcdf_paths(netcdf_paths)
+    if not member_paths:
+        return {station_code: [] for station_code in station_codes}
+    forecast_base_datetime = _extract_forecast_base_datetime(member_paths[0])
+
+    if discharge_cube is not None:
+        ensemble_discharges = discharge_cube.sample(
+            lons, lats, lead_time_min, lead_time_max
+        )
+    elif station_pixels_only:
+        ensemble_discharges = read_glofas_station_pixels(
+            member_paths, lons, lats, lead_time_min, lead_time_max
+        )
+    else:
+        ensemble_discharges = _sample_netcdf_files(
+            member_paths, lons, lats, lead_time_min, lead_time_max
+        )
+
+    # ensemble_discharges has shape (ensemble, lead_time, station)
+    time_intervals = [
+        _lead_time_to_time_interval(forecast_base_datetime, lead_time)
+        for lead_time in range(lead_time_min, lead_time_max + 1)
+    ]
+    discharges: StationDischarges = {}
+    for station_index, station_code in enumerate(station_codes):
+        station_discharges = ensemble_discharges[:, :, station_index].T.tolist()
+        discharges[station_code] = [
+            TimeIntervalDischarge(
+                time_interval_start=time_interval_start,
+                time_interval_end=time_interval_end,
+                ensemble_discharges=lead_time_discharges,
+            )
+            for (time_interval_start, time_interval_end), lead_time_discharges in zip(
+                time_intervals, station_discharges
+            )
+        ]
+    return discharges
 
-    forecast_base_datetime: datetime | None = None
 
+def _get_existing_netcdf_paths(netcdf_paths: list[str]) -> list[str]:
+    existing_paths: list[str] = []
     for netcdf_path in netcdf_paths:
         # TODO: to catch exact today date netcdf file
         if not os.path.exists(netcdf_path):
@@ -54,39 +112,61 @@ def extract_discharge_glofas_station(
                 f"NetCDF file not found, skipping: {netcdf_path}",
             )
             continue
+        existing_paths.append(netcdf_path)
+    return existing_paths
 
-        if forecast_base_datetime is None:
-            forecast_base_datetime = _extract_forecast_base_datetime(netcdf_path)
-            for lead_time in range(lead_time_min, lead_time_max + 1):
-                time_interval_start, time_interval_end = _lead_time_to_time_interval(
-                    forecast_base_datetime,
-                    lead_time,
-                )
-                discharges[station_code].append(
-                    TimeIntervalDischarge(
-                        time_interval_start=time_interval_start,
-                        time_interval_end=time_interval_end,
-                        ensemble_discharges=[],
-                    )
-                )
 
+def _sample_netcdf_files(
+    netcdf_paths: list[str],
+    lons: np.ndarray,
+    lats: np.ndarray,
+    lead_time_min: int,
+    lead_time_max: int,
+) -> np.ndarray:
+    """Read all stations from each ensemble file, as (ensemble, lead_time, station)."""
+    band_indexes = list(range(lead_time_min + 1, lead_time_max + 2))
+    pixel_indexes: tuple[Affine, np.ndarray, np.ndarray, np.ndarray] | None = None
+    ensemble_discharges: list[np.ndarray] = []
+
+    for netcdf_path in netcdf_paths:
         log_info(
             logger,
             LogTag.FLOOD_LOGIC,
             f"Extracting station discharge from {netcdf_path}",
         )
         with rasterio.open(netcdf_path) as src:
-            station_coords = [(float(station.lon), float(station.lat))]
-            for lead_time in range(lead_time_min, lead_time_max + 1):
-                discharge_sampled = list(
-                    src.sample(station_coords, indexes=lead_time + 1)
-                )
-                discharge_value = float(discharge_sampled[0][0])
-                discharges[station_code][lead_time].ensemble_discharges.append(
-                    discharge_value
+            # All members share one grid, so the pixel indices are computed once
+            if pixel_indexes is None or pixel_indexes[0] != src.transform:
+                pixel_indexes = _get_pixel_indexes(
+                    src.transform, src.height, src.width, lons, lats
                 )
+            _, rows, cols, in_bounds = pixel_indexes
 
-    return discharges
+            lead_time_bands = src.read(indexes=band_indexes)
+            member_discharges = np.full(
+                (len(band_indexes), lons.size), np.nan, dtype=np.float64
+            )
+            member_discharges[:, in_bounds] = lead_time_bands[:, rows, cols]
+            ensemble_discharges.append(member_discharges)
+
+    return np.stack(ensemble_discharges)
+
+
+def _get_pixel_indexes(
+    transform: Affine, height: int, width: int, lons: np.ndarray, lats: np.ndarray
+) -> tuple[Affine, np.ndarray, np.ndarray, np.ndarray]:
+    """Pixel rows and columns of the locations inside the grid, and the mask of those locations."""
+    rows, cols = rowcol(transform, lons, lats)
+    rows = np.asarray(rows)
+    cols = np.asarray(cols)
+    in_bounds = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+    if not in_bounds.all():
+        log_warning(
+            logger,
+            LogTag.FLOOD_LOGIC,
+            f"{int((~in_bounds).sum())} stations are outside the GloFAS grid",
+        )
+    return transform, rows[in_bounds], cols[in_bounds], in_bounds
 
 
 def _parse_lead_time_range(temporal_extent: dict[str, list]) -> tuple[int, int]:
@@ -105,9 +185,9 @@ def _parse_lead_time_range(temporal_extent: dict[str, list]) -> tuple[int, int]:
 
 
 def _extract_forecast_base_datetime(netcdf_path: str) -> datetime:
-    """Extract forecast run datetime from a file name like dis_00_2026040800_sliced.nc."""  # TODO: extract date 0 from nc dims instead
+    """Extract forecast run datetime from a file name like dis_00_2026040800_sliced.nc or dis_00_2026040800.nc."""  # TODO: extract date 0 from nc dims instead
     basename = os.path.basename(netcdf_path)
-    match = re.search(r"_(\d{10})_sliced(?:_[A-Z]{3})?\.nc$", basename)
+    match = re.search(r"_(\d{10})(?:_sliced(?:_[A-Z]{3})?)?\.nc$", basename)
     if match is None:
         raise ValueError(
             f"Unable to extract forecast date from NetCDF path: {netcdf_path}"
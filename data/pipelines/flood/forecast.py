@@ -1,16 +1,24 @@
 from __future__ import annotations
 
 import logging
+import os
+import threading
 from typing import cast
 
 from pipelines.flood.compute_flood_extent import compute_flood_extent
 from pipelines.flood.determine_alerts import (
+    build_station_threshold_tables,
     determine_temporal_extent,
     ReturnPeriodThresholds,
     ReturnPeriodThresholdValue,
+    screen_alerting_stations,
 )
 from pipelines.flood.determine_exposure import determine_spatial_extent
-from pipelines.flood.extract_forecast import extract_discharge_glofas_station
+from pipelines.flood.extract_forecast import (
+    extract_discharge_glofas_stations,
+    StationDischarges,
+)
+from pipelines.flood.precomputed_exposure import lookup_precomputed_exposure
 from pipelines.infra.data_provider import DataProvider
 from pipelines.infra.data_submitter import DataSubmitter
 from pipelines.infra.data_types.admin_area_types import AdminAreasSet
@@ -18,23 +26,37 @@ from pipelines.infra.data_types.data_config_types import DataSource
 from pipelines.infra.data_types.dtos import Centroid
 from pipelines.infra.data_types.enums import EnsembleMemberType, LayerName, SeverityKey
 from pipelines.infra.data_types.flood_extent_provider import FloodExtentProvider
-from pipelines.infra.data_types.loaded_data_types import AlertConfig, RasterData
+from pipelines.infra.data_types.glofas_discharge_cube import (
+    GlofasDischargeCube,
+    load_glofas_discharge_cube,
+)
+from pipelines.infra.data_types.glofas_discharge_provider import (
+    is_glofas_station_pixel_mode,
+    slice_glofas_discharge_to_countries,
+)
+from pipelines.infra.data_types.loaded_data_types import AlertConfig
 from pipelines.infra.data_types.location_point import LocationPoint
+from pipelines.infra.data_types.population_raster_provider import (
+    PopulationRasterProvider,
+)
+from pipelines.infra.utils.admin_area_labels import (
+    AdminAreaLabels,
+    get_admin_area_labels,
+)
 from pipelines.infra.utils.exposure import (
     aggregate_population_exposed,
+    ClipCache,
     compute_population_exposed,
+    ReprojectionCache,
 )
 from pipelines.infra.utils.nrw_logger import log_info, log_warning, LogTag
 from pipelines.infra.utils.raster import (
     get_bounding_box,
+    get_place_codes_bounding_box,
     get_raster_extent,
     raster_to_base64_png,
-    slice_netcdf_to_bounds,
-)
-from pipelines.infra.utils.storage_helpers import (
-    archive_alert_glofas_files,
-    get_glofas_country_split_path,
 )
+from pipelines.infra.utils.storage_helpers import archive_alert_glofas_files
 
 logger = logging.getLogger(__name__)
 
@@ -70,7 +92,7 @@ def calculate_flood_forecasts(
         )
         return
 
-    population_raster: RasterData | None = None
+    admin_area_labels: AdminAreaLabels | None = None
 
     glofas_netcdf_paths = _get_glofas_discharge_paths(data_provider)
 
@@ -85,6 +107,10 @@ def calculate_flood_forecasts(
         }
         for station in glofas_stations.values()
     ]
+    # Precompiled once, so classifying discharges is a single lookup per station
+    glofas_station_threshold_tables = build_station_threshold_tables(
+        glofas_station_thresholds
+    )
 
     country_bounds = get_bounding_box(
         target_admin_areas, point_locations=glofas_stations
@@ -92,18 +118,52 @@ def calculate_flood_forecasts(
 
     # Slice NetCDF files to country bounds once before processing stations
     # When using --local-data country, files are already country-split so skip slicing
+    # Slices made earlier in the run by prepare_flood_forecasts (for all countries at once) are reused
+    # In station pixel mode, station discharge is read straight from the global files, and slices are only made when an alert needs archiving
+    station_pixels_only = (
+        data_provider.local_data != "country" and is_glofas_station_pixel_mode()
+    )
+    country_sliced_netcdf_paths: list[str] | None
     if data_provider.local_data == "country":
         country_sliced_netcdf_paths = glofas_netcdf_paths
+    elif station_pixels_only:
+        country_sliced_netcdf_paths = None
     else:
-        country_sliced_netcdf_paths: list[str] = []
-        for netcdf_path in glofas_netcdf_paths:
-            archivable_output_path = get_glofas_country_split_path(country, netcdf_path)
-            country_sliced_path = slice_netcdf_to_bounds(
-                netcdf_path,
-                country_bounds,
-                archivable_output_path,
-            )
-            country_sliced_netcdf_paths.append(country_sliced_path)
+        country_sliced_netcdf_paths = slice_glofas_discharge_to_countries(
+            glofas_netcdf_paths, {country: country_bounds}
+        )[country]
+
+    # Optionally consolidate the ensemble files into one cube, so station extraction does a single memory-mapped read instead of opening every file per station
+    discharge_cube: GlofasDischargeCube | None = None
+    if (
+        country_sliced_netcdf_paths is not None
+        and os.environ.get("GLOFAS_DISCHARGE_CUBE", "false").lower() == "true"
+    ):
+        discharge_cube = load_glofas_discharge_cube(
+            country, country_sliced_netcdf_paths
+        )
+
+    station_netcdf_paths = (
+        glofas_netcdf_paths
+        if country_sliced_netcdf_paths is None
+        else country_sliced_netcdf_paths
+    )
+
+    # Discharge of all stations, extracted in one pass per distinct lead-time spectrum (normally one for all alert configs)
+    all_station_discharges: dict[tuple[str, ...], StationDischarges] = {}
+    # Stations exceeding a return period threshold, screened for all stations at once per lead-time spectrum, so the loop below only evaluates those
+    alerting_station_codes: dict[tuple[str, ...], set[str]] = {}
+    alert_config_station_codes = [
+        config.spatial_extent_name
+        for config in alert_configs
+        if config.spatial_extent_name in glofas_stations
+    ]
+    alert_created = False
+    archive_thread: threading.Thread | None = None
+    # Stations sharing their place codes reuse one clip mask per flood extent grid,
+    # and one index map for resampling it to the population grid
+    clip_cache = ClipCache()
+    reprojection_cache = ReprojectionCache()
 
     ### Step 3 - Loop through alert configs (spatial extents / stations) ###
     # REQUIRED: loop over spatial extents (alert configs)
@@ -120,18 +180,31 @@ def calculate_flood_forecasts(
 
         # REQUIRED: loop over temporal extents (even though there is just one temporal extent for floods - the extent of all lead times - stick to the generic pattern of looping over temporal extents defined in the alert config
         for temporal_extent in config.temporal_extents:
-            discharges = extract_discharge_glofas_station(
-                station_code=station_code,
-                station=station,
-                netcdf_paths=country_sliced_netcdf_paths,
-                temporal_extent=temporal_extent,
-            )
+            lead_time_spectrum = tuple(temporal_extent.get("lead-time-spectrum", []))
+            if lead_time_spectrum not in all_station_discharges:
+                all_station_discharges[lead_time_spectrum] = (
+                    extract_discharge_glofas_stations(
+                        stations=glofas_stations,
+                        netcdf_paths=station_netcdf_paths,
+                        temporal_extent=temporal_extent,
+                        discharge_cube=discharge_cube,
+                        station_pixels_only=station_pixels_only,
+                    )
+                )
+                alerting_station_codes[lead_time_spectrum] = screen_alerting_stations(
+                    station_codes=alert_config_station_codes,
+                    station_discharges=all_station_discharges[lead_time_spectrum],
+                    thresholds=glofas_station_threshold_tables,
+                )
+            if station_code not in alerting_station_codes[lead_time_spectrum]:
+                continue
+            discharges = all_station_discharges[lead_time_spectrum]
 
             ### Step 4 - Determine temporal extent - which time intervals exceed the minimum return period threshold
             time_interval_severities = determine_temporal_extent(
                 station_code=station_code,
                 time_interval_discharges=discharges.get(station_code, []),
-                thresholds=glofas_station_thresholds,
+                thresholds=glofas_station_threshold_tables,
             )
 
             # If no time intervals exceeded the minimum return period threshold, skip to the next temporal extent
@@ -142,9 +215,15 @@ def calculate_flood_forecasts(
                 continue
 
             ### Step 5 - Compute flood extent
+            # Only load the part of the flood extent covering the station's admin areas, which is all that step 6 keeps
+            # Sparse, so steps 6 to 9 only handle its flooded pixels
             flood_extent = compute_flood_extent(
                 time_interval_severities=time_interval_severities,
                 flood_extent_provider=flood_extent_provider,
+                bounds=get_place_codes_bounding_box(
+                    target_admin_areas, config.spatial_extent_place_codes
+                ),
+                sparse=True,
             )
 
             ### Step 6 - Determine spatial extent
@@ -153,6 +232,7 @@ def calculate_flood_forecasts(
                 station_place_codes=config.spatial_extent_place_codes,
                 admin_areas=target_admin_areas,
                 flood_extent_raster=flood_extent,
+                clip_cache=clip_cache,
             )
 
             if not place_codes_exposed or clipped_flood_extent is None:
@@ -164,29 +244,56 @@ def calculate_flood_forecasts(
                 continue
 
             ### Step 7 - Compute exposure within the flood extent ###
-            # Load here instead of at the top since this is a costly operation and only needed if there is exposure to compute.
-            # the 'if' makes sure, it's only loaded once for the first alert-station
-            # TODO: this is not actually lazy-loading at the moment, only lazy-reading earlier downloaded data. Consider true lazy loading.
-            if population_raster is None:
-                population_raster = data_provider.get_data(
-                    DataSource.POPULATION_IBF_API, RasterData
-                )
-
-            population_exposed_raster = compute_population_exposed(
-                population_raster,
-                clipped_flood_extent,
+            # The population raster is only downloaded here, for the first alert with exposure to compute, and only the window around the flood extent is decoded
+            population_provider = data_provider.get_data(
+                DataSource.POPULATION_IBF_API, PopulationRasterProvider
             )
 
-            if population_exposed_raster is None:
-                data_submitter.add_error(
-                    f"Could not compute exposed population raster for station {station_code}"
+            # Exposure precomputed offline for the same flood extent, admin areas and population skips steps 7 and 8
+            # The population is identified by its metadata, so a hit never downloads the raster itself
+            population_exposed = lookup_precomputed_exposure(
+                exposure_table=flood_extent_provider.get_exposure_table(),
+                population_hash=population_provider.get_metadata_hash(),
+                clipped_flood_extent=clipped_flood_extent,
+                place_codes_exposed=place_codes_exposed,
+                admin_areas=target_admin_areas,
+            )
+            if population_exposed is not None:
+                log_info(
+                    logger,
+                    LogTag.FLOOD_LOGIC,
+                    f"Using precomputed exposure for station {station_code}",
+                )
+            else:
+                population_exposed_raster = compute_population_exposed(
+                    population_provider.get_raster_for_hazard_extent(
+                        clipped_flood_extent
+                    ),
+                    clipped_flood_extent,
+                    reprojection_cache=reprojection_cache,
                 )
-                continue
 
-            ### Step 8 - Aggregate population exposed per place_code ###
-            population_exposed = aggregate_population_exposed(
-                population_exposed_raster, place_codes_exposed, target_admin_areas
-            )
+                if population_exposed_raster is None:
+                    data_submitter.add_error(
+                        f"Could not compute exposed population raster for station {station_code}"
+                    )
+                    continue
+
+                ### Step 8 - Aggregate population exposed per place_code ###
+                # The admin areas are rasterized on the population grid once (or read from the cache), so every alert sums with a single pass
+                if admin_area_labels is None:
+                    admin_area_labels = get_admin_area_labels(
+                        admin_areas=target_admin_areas,
+                        grid=population_provider.get_grid(),
+                        country=country,
+                        admin_level=target_admin_level,
+                    )
+                population_exposed = aggregate_population_exposed(
+                    population_exposed_raster,
+                    place_codes_exposed,
+                    target_admin_areas,
+                    admin_area_labels=admin_area_labels,
+                )
 
             ### Step 9 - Create alert and submit severity/exposure payloads ###
             event_name = station.name if station.name.lower() != "na" else station_code
@@ -239,10 +346,20 @@ def calculate_flood_forecasts(
                 value_greyscale=raster_to_base64_png(clipped_flood_extent),
                 extent=get_raster_extent(clipped_flood_extent),
             )
+            # Save the source GloFAS data to a folder with longer retention, once for all alerts of the country
+            # Files that cannot be hardlinked are copied in the background while the remaining stations are evaluated
+            if not alert_created:
+                if country_sliced_netcdf_paths is None:
+                    country_sliced_netcdf_paths = slice_glofas_discharge_to_countries(
+                        glofas_netcdf_paths, {country: country_bounds}
+                    )[country]
+                archive_thread = archive_alert_glofas_files(country_sliced_netcdf_paths)
+            alert_created = True
 
-            ### Step 9 - Actions after alert submitted ###
-            # Save the source GloFAS data to a folder with longer retention
-            archive_alert_glofas_files(country_sliced_netcdf_paths)
+    ### Step 10 - Actions after alerts submitted ###
+    # The archive copies complete within the country run
+    if archive_thread is not None:
+        archive_thread.join()
 
 
 def _get_glofas_discharge_paths(data_provider: DataProvider) -> list[str]:
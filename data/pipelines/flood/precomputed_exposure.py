@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import logging
+
+from pipelines.flood.determine_exposure import determine_spatial_extent
+from pipelines.infra.data_types.admin_area_types import AdminAreasSet
+from pipelines.infra.data_types.flood_exposure_table import (
+    FloodExposureTable,
+    get_flood_exposure_key,
+)
+from pipelines.infra.data_types.flood_extent_provider import FloodExtentProvider
+from pipelines.infra.data_types.loaded_data_types import (
+    AlertConfig,
+    RasterData,
+    SparseRasterData,
+)
+from pipelines.infra.data_types.location_point import LocationPoint
+from pipelines.infra.utils.admin_area_labels import get_admin_area_labels
+from pipelines.infra.utils.exposure import (
+    aggregate_population_exposed,
+    ClipCache,
+    compute_population_exposed,
+    ReprojectionCache,
+)
+from pipelines.infra.utils.nrw_logger import log_info, LogTag
+from pipelines.infra.utils.raster import get_place_codes_bounding_box
+
+logger = logging.getLogger(__name__)
+
+
+def lookup_precomputed_exposure(
+    exposure_table: FloodExposureTable | None,
+    population_hash: str | None,
+    clipped_flood_extent: RasterData | SparseRasterData,
+    place_codes_exposed: list[str],
+    admin_areas: AdminAreasSet,
+) -> dict[str, float] | None:
+    """
+    Population exposed per place code from the precomputed table, or None if the
+    table has no entry for exactly these inputs.
+    """
+    if exposure_table is None:
+        return None
+    population_exposed = exposure_table.get(
+        population_hash,
+        get_flood_exposure_key(clipped_flood_extent, place_codes_exposed, admin_areas),
+    )
+    return dict(population_exposed) if population_exposed is not None else None
+
+
+def build_flood_exposure_table(
+    country: str,
+    admin_level: int,
+    alert_configs: list[AlertConfig],
+    glofas_stations: dict[str, LocationPoint],
+    admin_areas: AdminAreasSet,
+    population_raster: RasterData,
+    population_hash: str,
+    flood_extent_provider: FloodExtentProvider,
+) -> FloodExposureTable:
+    """
+    Compute the population exposed per place code for every return period and alert
+    config, the same way calculate_flood_forecasts does for an alert.
+
+    population_hash identifies the population raster, see
+    PopulationRasterProvider.get_metadata_hash.
+    """
+    table = FloodExposureTable(country=country, population_hash=population_hash)
+    clip_cache = ClipCache()
+    reprojection_cache = ReprojectionCache()
+    admin_area_labels = get_admin_area_labels(
+        admin_areas=admin_areas,
+        grid=population_raster.grid,
+        country=country,
+        admin_level=admin_level,
+    )
+    for config in alert_configs:
+        station = glofas_stations.get(config.spatial_extent_name)
+        if station is None:
+            continue
+        bounds = get_place_codes_bounding_box(
+            admin_areas, config.spatial_extent_place_codes
+        )
+        for return_period in flood_extent_provider.available_return_periods:
+            clipped_flood_extent, place_codes_exposed = determine_spatial_extent(
+                station=station,
+                station_place_codes=config.spatial_extent_place_codes,
+                admin_areas=admin_areas,
+                flood_extent_raster=flood_extent_provider.get_raster(
+                    return_period, bounds
+                ),
+                clip_cache=clip_cache,
+            )
+            if not place_codes_exposed or clipped_flood_extent is None:
+                continue
+
+            key = get_flood_exposure_key(
+                clipped_flood_extent, place_codes_exposed, admin_areas
+            )
+            if key in table.exposure:
+                continue
+            population_exposed_raster = compute_population_exposed(
+                population_raster,
+                clipped_flood_extent,
+                reprojection_cache=reprojection_cache,
+            )
+            if population_exposed_raster is None:
+                continue
+            table.exposure[key] = aggregate_population_exposed(
+                population_exposed_raster,
+                place_codes_exposed,
+                admin_areas,
+                admin_area_labels=admin_area_labels,
+            )
+
+    log_info(
+        logger,
+        LogTag.FLOOD_LOGIC,
+        f"Precomputed flood exposure for {len(table.exposure)} flood extents "
+        f"of {len(alert_configs)} alert configs in {country}",
+    )
+    return table
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import logging
+
+from shared.country_data import CountryCodeIso3
+
+from pipelines.infra.data_provider import DataProvider
+from pipelines.infra.data_types.admin_area_types import AdminAreasSet
+from pipelines.infra.data_types.data_config_types import CountryRunConfig, DataSource
+from pipelines.infra.data_types.glofas_discharge_provider import (
+    GlofasStreamingSlicer,
+    is_glofas_station_pixel_mode,
+    slice_glofas_discharge_to_countries,
+)
+from pipelines.infra.data_types.location_point import LocationPoint
+from pipelines.infra.utils.nrw_logger import log_info, log_warning, LogTag
+from pipelines.infra.utils.raster import BoundingBox, get_bounding_box
+
+logger = logging.getLogger(__name__)
+
+# Sources needed for the country bounding boxes, loaded before the GloFAS download
+BOUNDS_DATA_SOURCES = (
+    DataSource.ADMIN_AREA_IBF_API,
+    DataSource.GLOFAS_STATIONS_IBF_API,
+)
+
+
+def prepare_flood_forecasts(
+    country_configs: list[CountryRunConfig],
+    data_providers: dict[CountryCodeIso3, DataProvider],
+) -> None:
+    """
+    Slice the global GloFAS files to all countries of the run at once.
+
+    Without this step every country run opens and decodes all global ensemble files
+    again. Here each file is decoded once, and the bounding boxes of all countries
+    are cut out of it in parallel processes. The per-country forecasts then reuse the
+    sliced files (see slice_glofas_discharge_to_countries).
+
+    The country bounding boxes are determined before the download, so each ensemble
+    member is sliced as soon as it is downloaded, while the remaining members are
+    still downloading (see GlofasStreamingSlicer). The country forecasts, and with
+    them the alert evaluation, only start once the download is complete and has
+    at least GLOFAS_MIN_ENSEMBLE_COUNT members.
+
+    Failures are only logged: a country that cannot be prepared is sliced (and its
+    errors reported) in its own forecast run.
+
+    In station pixel mode nothing is sliced up front, since slices are then only
+    made for countries with an alert.
+    """
+    if is_glofas_station_pixel_mode():
+        return
+
+    country_bounds: dict[str, BoundingBox] = {}
+    configs_to_slice: list[CountryRunConfig] = []
+
+    for country_config in country_configs:
+        country = country_config.country_code_iso_3
+        data_provider = data_providers[country]
+
+        # Country-split local data is already sliced
+        if data_provider.local_data == "country":
+            continue
+        configured_sources = {config.source for config in country_config.data_sources}
+        if DataSource.GLOFAS_DISCHARGE_FTP not in configured_sources:
+            continue
+
+        success, _ = data_provider.try_load_data(
+            country_config, sources=BOUNDS_DATA_SOURCES
+        )
+        if not success:
+            _log_not_prepared(country)
+            continue
+        admin_areas = data_provider.get_data(
+            DataSource.ADMIN_AREA_IBF_API, AdminAreasSet
+        )
+        stations: dict[str, LocationPoint] = data_provider.get_data(
+            DataSource.GLOFAS_STATIONS_IBF_API, dict
+        )
+        if not admin_areas or not stations:
+            continue
+
+        country_bounds[country] = get_bounding_box(
+            admin_areas, point_locations=stations
+        )
+        configs_to_slice.append(country_config)
+
+    if not configs_to_slice:
+        return
+
+    country_bounds_by_paths: dict[tuple[str, ...], dict[str, BoundingBox]] = {}
+    with GlofasStreamingSlicer(country_bounds) as slicer:
+        for country_config in configs_to_slice:
+            country = country_config.country_code_iso_3
+            data_provider = data_providers[country]
+            success, _ = data_provider.try_load_data(
+                country_config,
+                sources=(DataSource.GLOFAS_DISCHARGE_FTP,),
+                on_glofas_member_downloaded=slicer.submit,
+            )
+            if not success:
+                _log_not_prepared(country)
+                continue
+            netcdf_paths = data_provider.get_data(DataSource.GLOFAS_DISCHARGE_FTP, list)
+            if not netcdf_paths:
+                continue
+            country_bounds_by_paths.setdefault(tuple(netcdf_paths), {})[country] = (
+                country_bounds[country]
+            )
+
+    # Slices made while downloading are reused, the rest (e.g. members downloaded
+    # before this run) is sliced here
+    for netcdf_paths, country_bounds_to_slice in country_bounds_by_paths.items():
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"Slicing {len(netcdf_paths)} GloFAS files for "
+            f"{', '.join(country_bounds_to_slice)}",
+        )
+        try:
+            slice_glofas_discharge_to_countries(
+                list(netcdf_paths), country_bounds_to_slice
+            )
+        # Unreadable or unwritable files, and HDF5 errors or a broken process pool
+        except (OSError, ValueError, RuntimeError) as exc:
+            log_warning(
+                logger,
+                LogTag.INFRA,
+                f"Slicing GloFAS files for {', '.join(country_bounds_to_slice)} "
+                f"failed, slicing per country instead: {exc}",
+            )
+
+
+def _log_not_prepared(country: str) -> None:
+    log_warning(
+        logger,
+        LogTag.INFRA,
+        f"Could not load GloFAS slicing inputs for '{country}', "
+        "slicing in its own forecast run",
+    )
@@ -8,6 +8,7 @@ This file can be run directly to help debug data loading issues.
 from __future__ import annotations
 
 import logging
+from collections.abc import Callable, Collection
 from pathlib import Path
 from typing import TypeVar
 
@@ -42,9 +43,21 @@ class DataProvider:
         self.local_data = local_data
         self.local_data_date = local_data_date
 
-    def try_load_data(self, country_config: CountryRunConfig) -> tuple[bool, list[str]]:
+    def try_load_data(
+        self,
+        country_config: CountryRunConfig,
+        sources: Collection[DataSource] | None = None,
+        on_glofas_member_downloaded: Callable[[str], None] | None = None,
+    ) -> tuple[bool, list[str]]:
         """Load all data sources for a country.
 
+        When sources is set, only those of the configured sources are loaded. Sources
+        that were already loaded successfully (e.g. by a hazard prepare function) are
+        not loaded again.
+
+        on_glofas_member_downloaded is called with the path of every GloFAS ensemble
+        member downloaded from FTP, as soon as it is downloaded.
+
         Returns a tuple of (success, error messages). Success is True when no
         errors occurred.
         """
@@ -55,6 +68,10 @@ class DataProvider:
 
         errors: list[str] = []
         for source_config in data_sources:
+            if sources is not None and source_config.source not in sources:
+                continue
+            if self.is_loaded(source_config.source):
+                continue
 
             data_container = LoadedDataSource(
                 data_type=DataType.UNSPECIFIED,
@@ -69,6 +86,7 @@ class DataProvider:
                     api_client=self.api_client,
                     local_data_date=self.local_data_date,
                     local_data=self.local_data,
+                    on_glofas_member_downloaded=on_glofas_member_downloaded,
                 )
             except Exception as exc:
                 data_container.error = str(exc)
@@ -83,6 +101,11 @@ class DataProvider:
 
         return not errors, errors
 
+    def is_loaded(self, source: DataSource) -> bool:
+        """Whether the source was loaded without errors."""
+        container = self.loaded_data.get(source)
+        return container is not None and container.error is None
+
     def get_data(self, source: DataSource, expected_type: type[_T]) -> _T:
         if source not in self.loaded_data:
             raise KeyError(f"Data source '{source}' not loaded")
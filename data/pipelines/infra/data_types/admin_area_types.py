@@ -5,6 +5,19 @@ Data structure for holding admin area data
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from itertools import chain
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+from shapely.geometry.base import BaseGeometry
+from shapely.validation import make_valid
+
+# Ragged array nesting (rings, polygons, multipolygons) per GeoJSON geometry type
+_RAGGED_GEOMETRY_TYPES = {
+    "Polygon": (shapely.GeometryType.POLYGON, 2),
+    "MultiPolygon": (shapely.GeometryType.MULTIPOLYGON, 3),
+}
 
 
 @dataclass
@@ -25,35 +38,97 @@ class AdminAreaProperties:
 @dataclass
 class AdminArea:
     """
-    This represents a single admin area, with coordinates being a list of points for the area
+    This represents a single admin area, with its geometry as in the source data.
+
+    Areas loaded from the API get their geometry built in bulk (see
+    AdminAreasSet.from_api) and keep no coordinate lists. Otherwise the geometry is
+    built from geometry_type and coordinates (GeoJSON) on first use.
     """
 
     properties: AdminAreaProperties
     geometry_type: str
-    coordinates: list
-
-    def to_geometry(self):
-        from shapely.geometry import shape
-        from shapely.validation import make_valid
+    coordinates: list = field(default_factory=list, repr=False)
+    geometry: BaseGeometry | None = field(default=None, repr=False)
+    _valid_geometry: BaseGeometry | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def get_geometry(self) -> BaseGeometry:
+        """The geometry as in the source data, not validated."""
+        if self.geometry is None:
+            self.geometry = shape(
+                {"type": self.geometry_type, "coordinates": self.coordinates}
+            )
+        return self.geometry
 
-        return make_valid(
-            shape({"type": self.geometry_type, "coordinates": self.coordinates})
-        )
+    def to_geometry(self) -> BaseGeometry:
+        """The validated geometry, computed once."""
+        if self._valid_geometry is None:
+            self._valid_geometry = make_valid(self.get_geometry())
+        return self._valid_geometry
 
 
 @dataclass
 class AdminAreasSet:
     # Admin areas are keyed on admin area code, at the target admin level only
     admin_areas: dict[str, AdminArea]
+    # Bounds (min_x, min_y, max_x, max_y) per admin area, in the order of admin_areas
+    _area_bounds: np.ndarray | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _area_indexes: dict[str, int] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def __bool__(self) -> bool:
         return bool(self.admin_areas)
 
+    def get_bounds(
+        self, place_codes: list[str] | None = None
+    ) -> tuple[float, float, float, float] | None:
+        """
+        Bounding box (min_x, min_y, max_x, max_y) of all admin areas, or of those with
+        the given place codes. None if there are no such areas (with coordinates).
+
+        Computed from the coordinates of the source geometries, without validating
+        or merging them. The bounds of all areas are computed once, in one
+        vectorized call, so admin areas must not be changed afterwards.
+        """
+        if self._area_bounds is None:
+            self._area_indexes = {
+                pcode: index for index, pcode in enumerate(self.admin_areas)
+            }
+            self._area_bounds = shapely.bounds(
+                [area.get_geometry() for area in self.admin_areas.values()]
+            ).reshape(-1, 4)
+
+        if place_codes is None:
+            bounds = self._area_bounds
+        else:
+            bounds = self._area_bounds[
+                [
+                    self._area_indexes[pcode]
+                    for pcode in place_codes
+                    if pcode in self._area_indexes
+                ]
+            ]
+        # Empty geometries have NaN bounds
+        bounds = bounds[~np.isnan(bounds).any(axis=1)]
+        if not len(bounds):
+            return None
+        min_x, min_y = bounds[:, :2].min(axis=0)
+        max_x, max_y = bounds[:, 2:].max(axis=0)
+        return float(min_x), float(min_y), float(max_x), float(max_y)
+
     @staticmethod
     def from_api(feature_collection: dict) -> AdminAreasSet:
         admin_areas: dict[str, AdminArea] = {}
 
-        for feature in feature_collection.get("features", []):
+        features = feature_collection.get("features", [])
+        geometries = _build_geometries(
+            [feature.get("geometry") or {} for feature in features]
+        )
+        for feature, geometry in zip(features, geometries):
             props = feature.get("properties", {})
             geom = feature.get("geometry") or {}
 
@@ -73,7 +148,66 @@ class AdminAreasSet:
                     parent_pcodes=parent_pcodes,
                 ),
                 geometry_type=geom.get("type", ""),
-                coordinates=geom.get("coordinates", []),
+                # Only kept when the geometry could not be built up front
+                coordinates=geom.get("coordinates", []) if geometry is None else [],
+                geometry=geometry,
             )
 
         return AdminAreasSet(admin_areas=admin_areas)
+
+
+def _build_geometries(geojson_geometries: list[dict]) -> list[BaseGeometry | None]:
+    """
+    Build the shapely geometries of (multi)polygons at once: their coordinates are
+    flattened into one coordinate buffer per geometry type, instead of creating every
+    ring and polygon object separately.
+
+    Geometries of other types, or that cannot be built this way (e.g. with 3D
+    coordinates), are None, and built from their coordinates on use.
+    """
+    geometries: list[BaseGeometry | None] = [None] * len(geojson_geometries)
+    for geometry_type, (ragged_type, depth) in _RAGGED_GEOMETRY_TYPES.items():
+        indexes = [
+            i
+            for i, geometry in enumerate(geojson_geometries)
+            if geometry.get("type") == geometry_type
+        ]
+        if not indexes:
+            continue
+        coordinates = [geojson_geometries[i].get("coordinates", []) for i in indexes]
+        built = _from_coordinates(ragged_type, depth, coordinates)
+        if built is None:
+            # Find the geometries that can be built, one by one
+            built = [
+                single[0] if single is not None else None
+                for single in (
+                    _from_coordinates(ragged_type, depth, [part])
+                    for part in coordinates
+                )
+            ]
+        for i, geometry in zip(indexes, built):
+            geometries[i] = geometry
+    return geometries
+
+
+def _from_coordinates(
+    ragged_type: shapely.GeometryType, depth: int, coordinates: list
+) -> list[BaseGeometry] | None:
+    parts = coordinates
+    # From the outermost level inwards: parts per geometry, then rings per polygon,
+    # and finally the coordinates of the rings
+    offsets: list[np.ndarray] = []
+    for _ in range(depth):
+        offsets.append(np.cumsum([0, *(len(part) for part in parts)]))
+        parts = list(chain.from_iterable(parts))
+    try:
+        coords = np.asarray(parts, dtype=np.float64)
+        if coords.size == 0:
+            coords = coords.reshape(0, 2)
+        if coords.ndim != 2 or coords.shape[1] != 2:
+            return None
+        return list(
+            shapely.from_ragged_array(ragged_type, coords, tuple(offsets[::-1]))
+        )
+    except (ValueError, TypeError, shapely.errors.GEOSException):
+        return None
@@ -0,0 +1,99 @@
+"""
+Population exposure precomputed per flood extent and place code.
+
+Flood extents and the population raster change at most a few times a year, so the
+exposed population of an alert can be computed offline (see
+data_management/seed_data_management/precompute_flood_exposure.py). The table is
+stored in the seed repo next to the flood extents.
+
+Entries are keyed by a content hash of the inputs of the exposure computation: the
+clipped flood extent raster and the geometries of the place codes it is aggregated
+to. Together with the hash of the population raster metadata, a matching key means
+the computation would give exactly the stored values. The metadata identifies the
+population raster without downloading it, so a table hit never fetches the raster.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+import shapely
+from pipelines.infra.data_types.admin_area_types import AdminAreasSet
+from pipelines.infra.data_types.loaded_data_types import RasterData, SparseRasterData
+
+# Version 2 keys the population by its metadata hash instead of its content hash
+FLOOD_EXPOSURE_TABLE_VERSION = 2
+
+
+@dataclass
+class FloodExposureTable:
+    country: str
+    population_hash: str
+    # Exposed population per place code, keyed by get_flood_exposure_key
+    exposure: dict[str, dict[str, float]] = field(default_factory=dict)
+
+    def get(self, population_hash: str | None, key: str) -> dict[str, float] | None:
+        """Precomputed exposure, or None if it was computed for other inputs."""
+        if population_hash is None or population_hash != self.population_hash:
+            return None
+        return self.exposure.get(key)
+
+    @staticmethod
+    def from_json(data: dict) -> FloodExposureTable | None:
+        """Parse a stored table. Returns None for tables of another version."""
+        if data.get("version") != FLOOD_EXPOSURE_TABLE_VERSION:
+            return None
+        return FloodExposureTable(
+            country=data["country"],
+            population_hash=data["population_hash"],
+            exposure=data["exposure"],
+        )
+
+    def to_json(self) -> dict:
+        return {
+            "version": FLOOD_EXPOSURE_TABLE_VERSION,
+            "country": self.country,
+            "population_hash": self.population_hash,
+            "exposure": self.exposure,
+        }
+
+
+def get_flood_exposure_key(
+    clipped_flood_extent: RasterData | SparseRasterData,
+    place_codes: list[str],
+    admin_areas: AdminAreasSet,
+) -> str:
+    """
+    Content hash of the inputs of the exposure of a clipped flood extent, aggregated
+    to the given place codes.
+
+    The whole place code set is part of the key, not only each place code: the flood
+    extent is clipped to their union, so the exposure at the border of a place code
+    depends on its neighbours in the set.
+
+    A sparse flood extent is hashed as its dense raster, so the keys of both match.
+    """
+    if isinstance(clipped_flood_extent, SparseRasterData):
+        clipped_flood_extent = clipped_flood_extent.to_raster_data()
+    array = np.ascontiguousarray(clipped_flood_extent.array, dtype=np.float32)
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            [
+                array.shape,
+                list(clipped_flood_extent.transform)[:6],
+                clipped_flood_extent.crs,
+                clipped_flood_extent.nodata,
+            ]
+        ).encode()
+    )
+    digest.update(array.data)
+    for place_code in place_codes:
+        digest.update(json.dumps(place_code).encode())
+        admin_area = admin_areas.admin_areas.get(place_code)
+        if admin_area is not None:
+            digest.update(shapely.to_wkb(admin_area.get_geometry()))
+    return digest.hexdigest()
@@ -1,40 +1,192 @@
 from __future__ import annotations
 
+import json
 import logging
+import math
+import os
+from collections.abc import Iterator
 from dataclasses import dataclass, field
 
 import numpy as np
-from pipelines.infra.data_types.loaded_data_types import RasterData
-from pipelines.infra.utils.nrw_logger import log_info, LogTag
+from pipelines.infra.data_types.flood_exposure_table import FloodExposureTable
+from pipelines.infra.data_types.loaded_data_types import RasterData, SparseRasterData
+from pipelines.infra.utils.nrw_logger import log_info, log_warning, LogTag
+from pipelines.infra.utils.raster import (
+    BoundingBox,
+    crop_raster_to_bounds,
+    crop_sparse_raster_to_bounds,
+    get_bounds_window,
+)
+from pipelines.infra.utils.storage_helpers import get_flood_extent_cache_dir
 from rasterio.transform import Affine
-from shared.download_helpers import download_json_source, download_object
-from shared.image_helpers import rgba_png_to_float_array
+from shared.download_helpers import (
+    download_json_source,
+    download_object,
+    download_object_if_none_match,
+)
+from shared.image_helpers import (
+    get_png_shape,
+    iter_rgba_png_float32_blocks,
+    rgba_png_to_float32_array,
+)
 
 logger = logging.getLogger(__name__)
 
 
 @dataclass
 class FloodExtentProvider:
+    """
+    Flood extent rasters of a country from the seed repo, per return period.
+
+    Decoded rasters are kept in memory for the run. With DATA_CACHE_DIR set they are
+    also kept on disk, as a float32 .npy array (memory-mapped on read) plus a JSON
+    sidecar with the transform, CRS, nodata and the ETags of the PNG and metadata.
+    Later runs revalidate them with If-None-Match, and only download and decode a
+    raster again when the seed repo has changed it.
+
+    When the seed repo also has the rasters in tiles (tiled=True, see
+    convert_flood_extents_to_png.py), a raster requested for bounds is assembled from
+    only the tiles intersecting them.
+
+    The rasters are also available sparse (get_sparse_raster), storing only their
+    flooded pixels. Without DATA_CACHE_DIR, a sparse raster is decoded from the PNG
+    block by block, so the dense raster is never in memory.
+
+    The seed repo can also have a table of the population exposure precomputed for
+    these rasters (exposure_table_filename, see FloodExposureTable).
+    """
+
     available_return_periods: list[int]
     base_url: str
     country: str
+    tiled: bool = False
+    exposure_table_filename: str | None = None
     _cache: dict[str, RasterData] = field(default_factory=dict)
+    _sparse_cache: dict[str, SparseRasterData] = field(default_factory=dict)
+    _tile_indexes: dict[str, dict] = field(default_factory=dict)
+    _tile_cache: dict[tuple[str, int, int], np.ndarray] = field(default_factory=dict)
+    _exposure_table: FloodExposureTable | None = None
+    _exposure_table_loaded: bool = False
 
-    def get_raster(self, return_period: int) -> RasterData:
+    def get_raster(
+        self, return_period: int, bounds: BoundingBox | None = None
+    ) -> RasterData:
+        """
+        Flood extent raster of a return period. With bounds (in the raster CRS), only
+        the part covering the bounds (plus a pixel around them) is returned.
+        """
         key = f"rp{return_period}"
 
+        if bounds is not None:
+            if self.tiled and key not in self._cache:
+                return self._get_tiled_window(key, bounds)
+            return crop_raster_to_bounds(self.get_raster(return_period), bounds)
+
         if key in self._cache:
             return self._cache[key]
 
-        raster = self._fetch_and_decode(key)
+        cache_dir = get_flood_extent_cache_dir(self.country)
+        if cache_dir is None:
+            raster = self._fetch_and_decode(key)
+        else:
+            raster = self._fetch_and_decode_cached(key, cache_dir)
         self._cache[key] = raster
         return raster
 
-    def _fetch_and_decode(self, key: str) -> RasterData:
+    def get_sparse_raster(
+        self, return_period: int, bounds: BoundingBox | None = None
+    ) -> SparseRasterData:
+        """As get_raster, as a sparse raster with nodata as the fill value."""
+        key = f"rp{return_period}"
+
+        if bounds is not None:
+            if self.tiled and key not in self._sparse_cache and key not in self._cache:
+                return self._get_sparse_tiled_window(key, bounds)
+            return crop_sparse_raster_to_bounds(
+                self.get_sparse_raster(return_period), bounds
+            )
+
+        if key not in self._sparse_cache:
+            if (
+                key in self._cache
+                or get_flood_extent_cache_dir(self.country) is not None
+            ):
+                # Already decoded, or memory-mapped from the cache
+                raster = SparseRasterData.from_raster_data(
+                    self.get_raster(return_period)
+                )
+            else:
+                raster = self._fetch_and_decode_sparse(key)
+            self._sparse_cache[key] = raster
+        return self._sparse_cache[key]
+
+    def get_exposure_table(self) -> FloodExposureTable | None:
+        """
+        Precomputed exposure table of the country, or None if the seed repo has none.
+        Downloaded once per run.
+        """
+        if self.exposure_table_filename is None or self._exposure_table_loaded:
+            return self._exposure_table
+        self._exposure_table_loaded = True
+
+        table_url = f"{self.base_url}{self.exposure_table_filename}"
+        data = download_json_source(table_url, check_count=False)
+        if data is None:
+            log_warning(
+                logger,
+                LogTag.INFRA,
+                f"Failed to download flood exposure table from '{table_url}', "
+                "computing exposure instead",
+            )
+            return None
+        self._exposure_table = FloodExposureTable.from_json(data)
+        if self._exposure_table is None:
+            log_warning(
+                logger,
+                LogTag.INFRA,
+                f"Ignoring flood exposure table '{table_url}' of another version",
+            )
+        return self._exposure_table
+
+    def _get_urls(self, key: str) -> tuple[str, str]:
         png_filename = f"{self.country}_flood_extent_{key}.png"
         json_filename = f"{self.country}_flood_extent_{key}_metadata.json"
-        png_url = f"{self.base_url}{png_filename}"
-        json_url = f"{self.base_url}{json_filename}"
+        return f"{self.base_url}{png_filename}", f"{self.base_url}{json_filename}"
+
+    def _fetch_and_decode(self, key: str) -> RasterData:
+        png_bytes, json_data = self._fetch(key)
+        float_array = rgba_png_to_float32_array(png_bytes)
+        transform = Affine(*json_data["transform"][:6])
+        crs = json_data["crs"]
+        nodata = json_data["nodata"]
+
+        log_info(logger, LogTag.INFRA, f"Downloaded and decoded flood extent '{key}'")
+        return RasterData(
+            array=float_array,
+            transform=transform,
+            crs=crs,
+            nodata=nodata,
+        )
+
+    def _fetch_and_decode_sparse(self, key: str) -> SparseRasterData:
+        png_bytes, json_data = self._fetch(key)
+        raster = SparseRasterData.from_row_blocks(
+            iter_rgba_png_float32_blocks(png_bytes),
+            shape=get_png_shape(png_bytes),
+            transform=Affine(*json_data["transform"][:6]),
+            crs=json_data["crs"],
+            nodata=json_data["nodata"],
+        )
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"Downloaded and decoded flood extent '{key}' "
+            f"({raster.indexes.size} flooded pixels)",
+        )
+        return raster
+
+    def _fetch(self, key: str) -> tuple[bytes, dict]:
+        png_url, json_url = self._get_urls(key)
 
         png_bytes = download_object(png_url)
         if png_bytes is None:
@@ -47,16 +199,269 @@ class FloodExtentProvider:
             raise FileNotFoundError(
                 f"Failed to download flood extent metadata from '{json_url}'"
             )
+        return png_bytes, json_data
 
-        float_array = rgba_png_to_float_array(png_bytes)
-        transform = Affine(*json_data["transform"][:6])
-        crs = json_data["crs"]
-        nodata = json_data["nodata"]
+    def _fetch_and_decode_cached(self, key: str, cache_dir: str) -> RasterData:
+        png_url, json_url = self._get_urls(key)
+        array_path = os.path.join(cache_dir, f"{key}.npy")
+        sidecar_path = os.path.join(cache_dir, f"{key}.json")
+        sidecar = _load_sidecar(array_path, sidecar_path)
 
-        log_info(logger, LogTag.INFRA, f"Downloaded and decoded flood extent '{key}'")
+        png_download = download_object_if_none_match(
+            png_url, sidecar["png_etag"] if sidecar else None
+        )
+        json_download = download_object_if_none_match(
+            json_url, sidecar["metadata_etag"] if sidecar else None
+        )
+        if png_download is None or json_download is None:
+            failed_url = png_url if png_download is None else json_url
+            if sidecar is None:
+                kind = "PNG" if png_download is None else "metadata"
+                raise FileNotFoundError(
+                    f"Failed to download flood extent {kind} from '{failed_url}'"
+                )
+            log_warning(
+                logger,
+                LogTag.INFRA,
+                f"Could not revalidate flood extent '{key}' ('{failed_url}'), "
+                "using the cached raster",
+            )
+            return _open_cached_raster(array_path, sidecar)
+
+        png_bytes, png_etag = png_download
+        json_bytes, metadata_etag = json_download
+        if sidecar is not None and png_bytes is None and json_bytes is None:
+            log_info(logger, LogTag.INFRA, f"Reusing cached flood extent '{key}'")
+            return _open_cached_raster(array_path, sidecar)
+
+        # Unchanged parts (HTTP 304) come from the cache, so a metadata-only change
+        # does not decode the PNG again
+        if json_bytes is not None:
+            json_data = json.loads(json_bytes)
+            metadata = {
+                "transform": list(json_data["transform"][:6]),
+                "crs": json_data["crs"],
+                "nodata": json_data["nodata"],
+            }
+        elif sidecar is not None:
+            metadata = {name: sidecar[name] for name in ("transform", "crs", "nodata")}
+        else:
+            raise FileNotFoundError(
+                f"Flood extent metadata for '{key}' is not cached, but '{json_url}' "
+                "was reported as unchanged"
+            )
+        if png_bytes is not None:
+            _write_array(array_path, rgba_png_to_float32_array(png_bytes))
+            log_info(
+                logger, LogTag.INFRA, f"Downloaded and decoded flood extent '{key}'"
+            )
+
+        sidecar = {**metadata, "png_etag": png_etag, "metadata_etag": metadata_etag}
+        temp_sidecar_path = f"{sidecar_path}.tmp"
+        with open(temp_sidecar_path, "w") as f:
+            json.dump(sidecar, f)
+        os.replace(temp_sidecar_path, sidecar_path)
+        return _open_cached_raster(array_path, sidecar)
+
+    def _get_tiled_window(self, key: str, bounds: BoundingBox) -> RasterData:
+        index = self._get_tile_index(key)
+        transform = Affine(*index["transform"][:6])
+        row_start, row_end, col_start, col_end = get_bounds_window(
+            transform, (index["height"], index["width"]), bounds, padding=1
+        )
+
+        # Tiles without any flooding are not stored, and stay 0 (no flood)
+        window = np.zeros((row_end - row_start, col_end - col_start), dtype=np.float32)
+        decoded_count = 0
+        for top, left, piece in self._iter_tile_pieces(
+            key, index, (row_start, row_end, col_start, col_end)
+        ):
+            window[top : top + piece.shape[0], left : left + piece.shape[1]] = piece
+            decoded_count += 1
+
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"Assembled flood extent '{key}' window {window.shape} "
+            f"from {decoded_count} tiles",
+        )
         return RasterData(
-            array=float_array.astype(np.float32),
-            transform=transform,
-            crs=crs,
-            nodata=nodata,
+            array=window,
+            transform=transform * Affine.translation(col_start, row_start),
+            crs=index["crs"],
+            nodata=index["nodata"],
+        )
+
+    def _get_sparse_tiled_window(
+        self, key: str, bounds: BoundingBox
+    ) -> SparseRasterData:
+        index = self._get_tile_index(key)
+        if index["nodata"] != 0:
+            # Tiles not stored are 0, which is then not the fill value
+            return SparseRasterData.from_raster_data(
+                self._get_tiled_window(key, bounds)
+            )
+        transform = Affine(*index["transform"][:6])
+        row_start, row_end, col_start, col_end = get_bounds_window(
+            transform, (index["height"], index["width"]), bounds, padding=1
         )
+
+        width = col_end - col_start
+        index_parts: list[np.ndarray] = [np.empty(0, dtype=np.int64)]
+        value_parts: list[np.ndarray] = [np.empty(0, dtype=np.float32)]
+        for top, left, piece in self._iter_tile_pieces(
+            key, index, (row_start, row_end, col_start, col_end)
+        ):
+            rows, cols = np.nonzero(piece)
+            index_parts.append((rows + top) * width + cols + left)
+            value_parts.append(piece[rows, cols])
+        # Tile by tile, so sorted into row-major order
+        indexes = np.concatenate(index_parts)
+        order = np.argsort(indexes, kind="stable")
+
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"Assembled sparse flood extent '{key}' window "
+            f"{(row_end - row_start, width)} from {len(index_parts) - 1} tiles",
+        )
+        return SparseRasterData(
+            indexes=indexes[order],
+            values=np.concatenate(value_parts)[order],
+            shape=(row_end - row_start, width),
+            transform=transform * Affine.translation(col_start, row_start),
+            crs=index["crs"],
+            nodata=0,
+            fill_value=0,
+        )
+
+    def _iter_tile_pieces(
+        self, key: str, index: dict, window: tuple[int, int, int, int]
+    ) -> Iterator[tuple[int, int, np.ndarray]]:
+        """
+        The parts of the stored tiles inside a window, with their row and column
+        offsets in the window. Tiles without any flooding are not stored.
+        """
+        row_start, row_end, col_start, col_end = window
+        if row_end <= row_start or col_end <= col_start:
+            return
+        tile_size = index["tile_size"]
+        stored_tiles = {(row, col) for row, col in index["tiles"]}
+        for tile_row in range(row_start // tile_size, math.ceil(row_end / tile_size)):
+            for tile_col in range(
+                col_start // tile_size, math.ceil(col_end / tile_size)
+            ):
+                if (tile_row, tile_col) not in stored_tiles:
+                    continue
+                tile = self._get_tile(key, index, tile_row, tile_col)
+                tile_top = tile_row * tile_size
+                tile_left = tile_col * tile_size
+                top = max(row_start, tile_top)
+                bottom = min(row_end, tile_top + tile.shape[0])
+                left = max(col_start, tile_left)
+                right = min(col_end, tile_left + tile.shape[1])
+                yield top - row_start, left - col_start, tile[
+                    top - tile_top : bottom - tile_top,
+                    left - tile_left : right - tile_left,
+                ]
+
+    def _get_tile_index(self, key: str) -> dict:
+        if key not in self._tile_indexes:
+            index_url = f"{self.base_url}{self.country}_flood_extent_{key}_tiles.json"
+            index = download_json_source(index_url, check_count=False)
+            if index is None:
+                raise FileNotFoundError(
+                    f"Failed to download flood extent tile index from '{index_url}'"
+                )
+            self._tile_indexes[key] = index
+        return self._tile_indexes[key]
+
+    def _get_tile(self, key: str, index: dict, row: int, col: int) -> np.ndarray:
+        cache_key = (key, row, col)
+        if cache_key not in self._tile_cache:
+            tile_url = self.base_url + index["tile_filename"].format(row=row, col=col)
+            cache_dir = get_flood_extent_cache_dir(self.country)
+            tile_path = None
+            if cache_dir is not None:
+                tile_dir = os.path.join(cache_dir, f"{key}_tiles")
+                os.makedirs(tile_dir, exist_ok=True)
+                tile_path = os.path.join(tile_dir, f"{row}_{col}.npy")
+            self._tile_cache[cache_key] = _fetch_decoded_tile(tile_url, tile_path)
+        return self._tile_cache[cache_key]
+
+
+def _fetch_decoded_tile(tile_url: str, tile_path: str | None) -> np.ndarray:
+    """
+    Download and decode a flood extent tile. With a tile_path, the decoded tile is
+    cached there and revalidated by ETag, like the full rasters.
+    """
+    if tile_path is None:
+        png_bytes = download_object(tile_url)
+        if png_bytes is None:
+            raise FileNotFoundError(
+                f"Failed to download flood extent tile from '{tile_url}'"
+            )
+        return rgba_png_to_float32_array(png_bytes)
+
+    etag_path = f"{tile_path}.etag"
+    etag = None
+    if os.path.exists(tile_path) and os.path.exists(etag_path):
+        with open(etag_path) as f:
+            etag = f.read()
+
+    download = download_object_if_none_match(tile_url, etag)
+    if download is None:
+        if etag is None:
+            raise FileNotFoundError(
+                f"Failed to download flood extent tile from '{tile_url}'"
+            )
+        log_warning(
+            logger,
+            LogTag.INFRA,
+            f"Could not revalidate flood extent tile '{tile_url}', using the cached tile",
+        )
+        return np.load(tile_path, mmap_mode="r")
+
+    png_bytes, new_etag = download
+    if png_bytes is not None:
+        _write_array(tile_path, rgba_png_to_float32_array(png_bytes))
+        if new_etag is None:
+            if os.path.exists(etag_path):
+                os.remove(etag_path)
+        else:
+            with open(etag_path, "w") as f:
+                f.write(new_etag)
+    return np.load(tile_path, mmap_mode="r")
+
+
+def _load_sidecar(array_path: str, sidecar_path: str) -> dict | None:
+    if not os.path.exists(array_path) or not os.path.exists(sidecar_path):
+        return None
+    try:
+        with open(sidecar_path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as exc:
+        log_warning(
+            logger,
+            LogTag.INFRA,
+            f"Ignoring unreadable flood extent cache {sidecar_path}: {exc}",
+        )
+        return None
+
+
+def _write_array(array_path: str, float_array: np.ndarray) -> None:
+    # Write under a temporary name and rename when complete, so an interrupted run
+    # never leaves a truncated array behind
+    temp_array_path = f"{array_path}.tmp"
+    with open(temp_array_path, "wb") as f:
+        np.save(f, float_array.astype(np.float32, copy=False))
+    os.replace(temp_array_path, array_path)
+
+
+def _open_cached_raster(array_path: str, sidecar: dict) -> RasterData:
+    return RasterData(
+        array=np.load(array_path, mmap_mode="r"),
+        transform=Affine(*sidecar["transform"]),
+        crs=sidecar["crs"],
+        nodata=sidecar["nodata"],
+    )
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import rasterio
+from numpy.lib.format import open_memmap
+from pipelines.infra.utils.nrw_logger import log_info, log_with_tag, LogTag
+from pipelines.infra.utils.storage_helpers import (
+    get_glofas_discharge_cube_path,
+    GLOFAS_CUBE_SIDECAR_SUFFIX,
+)
+from rasterio.transform import Affine, rowcol
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GlofasDischargeCube:
+    """
+    All ensemble members of a country-split GloFAS forecast in one memory-mapped array.
+
+    discharge has shape (ensemble, lead_time, lat, lon) and is read lazily from disk,
+    so sampling a station only reads the pixels it needs. transform maps (lon, lat) to
+    the grid like the transform of the country-split NetCDF files.
+    """
+
+    discharge: np.ndarray
+    transform: Affine
+    member_paths: list[str]
+
+    def sample(
+        self,
+        lons: np.ndarray,
+        lats: np.ndarray,
+        lead_time_min: int,
+        lead_time_max: int,
+    ) -> np.ndarray:
+        """
+        Discharge at the given locations, with shape (ensemble, lead_time, location).
+        Locations outside the grid get NaN.
+        """
+        rows, cols = rowcol(self.transform, lons, lats)
+        rows = np.asarray(rows)
+        cols = np.asarray(cols)
+        ensemble_count, _, height, width = self.discharge.shape
+        in_bounds = (rows >= 0) & (rows < height) & (cols >= 0) & (cols < width)
+
+        discharges = np.full(
+            (ensemble_count, lead_time_max - lead_time_min + 1, len(rows)),
+            np.nan,
+            dtype=np.float64,
+        )
+        discharges[:, :, in_bounds] = self.discharge[
+            :, lead_time_min : lead_time_max + 1, rows[in_bounds], cols[in_bounds]
+        ]
+        return discharges
+
+
+def load_glofas_discharge_cube(
+    country: str, country_sliced_paths: list[str]
+) -> GlofasDischargeCube:
+    """
+    Consolidate country-split GloFAS NetCDF files into one ensemble cube.
+
+    The cube is written next to the NetCDF files, as a raw .npy array plus a JSON
+    sidecar listing the member files and the grid transform. An existing cube is
+    reused when it contains the same members and is newer than all of them, so the
+    cube kept in the country-split cache also serves --local-data country runs.
+
+    Missing member files are left out, like in station extraction.
+    """
+    member_paths = [path for path in country_sliced_paths if os.path.exists(path)]
+    if not member_paths:
+        raise FileNotFoundError(
+            f"No country-split GloFAS files found to consolidate for {country}"
+        )
+
+    cube_path = get_glofas_discharge_cube_path(country, member_paths[0])
+    sidecar_path = os.path.splitext(cube_path)[0] + GLOFAS_CUBE_SIDECAR_SUFFIX
+
+    cube = _open_cube_if_up_to_date(cube_path, sidecar_path, member_paths)
+    if cube is not None:
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"Reusing GloFAS discharge cube for {country}: {cube_path}",
+        )
+        return cube
+
+    build_start = time.monotonic()
+    _write_cube(cube_path, sidecar_path, member_paths)
+    log_with_tag(
+        logger,
+        LogTag.JOB_TIMER,
+        f"Consolidated {len(member_paths)} GloFAS ensemble files for {country} "
+        f"into {cube_path} in {time.monotonic() - build_start:.1f}s",
+    )
+
+    cube = _open_cube_if_up_to_date(cube_path, sidecar_path, member_paths)
+    if cube is None:
+        raise ValueError(f"GloFAS discharge cube could not be read back: {cube_path}")
+    return cube
+
+
+def _open_cube_if_up_to_date(
+    cube_path: str, sidecar_path: str, member_paths: list[str]
+) -> GlofasDischargeCube | None:
+    if not os.path.exists(cube_path) or not os.path.exists(sidecar_path):
+        return None
+
+    with open(sidecar_path) as f:
+        sidecar = json.load(f)
+    if sidecar.get("members") != [os.path.basename(p) for p in member_paths]:
+        return None
+    newest_member = max(os.path.getmtime(path) for path in member_paths)
+    if os.path.getmtime(cube_path) < newest_member:
+        return None
+
+    return GlofasDischargeCube(
+        discharge=np.load(cube_path, mmap_mode="r"),
+        transform=Affine(*sidecar["transform"]),
+        member_paths=member_paths,
+    )
+
+
+def _write_cube(cube_path: str, sidecar_path: str, member_paths: list[str]) -> None:
+    # Read through rasterio, like station extraction, so the cube holds exactly the
+    # values and grid orientation that sampling the NetCDF files would give.
+    with rasterio.open(member_paths[0]) as src:
+        shape = (len(member_paths), src.count, src.height, src.width)
+        dtype = src.dtypes[0]
+        transform = src.transform
+
+    # Write under temporary names and rename when complete, so an interrupted run
+    # never leaves a cube behind that looks up to date.
+    temp_cube_path = f"{cube_path}.tmp"
+    discharge = open_memmap(temp_cube_path, mode="w+", dtype=dtype, shape=shape)
+    try:
+        for ensemble_index, member_path in enumerate(member_paths):
+            with rasterio.open(member_path) as src:
+                if (src.count, src.height, src.width) != shape[1:]:
+                    raise ValueError(
+                        f"GloFAS file {member_path} does not match the grid of "
+                        f"{member_paths[0]}"
+                    )
+                discharge[ensemble_index] = src.read()
+        discharge.flush()
+    finally:
+        del discharge
+
+    temp_sidecar_path = f"{sidecar_path}.tmp"
+    with open(temp_sidecar_path, "w") as f:
+        json.dump(
+            {
+                "members": [os.path.basename(p) for p in member_paths],
+                "shape": list(shape),
+                "dtype": dtype,
+                "dims": ["ensemble", "lead_time", "lat", "lon"],
+                "transform": list(transform)[:6],
+            },
+            f,
+        )
+    os.replace(temp_cube_path, cube_path)
+    os.replace(temp_sidecar_path, sidecar_path)
@@ -1,14 +1,28 @@
 from __future__ import annotations
 
+import contextlib
 import ftplib
-import io
+import json
 import logging
+import multiprocessing
 import os
+import queue
+import threading
 import time
+from collections.abc import Callable
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from datetime import datetime, timezone
+from typing import Self
 
+import netCDF4
+import numpy as np
 from pipelines.flood.constants import GLOFAS_MIN_ENSEMBLE_COUNT
 from pipelines.infra.environment import load_environment_settings
+from pipelines.infra.utils.glofas_download_manifest import (
+    GlofasDownloadManifest,
+    RemoteFileInfo,
+)
 from pipelines.infra.utils.nrw_logger import (
     log_error,
     log_info,
@@ -16,13 +30,17 @@ from pipelines.infra.utils.nrw_logger import (
     log_with_tag,
     LogTag,
 )
+from pipelines.infra.utils.raster import BoundingBox, slice_netcdf_to_multiple_bounds
 from pipelines.infra.utils.storage_helpers import (
     find_latest_forecast_date_in_cache,
     get_cached_glofas_country_split_files,
     get_cached_glofas_files,
+    get_glofas_country_split_path,
     get_glofas_mock_data_dir,
     get_glofas_raw_data_dir,
     GLOFAS_COUNTRY_SPLIT_DATA_DIR,
+    GLOFAS_PARTIAL_FILE_SUFFIX,
+    GLOFAS_PARTIAL_INFO_SUFFIX,
     GLOFAS_RAW_DATA_DIR,
 )
 
@@ -30,8 +48,15 @@ logger = logging.getLogger(__name__)
 
 GLOFAS_FTP_BASE_PATH = "DATA/CEMS_Flood_Glofas/fc_netcdf"
 
+# Number of concurrent FTP sessions used to download ensemble members.
+# Kept low, since the ECMWF FTP server limits concurrent sessions per user.
+GLOFAS_FTP_DEFAULT_PARALLELISM = 4
+
 
-def download_glofas_discharge_from_ftp(country: str) -> list[str]:
+def download_glofas_discharge_from_ftp(
+    country: str,
+    on_member_downloaded: Callable[[str], None] | None = None,
+) -> list[str]:
     """
     Download GloFAS discharge NetCDF files from FTP for today's forecast.
 
@@ -44,29 +69,52 @@ def download_glofas_discharge_from_ftp(country: str) -> list[str]:
         GLOFAS_FTP_USER: FTP username
         GLOFAS_FTP_PASSWORD: FTP password
         GLOFAS_FTP_ENSEMBLE_COUNT: Number of ensemble members (default: 51)
+        GLOFAS_FTP_PARALLELISM: Number of concurrent FTP sessions (default: 4)
+
+    When on_member_downloaded is set, it is called with the local path of every
+    ensemble member as soon as it is downloaded (see GlofasStreamingSlicer).
 
     Returns a list of local file paths to the downloaded NetCDF files.
     """
     host, user, password = _load_ftp_credentials()
     ensemble_count = int(os.environ.get("GLOFAS_FTP_ENSEMBLE_COUNT", "51"))
+    parallelism = int(
+        os.environ.get("GLOFAS_FTP_PARALLELISM", str(GLOFAS_FTP_DEFAULT_PARALLELISM))
+    )
 
     forecast_date = datetime.now(timezone.utc).strftime("%Y%m%d")
     forecast_date = _resolve_forecast_date(forecast_date, user, password, host)
 
-    existing_download = _try_reuse_existing_download(forecast_date)
+    manifest = GlofasDownloadManifest.load(get_glofas_raw_data_dir(forecast_date))
+    existing_download = _try_reuse_existing_download(forecast_date, manifest)
     if existing_download is not None:
         return existing_download
 
-    # Resume from a partial download only in development (avoids re-downloading all
-    # files when a connection failure interrupts a local run).
-    # On prod and test, always start fresh.
-    env = load_environment_settings()
-    resume_index = 0
-    if env.is_development:
-        resume_index = _get_download_resume_index(forecast_date)
+    # Members completed by an earlier (interrupted) run are kept when they still match
+    # the server, and partially transferred members are resumed from their byte offset.
+    remote_files = _list_remote_ensemble_files(
+        host,
+        user,
+        password,
+        forecast_date,
+        [_get_ensemble_filename(i, forecast_date) for i in range(ensemble_count)],
+    )
+    pending_filenames = _get_pending_ensemble_filenames(
+        forecast_date, ensemble_count, manifest, remote_files
+    )
 
     downloaded_paths = _download_ensemble_files(
-        host, user, password, forecast_date, ensemble_count, resume_index, country
+        host,
+        user,
+        password,
+        forecast_date,
+        pending_filenames,
+        ensemble_count,
+        country,
+        manifest,
+        remote_files,
+        parallelism,
+        on_member_downloaded,
     )
 
     _validate_ensemble_count(downloaded_paths, forecast_date)
@@ -86,41 +134,119 @@ def _load_ftp_credentials() -> tuple[str, str, str]:
     return host, user, password
 
 
-def _try_reuse_existing_download(forecast_date: str) -> list[str] | None:
-    """Return previously downloaded files if a complete set exists, otherwise None."""
-    existing_files = get_cached_glofas_files(forecast_date)
-    if existing_files is not None and len(existing_files) >= GLOFAS_MIN_ENSEMBLE_COUNT:
+def _try_reuse_existing_download(
+    forecast_date: str, manifest: GlofasDownloadManifest
+) -> list[str] | None:
+    """
+    Return previously downloaded files if a complete set exists, otherwise None.
+
+    Only members verified against the download manifest count, so a truncated or
+    otherwise changed file is never reused.
+    """
+    verified_files = manifest.get_verified_paths()
+    if len(verified_files) >= GLOFAS_MIN_ENSEMBLE_COUNT:
         log_info(
             logger,
             LogTag.INFRA,
-            f"Reusing {len(existing_files)} previously downloaded GloFAS ensemble files for {forecast_date}",
+            f"Reusing {len(verified_files)} previously downloaded GloFAS ensemble files for {forecast_date}",
         )
-        return existing_files
+        return verified_files
     return None
 
 
-def _get_download_resume_index(forecast_date: str) -> int:
-    """Determine the ensemble index to resume downloading from.
+def _list_remote_ensemble_files(
+    host: str, user: str, password: str, forecast_date: str, filenames: list[str]
+) -> dict[str, RemoteFileInfo]:
+    """
+    Get size and modification time of the ensemble files on the FTP server.
+
+    Uses a single MLSD listing, and falls back to SIZE and MDTM per file for servers
+    without MLSD. Files the server does not report are left out.
+    """
+    ftp = _connect_ftp(host, user, password)
+    try:
+        ftp.cwd(f"{GLOFAS_FTP_BASE_PATH}/{forecast_date}")
+        try:
+            listing = dict(ftp.mlsd(facts=["size", "modify"]))
+        except ftplib.error_perm:
+            listing = None
+
+        remote_files: dict[str, RemoteFileInfo] = {}
+        for filename in filenames:
+            if listing is not None:
+                facts = listing.get(filename)
+                if facts is None:
+                    continue
+                size = int(facts["size"]) if "size" in facts else None
+                remote_files[filename] = RemoteFileInfo(
+                    size=size, mtime=facts.get("modify")
+                )
+                continue
+            try:
+                size = ftp.size(filename)
+                mtime = ftp.sendcmd(f"MDTM {filename}").split()[-1]
+            except ftplib.error_perm:
+                continue
+            remote_files[filename] = RemoteFileInfo(size=size, mtime=mtime)
+    finally:
+        try:
+            ftp.quit()
+        except ftplib.all_errors:
+            ftp.close()
+    return remote_files
+
 
-    If a partial download exists (below minimum count), resumes from the highest
-    index + 1. Returns 0 if no prior download exists.
+def _get_pending_ensemble_filenames(
+    forecast_date: str,
+    ensemble_count: int,
+    manifest: GlofasDownloadManifest,
+    remote_files: dict[str, RemoteFileInfo],
+) -> list[str]:
+    """Return the ensemble filenames that still need to be downloaded.
 
-    The resume downloading flow isn't expected to be used on cloud deployments, but
-    it's useful when running this locally.
+    Members that are verified in the manifest and still match the server are
+    skipped. Complete files from before the manifest existed are adopted into it
+    when their size matches the server. All other members are pending; those with
+    a partial download resume from their current byte offset.
     """
-    existing_files = get_cached_glofas_files(forecast_date)
-    if existing_files is None:
-        return 0
+    output_dir = get_glofas_raw_data_dir(forecast_date)
+    pending_filenames: list[str] = []
+    adopted_count = 0
+    for ensemble_index in range(ensemble_count):
+        filename = _get_ensemble_filename(ensemble_index, forecast_date)
+        local_path = os.path.join(output_dir, filename)
+        remote = remote_files.get(filename)
+
+        if manifest.is_verified(local_path) and manifest.matches_remote(
+            filename, remote
+        ):
+            continue
+        if (
+            filename not in manifest.entries
+            and remote is not None
+            and remote.size is not None
+            and os.path.exists(local_path)
+            and os.path.getsize(local_path) == remote.size
+        ):
+            manifest.record(local_path, remote)
+            adopted_count += 1
+            continue
+        pending_filenames.append(filename)
+
+    completed_count = ensemble_count - len(pending_filenames)
+    if completed_count:
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"Found {completed_count} verified GloFAS ensemble files for {forecast_date} "
+            f"({adopted_count} adopted into the download manifest). "
+            f"Downloading the remaining {len(pending_filenames)} files.",
+        )
+    return pending_filenames
 
-    highest_index = _get_highest_ensemble_index(existing_files)
-    log_info(
-        logger,
-        LogTag.INFRA,
-        f"Found {len(existing_files)} previously downloaded GloFAS ensemble files for {forecast_date}, "
-        f"below minimum of {GLOFAS_MIN_ENSEMBLE_COUNT}. "
-        f"Resuming download from ensemble index {highest_index + 1}.",
-    )
-    return highest_index + 1
+
+def _get_ensemble_filename(ensemble_index: int, forecast_date: str) -> str:
+    return f"dis_{ensemble_index:02d}_{forecast_date}00.nc"
 
 
 def _download_ensemble_files(
@@ -128,63 +254,495 @@ def _download_ensemble_files(
     user: str,
     password: str,
     forecast_date: str,
+    pending_filenames: list[str],
     ensemble_count: int,
-    start_index: int,
     country: str,
+    manifest: GlofasDownloadManifest,
+    remote_files: dict[str, RemoteFileInfo],
+    parallelism: int = GLOFAS_FTP_DEFAULT_PARALLELISM,
+    on_member_downloaded: Callable[[str], None] | None = None,
 ) -> list[str]:
-    """Download ensemble files from FTP, starting from start_index."""
+    """Download the pending ensemble files from FTP.
+
+    Files are fetched by a bounded pool of workers, each with its own FTP session.
+    Workers pull filenames from a shared queue until it is empty. When one file
+    fails after all retries, the remaining workers stop picking up new files and
+    the error is raised once all workers finished. Each completed file is checked
+    against its remote size and recorded in the download manifest, and then passed
+    to on_member_downloaded (including the previously downloaded members).
+
+    Returns all member files for the forecast date, including previously
+    downloaded ones.
+    """
     output_dir = get_glofas_raw_data_dir(forecast_date)
     remote_dir = f"{GLOFAS_FTP_BASE_PATH}/{forecast_date}"
 
-    # Only include already-cached files when resuming a partial download
-    cached_files = get_cached_glofas_files(forecast_date) if start_index > 0 else None
-    downloaded_paths: list[str] = list(cached_files) if cached_files is not None else []
+    # Keep members completed (and verified) by an earlier run
+    downloaded_paths: list[str] = [
+        path
+        for path in manifest.get_verified_paths()
+        if os.path.basename(path) not in pending_filenames
+    ]
+    if on_member_downloaded is not None:
+        for path in downloaded_paths:
+            _notify_member_downloaded(on_member_downloaded, path)
+
+    if not pending_filenames:
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"All {len(downloaded_paths)} GloFAS ensemble files for {country} "
+            "were downloaded by an earlier run",
+        )
+        return sorted(downloaded_paths)
+
+    filename_queue: queue.Queue[str] = queue.Queue()
+    for filename in pending_filenames:
+        filename_queue.put(filename)
+
+    worker_count = max(1, min(parallelism, len(pending_filenames)))
+    stop_event = threading.Event()
 
     download_start = time.monotonic()
-    ftp = _connect_ftp(host, user, password)
-    ftp.cwd(remote_dir)
+    with ThreadPoolExecutor(
+        max_workers=worker_count, thread_name_prefix="glofas-ftp"
+    ) as executor:
+        futures = [
+            executor.submit(
+                _download_ensemble_worker,
+                filename_queue,
+                stop_event,
+                host,
+                user,
+                password,
+                remote_dir,
+                output_dir,
+                ensemble_count,
+                country,
+                manifest,
+                remote_files,
+                on_member_downloaded,
+            )
+            for _ in range(worker_count)
+        ]
+        worker_results = [future.result() for future in futures]
+
+    total_bytes = 0
+    for worker_paths, worker_bytes in worker_results:
+        downloaded_paths.extend(worker_paths)
+        total_bytes += worker_bytes
+    downloaded_paths.sort()
 
+    download_duration_seconds = time.monotonic() - download_start
+    total_megabytes = total_bytes / (1024 * 1024)
+    throughput = total_megabytes / max(download_duration_seconds, 1e-6)
+    log_with_tag(
+        logger,
+        LogTag.DOWNLOAD_TIMER,
+        f"Downloaded {len(downloaded_paths)} GloFAS ensemble files for {country} "
+        f"in {download_duration_seconds:.1f}s "
+        f"({total_megabytes:.1f} MB at {throughput:.1f} MB/s "
+        f"over {worker_count} FTP sessions)",
+    )
+
+    log_info(
+        logger,
+        LogTag.INFRA,
+        f"Downloaded {len(downloaded_paths)} GloFAS ensemble files to {output_dir}",
+    )
+    return downloaded_paths
+
+
+def _download_ensemble_worker(
+    filename_queue: queue.Queue[str],
+    stop_event: threading.Event,
+    host: str,
+    user: str,
+    password: str,
+    remote_dir: str,
+    output_dir: str,
+    ensemble_count: int,
+    country: str,
+    manifest: GlofasDownloadManifest,
+    remote_files: dict[str, RemoteFileInfo],
+    on_member_downloaded: Callable[[str], None] | None,
+) -> tuple[list[str], int]:
+    """Download queued ensemble files over a single FTP session.
+
+    Returns the local paths written by this worker and the number of bytes downloaded.
+    """
+    downloaded_paths: list[str] = []
+    downloaded_bytes = 0
+
+    ftp: ftplib.FTP | None = None
     try:
-        # Grab new ensemble files, starting from the highest index found in cached files
-        for ensemble_index in range(start_index, ensemble_count):
-            ensemble_label = f"{ensemble_index:02d}"
-            filename = f"dis_{ensemble_label}_{forecast_date}00.nc"
+        # Connecting is guarded too, so a worker that cannot open its session also
+        # stops the others instead of leaving them waiting on the queue
+        ftp = _connect_ftp(host, user, password)
+        ftp.cwd(remote_dir)
+        while not stop_event.is_set():
+            try:
+                filename = filename_queue.get_nowait()
+            except queue.Empty:
+                break
 
+            ensemble_label = filename.split("_")[1]
             log_info(
                 logger,
                 LogTag.INFRA,
                 f"Downloading GloFAS ensemble {ensemble_label}/{ensemble_count} for {country}",
             )
 
-            content, ftp = _download_ftp_file(
-                ftp, filename, host, user, password, remote_dir
-            )
-
             local_path = os.path.join(output_dir, filename)
-            with open(local_path, "wb") as f:
-                f.write(content)
+            remote = remote_files.get(filename)
+            transferred_bytes, ftp = _download_ftp_file(
+                ftp, filename, local_path, host, user, password, remote_dir, remote
+            )
+            _verify_downloaded_size(local_path, remote)
+            manifest.record(local_path, remote)
 
             downloaded_paths.append(local_path)
+            if on_member_downloaded is not None:
+                _notify_member_downloaded(on_member_downloaded, local_path)
+            downloaded_bytes += transferred_bytes
+    except Exception:
+        # Let the other workers finish their current file and stop
+        stop_event.set()
+        raise
     finally:
-        try:
-            ftp.quit()
-        except ftplib.all_errors:
-            ftp.close()
+        if ftp is not None:
+            try:
+                ftp.quit()
+            except ftplib.all_errors:
+                ftp.close()
+
+    return downloaded_paths, downloaded_bytes
+
+
+def _verify_downloaded_size(local_path: str, remote: RemoteFileInfo | None) -> None:
+    if remote is None or remote.size is None:
+        return
+    local_size = os.path.getsize(local_path)
+    if local_size != remote.size:
+        # Remove the file, so the next run downloads it again
+        os.remove(local_path)
+        raise ConnectionError(
+            f"Downloaded '{os.path.basename(local_path)}' is truncated: "
+            f"{local_size} of {remote.size} bytes"
+        )
+
+
+def _notify_member_downloaded(
+    on_member_downloaded: Callable[[str], None], local_path: str
+) -> None:
+    # Failing to process a member must never fail the download. Slicing raises
+    # OSError for unreadable files and RuntimeError for a broken process pool.
+    try:
+        on_member_downloaded(local_path)
+    except (OSError, RuntimeError) as exc:
+        log_warning(
+            logger,
+            LogTag.INFRA,
+            f"Processing downloaded GloFAS file {local_path} failed: {exc}",
+        )
+
+
+def slice_glofas_discharge_to_countries(
+    netcdf_paths: list[str],
+    country_bounds: dict[str, BoundingBox],
+) -> dict[str, list[str]]:
+    """
+    Slice GloFAS ensemble files to the bounding boxes of one or more countries.
+
+    Each ensemble file is opened once, and all country bounding boxes are cut out of
+    it in that single pass. The ensemble files are spread over a process pool, since
+    decoding the global NetCDF files is CPU bound.
+
+    Sliced files are written to the country-split cache (get_glofas_country_split_path).
+    Slices that are already newer than their source file are reused, so a country
+    that was sliced earlier in the run (e.g. together with other countries) is not
+    sliced again.
+
+    Optional env vars:
+        GLOFAS_SLICE_PARALLELISM: Number of slicing processes (default: CPU count)
+
+    Returns the sliced file paths per country, in the order of netcdf_paths.
+    """
+    sliced_paths: dict[str, list[str]] = {country: [] for country in country_bounds}
+    slice_jobs: dict[str, dict[str, BoundingBox]] = {}
+    for netcdf_path in netcdf_paths:
+        for country, bounds in country_bounds.items():
+            output_path = get_glofas_country_split_path(country, netcdf_path)
+            sliced_paths[country].append(output_path)
+            if not _is_slice_up_to_date(netcdf_path, output_path):
+                slice_jobs.setdefault(netcdf_path, {})[output_path] = bounds
+
+    if not slice_jobs:
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"Reusing sliced GloFAS files for {', '.join(country_bounds)}",
+        )
+        return sliced_paths
+
+    worker_count = max(1, min(_get_slice_parallelism(), len(slice_jobs)))
+
+    slice_start = time.monotonic()
+    if worker_count == 1:
+        for netcdf_path, bounds_by_output_path in slice_jobs.items():
+            slice_netcdf_to_multiple_bounds(netcdf_path, bounds_by_output_path)
+    else:
+        with _create_slice_executor(worker_count) as executor:
+            futures = [
+                executor.submit(
+                    slice_netcdf_to_multiple_bounds, netcdf_path, bounds_by_output_path
+                )
+                for netcdf_path, bounds_by_output_path in slice_jobs.items()
+            ]
+            for future in futures:
+                future.result()
 
-    download_duration_seconds = time.monotonic() - download_start
     log_with_tag(
         logger,
-        LogTag.DOWNLOAD_TIMER,
-        f"Downloaded {len(downloaded_paths)} GloFAS ensemble files for {country} "
-        f"in {download_duration_seconds:.1f}s",
+        LogTag.JOB_TIMER,
+        f"Sliced {len(slice_jobs)} GloFAS ensemble files for "
+        f"{', '.join(country_bounds)} in {time.monotonic() - slice_start:.1f}s "
+        f"using {worker_count} processes",
     )
+    return sliced_paths
 
-    log_info(
+
+def _is_slice_up_to_date(netcdf_path: str, sliced_path: str) -> bool:
+    if not os.path.exists(sliced_path) or os.path.getsize(sliced_path) == 0:
+        return False
+    return os.path.getmtime(sliced_path) >= os.path.getmtime(netcdf_path)
+
+
+def _get_slice_parallelism() -> int:
+    default_parallelism = os.cpu_count() or 1
+    return int(os.environ.get("GLOFAS_SLICE_PARALLELISM", str(default_parallelism)))
+
+
+def _create_slice_executor(worker_count: int) -> ProcessPoolExecutor:
+    # Spawn (instead of fork) fresh processes, since the HDF5 library behind the
+    # NetCDF reader is not fork-safe.
+    return ProcessPoolExecutor(
+        max_workers=worker_count,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+class GlofasStreamingSlicer:
+    """
+    Slice GloFAS ensemble members to country bounding boxes while they download.
+
+    Used as a context manager around the GloFAS download, with submit passed to the
+    download as its on_member_downloaded callback. Each member is submitted to
+    a process pool as soon as its download completes, so slicing overlaps with the
+    download of the remaining members instead of starting after the last one.
+    Leaving the context waits for all submitted slices.
+
+    Slices are written where slice_glofas_discharge_to_countries expects them, which
+    then finds them up to date. A slice that fails here is only logged, and is made
+    again by slice_glofas_discharge_to_countries.
+    """
+
+    def __init__(self, country_bounds: dict[str, BoundingBox]) -> None:
+        self.country_bounds = country_bounds
+        self._executor: ProcessPoolExecutor | None = None
+        self._futures: dict[str, Future[list[str]]] = {}
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type: type[BaseException] | None, *_: object) -> None:
+        if self._executor is None:
+            return
+
+        self._executor.shutdown(wait=True, cancel_futures=exc_type is not None)
+        failed_count = 0
+        for netcdf_path, future in self._futures.items():
+            if future.cancelled():
+                continue
+            slice_error = future.exception()
+            if slice_error is not None:
+                failed_count += 1
+                log_warning(
+                    logger,
+                    LogTag.INFRA,
+                    f"Slicing {netcdf_path} while downloading failed: {slice_error}",
+                )
+        log_with_tag(
+            logger,
+            LogTag.JOB_TIMER,
+            f"Sliced {len(self._futures) - failed_count} GloFAS ensemble files for "
+            f"{', '.join(self.country_bounds)} while downloading "
+            f"in {time.monotonic() - self._start:.1f}s",
+        )
+
+    def submit(self, netcdf_path: str) -> None:
+        """Start slicing a downloaded member. Called from the download workers."""
+        bounds_by_output_path: dict[str, BoundingBox] = {}
+        for country, bounds in self.country_bounds.items():
+            output_path = get_glofas_country_split_path(country, netcdf_path)
+            if not _is_slice_up_to_date(netcdf_path, output_path):
+                bounds_by_output_path[output_path] = bounds
+        if not bounds_by_output_path:
+            return
+
+        with self._lock:
+            if netcdf_path in self._futures:
+                return
+            if self._executor is None:
+                self._executor = _create_slice_executor(_get_slice_parallelism())
+            self._futures[netcdf_path] = self._executor.submit(
+                slice_netcdf_to_multiple_bounds, netcdf_path, bounds_by_output_path
+            )
+
+
+def is_glofas_station_pixel_mode() -> bool:
+    """
+    Whether station discharge is read straight from the global GloFAS files
+    (GLOFAS_STATION_PIXEL_MODE=true), instead of from country slices.
+    """
+    return os.environ.get("GLOFAS_STATION_PIXEL_MODE", "false").lower() == "true"
+
+
+def read_glofas_station_pixels(
+    netcdf_paths: list[str],
+    lons: np.ndarray,
+    lats: np.ndarray,
+    lead_time_min: int,
+    lead_time_max: int,
+) -> np.ndarray:
+    """
+    Read the discharge at station locations straight from (global) GloFAS files.
+
+    The station pixels are grouped by the storage chunk of the discharge variable
+    they fall in, and each group is read once per file as the window (over the lead
+    times) spanning its pixels. The values are then picked from the window in
+    memory. A global file is never decoded as a whole, every chunk holding a station
+    is decoded once, and no country slice has to be written. Values are returned raw
+    (not masked or scaled), like rasterio reads them from the sliced files.
+    Locations outside the grid get NaN.
+
+    Returns an array with shape (ensemble, lead_time, location).
+    """
+    lead_time_count = lead_time_max - lead_time_min + 1
+    discharges = np.full(
+        (len(netcdf_paths), lead_time_count, lons.size), np.nan, dtype=np.float64
+    )
+    windows: list[_StationPixelWindow] | None = None
+
+    read_start = time.monotonic()
+    for ensemble_index, netcdf_path in enumerate(netcdf_paths):
+        with netCDF4.Dataset(netcdf_path) as dataset:
+            variable = _get_discharge_variable(dataset, netcdf_path)
+            variable.set_auto_maskandscale(False)
+            # All members share one grid (and chunking), so the windows are found once
+            if windows is None:
+                windows = _get_station_pixel_windows(dataset, variable, lons, lats)
+            for window in windows:
+                values = variable[
+                    lead_time_min : lead_time_max + 1, window.rows, window.cols
+                ]
+                discharges[ensemble_index][:, window.location_indexes] = values[
+                    :, window.pixel_rows, window.pixel_cols
+                ]
+
+    log_with_tag(
         logger,
-        LogTag.INFRA,
-        f"Downloaded {len(downloaded_paths)} GloFAS ensemble files to {output_dir}",
+        LogTag.JOB_TIMER,
+        f"Read {lons.size} station pixels in {len(windows or [])} windows from "
+        f"{len(netcdf_paths)} GloFAS files in {time.monotonic() - read_start:.1f}s",
     )
-    return downloaded_paths
+    return discharges
+
+
+@dataclass
+class _StationPixelWindow:
+    """Window of the grid read at once, and the station pixels inside it."""
+
+    rows: slice
+    cols: slice
+    # Pixel of each location, relative to the window
+    pixel_rows: np.ndarray
+    pixel_cols: np.ndarray
+    location_indexes: np.ndarray
+
+
+def _get_discharge_variable(
+    dataset: netCDF4.Dataset, netcdf_path: str
+) -> netCDF4.Variable:
+    # The discharge is the only (time, lat, lon) variable in a GloFAS file
+    for variable in dataset.variables.values():
+        if variable.dimensions[-2:] == ("lat", "lon") and variable.ndim == 3:
+            return variable
+    raise ValueError(f"No discharge variable found in GloFAS file {netcdf_path}")
+
+
+def _get_station_pixel_windows(
+    dataset: netCDF4.Dataset,
+    variable: netCDF4.Variable,
+    lons: np.ndarray,
+    lats: np.ndarray,
+) -> list[_StationPixelWindow]:
+    """Group the locations inside the grid by the chunk their pixel is stored in."""
+    rows = _get_pixel_index(dataset.variables["lat"], lats)
+    cols = _get_pixel_index(dataset.variables["lon"], lons)
+    in_bounds = (
+        (rows >= 0)
+        & (rows < len(dataset.dimensions["lat"]))
+        & (cols >= 0)
+        & (cols < len(dataset.dimensions["lon"]))
+    )
+    if not in_bounds.all():
+        log_warning(
+            logger,
+            LogTag.FLOOD_LOGIC,
+            f"{int((~in_bounds).sum())} stations are outside the GloFAS grid",
+        )
+
+    chunking = variable.chunking()
+    if chunking == "contiguous":
+        # Read as one window around all stations
+        chunk_rows, chunk_cols = variable.shape[-2:]
+    else:
+        chunk_rows, chunk_cols = chunking[-2:]
+
+    location_indexes_by_chunk: dict[tuple[int, int], list[int]] = {}
+    for location_index in np.flatnonzero(in_bounds):
+        chunk = (
+            int(rows[location_index]) // chunk_rows,
+            int(cols[location_index]) // chunk_cols,
+        )
+        location_indexes_by_chunk.setdefault(chunk, []).append(int(location_index))
+
+    windows: list[_StationPixelWindow] = []
+    for location_indexes in location_indexes_by_chunk.values():
+        window_rows = rows[location_indexes]
+        window_cols = cols[location_indexes]
+        row_start, col_start = int(window_rows.min()), int(window_cols.min())
+        windows.append(
+            _StationPixelWindow(
+                rows=slice(row_start, int(window_rows.max()) + 1),
+                cols=slice(col_start, int(window_cols.max()) + 1),
+                pixel_rows=window_rows - row_start,
+                pixel_cols=window_cols - col_start,
+                location_indexes=np.asarray(location_indexes),
+            )
+        )
+    return windows
+
+
+def _get_pixel_index(coordinate: netCDF4.Variable, values: np.ndarray) -> np.ndarray:
+    # Index of the grid cell (centered on the coordinate values) that contains each
+    # value. Works for ascending and descending coordinates.
+    first, second = (float(value) for value in coordinate[:2])
+    step = second - first
+    return np.floor((values - (first - step / 2)) / step).astype(int)
 
 
 def download_glofas_discharge_from_seed_repo(
@@ -238,6 +796,7 @@ def load_glofas_discharge_from_local_global_files(
 
     Unlike the FTP download path, this does NOT enforce the minimum ensemble
     count. Developers can run with even a single cached file for fast iteration.
+    Files that fail verification against the download manifest are skipped.
 
     If local_data_date is None, uses the most recent cached date.
     Raises FileNotFoundError if no cached data is found.
@@ -254,7 +813,8 @@ def load_glofas_discharge_from_local_global_files(
         )
 
     cached_files = get_cached_glofas_files(local_data_date)
-    if cached_files is None or len(cached_files) == 0:
+    cached_files = _drop_unverified_files(cached_files or [])
+    if len(cached_files) == 0:
         raise FileNotFoundError(
             f"No locally cached raw GloFAS files found for date {local_data_date}. "
             f"Available data can be found in DATA_CACHE_DIR/glofas/raw/."
@@ -269,6 +829,25 @@ def load_glofas_discharge_from_local_global_files(
     return cached_files
 
 
+def _drop_unverified_files(cached_files: list[str]) -> list[str]:
+    """Leave out files that fail verification against the download manifest, if any."""
+    if not cached_files:
+        return cached_files
+    manifest = GlofasDownloadManifest.load(os.path.dirname(cached_files[0]))
+    if not manifest.entries:
+        # Cached before download manifests existed
+        return cached_files
+
+    verified_files = [path for path in cached_files if manifest.is_verified(path)]
+    for path in sorted(set(cached_files) - set(verified_files)):
+        log_warning(
+            logger,
+            LogTag.INFRA,
+            f"Skipping cached GloFAS file that does not match the download manifest: {path}",
+        )
+    return verified_files
+
+
 def load_glofas_discharge_from_local_country_files(
     country: str, local_data_date: str | None
 ) -> list[str]:
@@ -281,6 +860,9 @@ def load_glofas_discharge_from_local_country_files(
     Unlike the FTP download path, this does NOT enforce the minimum ensemble
     count. Developers can run with even a single cached file for fast iteration.
 
+    A consolidated discharge cube kept next to these files (see
+    load_glofas_discharge_cube) is picked up again by the forecast.
+
     If local_data_date is None, uses the most recent cached date.
     Raises FileNotFoundError if no cached data is found.
     """
@@ -325,22 +907,6 @@ def _validate_ensemble_count(files: list[str], forecast_date: str) -> None:
         )
 
 
-def _get_highest_ensemble_index(files: list[str]) -> int:
-    """Return the highest ensemble index found in GloFAS NetCDF filenames.
-
-    Filenames follow the pattern ``dis_{ensemble_index:02d}_{forecast_date}00.nc``.
-    Returns -1 when no parsable ensemble index is found.
-    """
-    highest_index = -1
-    for file_path in files:
-        basename = os.path.basename(file_path)
-        parts = basename.split("_")
-        if len(parts) < 2 or not parts[1].isdigit():
-            continue
-        highest_index = max(highest_index, int(parts[1]))
-    return highest_index
-
-
 def _connect_ftp(host: str, user: str, password: str, timeout: int = 60) -> ftplib.FTP:
     ftp = ftplib.FTP(host, timeout=timeout)
     ftp.login(user, password)
@@ -350,30 +916,83 @@ def _connect_ftp(host: str, user: str, password: str, timeout: int = 60) -> ftpl
 def _download_ftp_file(
     ftp: ftplib.FTP,
     filename: str,
+    local_path: str,
     host: str,
     user: str,
     password: str,
     remote_dir: str,
-) -> tuple[bytes, ftplib.FTP]:
-    """Download a single file, reconnecting on transient errors.
-    Returns the file content together with the (possibly re-established) FTP
-    connection, so the caller continues with a live connection.
+    remote: RemoteFileInfo | None = None,
+) -> tuple[int, ftplib.FTP]:
+    """Stream a single file to disk, reconnecting on transient errors.
+
+    RETR blocks are appended to a partial file next to local_path, which is
+    renamed to local_path once the transfer completes. A retry (or a later run)
+    resumes from the partial file's byte offset using FTP REST, so data that was
+    already transferred is not downloaded again.
+
+    The remote size and modification time are recorded next to the partial file.
+    A partial file of another version of the remote file (or of an unknown one) is
+    discarded instead of resumed, so bytes of two versions are never combined.
+
+    Returns the number of bytes transferred together with the (possibly
+    re-established) FTP connection, so the caller continues with a live connection.
     """
+    partial_path = f"{local_path}{GLOFAS_PARTIAL_FILE_SUFFIX}"
+    partial_info_path = f"{local_path}{GLOFAS_PARTIAL_INFO_SUFFIX}"
+    if os.path.exists(partial_path) and not _is_partial_download_resumable(
+        partial_path, partial_info_path, remote
+    ):
+        log_warning(
+            logger,
+            LogTag.INFRA,
+            f"'{filename}' changed on the server since it was partially downloaded. "
+            f"Restarting the download.",
+        )
+        os.remove(partial_path)
+    if remote is not None:
+        with open(partial_info_path, "w") as f:
+            json.dump(asdict(remote), f)
+
+    initial_offset = _get_partial_download_size(partial_path)
+    if initial_offset > 0:
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"Resuming '{filename}' from byte offset {initial_offset}",
+        )
+
     # attempt n waits RETRY_BACKOFF_SECONDS * n before reconnecting.
     retry_backoff_seconds = 5
     max_retries = 3
     for attempt in range(1, max_retries + 1):
+        offset = _get_partial_download_size(partial_path)
         try:
-            buffer = io.BytesIO()
-            ftp.retrbinary(f"RETR {filename}", buffer.write)
-            return buffer.getvalue(), ftp
+            with open(partial_path, "ab") as f:
+                ftp.retrbinary(f"RETR {filename}", f.write, rest=offset or None)
+            os.replace(partial_path, local_path)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(partial_info_path)
+            return os.path.getsize(local_path) - initial_offset, ftp
         except ftplib.error_perm as exc:
-            raise FileNotFoundError(f"FTP server rejected '{filename}': {exc}") from exc
+            if offset == 0:
+                raise FileNotFoundError(
+                    f"FTP server rejected '{filename}': {exc}"
+                ) from exc
+            # The server refused to resume (REST), restart this file from scratch
+            log_warning(
+                logger,
+                LogTag.INFRA,
+                f"Could not resume '{filename}' from byte offset {offset}: {exc}. "
+                f"Restarting the download.",
+            )
+            os.remove(partial_path)
+            initial_offset = 0
         except ftplib.all_errors as exc:
             log_error(
                 logger,
                 LogTag.INFRA,
-                f"Attempt {attempt}/{max_retries} failed for '{filename}': {exc}",
+                f"Attempt {attempt}/{max_retries} failed for '{filename}' "
+                f"at byte offset {_get_partial_download_size(partial_path)}: {exc}",
             )
             if attempt == max_retries:
                 raise ConnectionError(
@@ -395,6 +1014,29 @@ def _download_ftp_file(
     )
 
 
+def _is_partial_download_resumable(
+    partial_path: str, partial_info_path: str, remote: RemoteFileInfo | None
+) -> bool:
+    # Without a listing of the server, the partial file cannot be checked
+    if remote is None:
+        return True
+    if remote.size is not None and os.path.getsize(partial_path) > remote.size:
+        return False
+    try:
+        with open(partial_info_path) as f:
+            recorded = RemoteFileInfo(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return False
+    return recorded == remote
+
+
+def _get_partial_download_size(partial_path: str) -> int:
+    try:
+        return os.path.getsize(partial_path)
+    except FileNotFoundError:
+        return 0
+
+
 def _resolve_forecast_date(today: str, user: str, password: str, host: str) -> str:
     """Resolve the forecast date to download from FTP.
 
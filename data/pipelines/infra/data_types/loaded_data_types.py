@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import math
+from collections.abc import Iterable
 from dataclasses import dataclass
 from enum import StrEnum
+from typing import TypeVar
 
 import numpy as np
 from pipelines.infra.data_types.data_config_types import DataSource
 from rasterio.transform import Affine
 
+# Rows of a dense raster converted to sparse at a time, so it is never copied whole
+SPARSE_BLOCK_ROWS = 256
+
 
 @dataclass
 class AlertConfig:
@@ -38,6 +44,9 @@ class DataType(StrEnum):
     # A FloodExtentProvider that lazily fetches flood extent rasters on demand
     FLOOD_EXTENT_PROVIDER = "flood_extent_provider"
 
+    # A PopulationRasterProvider that lazily fetches the population raster on demand
+    POPULATION_RASTER_PROVIDER = "population_raster_provider"
+
     # an AdminAreasSet object
     ADMIN_AREA_SET = "admin_area_set"
 
@@ -55,12 +64,151 @@ class DataType(StrEnum):
     UNSPECIFIED = "unspecified"
 
 
+@dataclass(frozen=True)
+class RasterGrid:
+    """The pixel grid of a raster, without its values."""
+
+    transform: Affine
+    shape: tuple[int, int]
+    crs: str
+
+
 @dataclass
 class RasterData:
     array: np.ndarray
     transform: Affine
     crs: str
     nodata: float
+    # Hash of the source file, for rasters whose derived results are cached
+    content_hash: str | None = None
+
+    @property
+    def grid(self) -> RasterGrid:
+        return RasterGrid(
+            transform=self.transform,
+            shape=(self.array.shape[0], self.array.shape[1]),
+            crs=self.crs,
+        )
+
+
+@dataclass
+class SparseRasterData:
+    """
+    A raster storing only its pixels that differ from fill_value, as flat (row-major)
+    indexes into the grid, in increasing order, and their values.
+
+    Flood extents are nodata (0) outside the flooded pixels, so with nodata as the
+    fill value their memory, and the work on them, scales with the flooded area
+    instead of the area of the country.
+    """
+
+    indexes: np.ndarray
+    values: np.ndarray
+    shape: tuple[int, int]
+    transform: Affine
+    crs: str
+    nodata: float
+    # Value of the pixels not stored
+    fill_value: float = 0
+    content_hash: str | None = None
+
+    @property
+    def grid(self) -> RasterGrid:
+        return RasterGrid(transform=self.transform, shape=self.shape, crs=self.crs)
+
+    @staticmethod
+    def from_raster_data(
+        raster: RasterData, block_rows: int = SPARSE_BLOCK_ROWS
+    ) -> SparseRasterData:
+        """Sparse copy of a raster, with its nodata as the fill value."""
+        array = raster.array
+        return SparseRasterData.from_row_blocks(
+            (
+                (row_off, array[row_off : row_off + block_rows])
+                for row_off in range(0, array.shape[0], block_rows)
+            ),
+            shape=(array.shape[0], array.shape[1]),
+            transform=raster.transform,
+            crs=raster.crs,
+            nodata=raster.nodata,
+            content_hash=raster.content_hash,
+        )
+
+    @staticmethod
+    def from_row_blocks(
+        blocks: Iterable[tuple[int, np.ndarray]],
+        shape: tuple[int, int],
+        transform: Affine,
+        crs: str,
+        nodata: float,
+        content_hash: str | None = None,
+    ) -> SparseRasterData:
+        """
+        Sparse raster from (row offset, block) pairs of full-width row blocks in
+        increasing order, as iter_rgba_png_float32_blocks yields them. Only one block
+        is dense at a time. The nodata is the fill value.
+        """
+        index_parts: list[np.ndarray] = [np.empty(0, dtype=np.int64)]
+        value_parts: list[np.ndarray] = [np.empty(0, dtype=np.float32)]
+        for row_off, block in blocks:
+            stored = _differs_from_fill(block, nodata)
+            index_parts.append(np.flatnonzero(stored) + row_off * shape[1])
+            value_parts.append(block[stored].astype(np.float32, copy=False))
+        return SparseRasterData(
+            indexes=np.concatenate(index_parts),
+            values=np.concatenate(value_parts),
+            shape=shape,
+            transform=transform,
+            crs=crs,
+            nodata=nodata,
+            fill_value=nodata,
+            content_hash=content_hash,
+        )
+
+    def to_raster_data(self) -> RasterData:
+        """Dense float32 copy of the raster."""
+        array = np.full(self.shape, self.fill_value, dtype=np.float32)
+        array.reshape(-1)[self.indexes] = self.values
+        return RasterData(
+            array=array,
+            transform=self.transform,
+            crs=self.crs,
+            nodata=self.nodata,
+            content_hash=self.content_hash,
+        )
+
+    def crop_to_window(
+        self, row_start: int, row_end: int, col_start: int, col_end: int
+    ) -> SparseRasterData:
+        """The pixels of a window (as from get_bounds_window) of the raster."""
+        width = self.shape[1]
+        # The indexes are sorted, so the rows of the window are one slice of them
+        first, last = np.searchsorted(
+            self.indexes, [row_start * width, row_end * width]
+        )
+        rows, cols = np.divmod(self.indexes[first:last], width)
+        in_window = (cols >= col_start) & (cols < col_end)
+        window_width = col_end - col_start
+        return SparseRasterData(
+            indexes=(rows[in_window] - row_start) * window_width
+            + (cols[in_window] - col_start),
+            values=self.values[first:last][in_window],
+            shape=(row_end - row_start, window_width),
+            transform=self.transform * Affine.translation(col_start, row_start),
+            crs=self.crs,
+            nodata=self.nodata,
+            fill_value=self.fill_value,
+        )
+
+
+# A dense or a sparse raster, for functions returning the same kind they are given
+RasterT = TypeVar("RasterT", RasterData, SparseRasterData)
+
+
+def _differs_from_fill(array: np.ndarray, fill_value: float) -> np.ndarray:
+    if math.isnan(fill_value):
+        return ~np.isnan(array)
+    return array != fill_value
 
 
 @dataclass
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import contextlib
+import glob
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+
+import numpy as np
+from pipelines.infra.data_types.enums import LayerName
+from pipelines.infra.data_types.loaded_data_types import (
+    RasterData,
+    RasterGrid,
+    SparseRasterData,
+)
+from pipelines.infra.utils.api_client import ApiClient
+from pipelines.infra.utils.nrw_logger import log_info, log_warning, LogTag
+from pipelines.infra.utils.raster import (
+    crop_raster_to_bounds,
+    get_bounds_window,
+    get_raster_bounds,
+)
+from pipelines.infra.utils.storage_helpers import get_population_cache_dir
+from rasterio.transform import Affine
+from shared.image_helpers import (
+    get_png_shape,
+    iter_rgba_png_float32_blocks,
+    rgba_png_to_float32_array,
+    rgba_png_window_to_float32_array,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PopulationRasterProvider:
+    """
+    Population raster of a country from the IBF API, loaded lazily.
+
+    Nothing is downloaded until the raster is first needed, so runs without exposure
+    to compute never fetch it. The metadata and data PNG are then downloaded once per
+    run, and for a hazard extent only the window of the raster covering it is decoded.
+
+    With DATA_CACHE_DIR set, the decoded raster is also kept on disk, as a float32
+    .npy array (memory-mapped on read) plus a JSON sidecar, keyed by a hash of the
+    raster metadata. Later runs only download the metadata, and download and decode
+    the PNG again when it has changed.
+    """
+
+    country: str
+    api_client: ApiClient
+    _raster_info: dict | None = None
+    _grid: RasterGrid | None = None
+    _nodata: float = 0
+    _png_bytes: bytes | None = None
+    _content_hash: str | None = None
+    _raster: RasterData | None = None
+
+    def get_grid(self) -> RasterGrid:
+        """Grid of the population raster, without decoding it."""
+        self._fetch()
+        assert self._grid is not None
+        return self._grid
+
+    def get_metadata_hash(self) -> str:
+        """Hash of the raster metadata, which only downloads the metadata."""
+        return _get_metadata_hash(self._fetch_metadata())
+
+    def get_content_hash(self) -> str:
+        """Hash of the data PNG, without decoding it."""
+        self._fetch()
+        assert self._content_hash is not None
+        return self._content_hash
+
+    def get_raster(self) -> RasterData:
+        """The full population raster, decoded once per run."""
+        grid = self.get_grid()
+        if self._raster is None:
+            assert self._png_bytes is not None
+            self._raster = RasterData(
+                array=rgba_png_to_float32_array(self._png_bytes),
+                transform=grid.transform,
+                crs=grid.crs,
+                nodata=self._nodata,
+                content_hash=self._content_hash,
+            )
+            log_info(
+                logger, LogTag.INFRA, f"Decoded population raster of {self.country}"
+            )
+        return self._raster
+
+    def get_raster_for_hazard_extent(
+        self, hazard_extent: RasterData | SparseRasterData
+    ) -> RasterData:
+        """
+        The part of the population raster covering a hazard extent (plus a pixel
+        around it, or two for a hazard extent in another CRS), decoded from only those
+        rows and columns of the PNG. Falls back to the full raster for a hazard extent
+        outside the raster, as compute_population_exposed does.
+        """
+        grid = self.get_grid()
+        bounds = get_raster_bounds(hazard_extent, grid.crs)
+        # compute_population_exposed pads transformed bounds by a pixel itself
+        padding = 1 if hazard_extent.crs == grid.crs else 2
+        row_start, row_end, col_start, col_end = get_bounds_window(
+            grid.transform, grid.shape, bounds, padding=padding
+        )
+        if row_end <= row_start or col_end <= col_start:
+            return self.get_raster()
+        if self._raster is not None:
+            return crop_raster_to_bounds(self._raster, bounds, padding=padding)
+
+        assert self._png_bytes is not None
+        array = rgba_png_window_to_float32_array(
+            self._png_bytes, (row_start, row_end, col_start, col_end)
+        )
+        return RasterData(
+            array=array,
+            transform=grid.transform * Affine.translation(col_start, row_start),
+            crs=grid.crs,
+            nodata=self._nodata,
+            content_hash=self._content_hash,
+        )
+
+    def _fetch_metadata(self) -> dict:
+        if self._raster_info is None:
+            raster_info = self.api_client.get_static_raster_metadata(
+                self.country, LayerName.POPULATION
+            )
+            if raster_info is None:
+                raise ValueError(
+                    f"Failed to download population raster metadata from API for {self.country}"
+                )
+            self._raster_info = raster_info
+        return self._raster_info
+
+    def _fetch(self) -> None:
+        if self._grid is not None:
+            return
+
+        layer_name = LayerName.POPULATION
+        raster_info = self._fetch_metadata()
+
+        cache_dir = get_population_cache_dir(self.country)
+        cache_name = f"population_{_get_metadata_hash(raster_info)[:16]}"
+        if cache_dir is not None and self._open_cached(cache_dir, cache_name):
+            log_info(
+                logger,
+                LogTag.INFRA,
+                f"Using cached population raster of {self.country}",
+            )
+            return
+
+        png_bytes = self.api_client.get_static_raster_data_image(
+            self.country, layer_name
+        )
+        if png_bytes is None:
+            raise ValueError(
+                f"Failed to download population raster data from API for {self.country}"
+            )
+
+        data_metadata = raster_info["metadata"]["data"]
+        extent = data_metadata["extent"]
+        height, width = get_png_shape(png_bytes)
+        x_res = (extent["xmax"] - extent["xmin"]) / width
+        y_res = (extent["ymax"] - extent["ymin"]) / height
+
+        self._png_bytes = png_bytes
+        self._content_hash = hashlib.sha256(png_bytes).hexdigest()
+        self._nodata = data_metadata["nodata"]
+        self._grid = RasterGrid(
+            transform=Affine(x_res, 0, extent["xmin"], 0, -y_res, extent["ymax"]),
+            shape=(height, width),
+            crs=data_metadata["crs"],
+        )
+
+        if cache_dir is not None:
+            try:
+                self._write_cached(cache_dir, cache_name)
+            except OSError as exc:
+                log_warning(
+                    logger,
+                    LogTag.INFRA,
+                    f"Could not cache population raster in {cache_dir}: {exc}",
+                )
+
+    def _open_cached(self, cache_dir: str, cache_name: str) -> bool:
+        array_path = os.path.join(cache_dir, f"{cache_name}.npy")
+        sidecar_path = os.path.join(cache_dir, f"{cache_name}.json")
+        if not os.path.exists(array_path) or not os.path.exists(sidecar_path):
+            return False
+        try:
+            with open(sidecar_path) as f:
+                sidecar = json.load(f)
+            # Memory-mapped read-only, so jobs of the same country share the page cache
+            array = np.load(array_path, mmap_mode="r")
+            content_hash = sidecar["content_hash"]
+            nodata = sidecar["nodata"]
+            grid = RasterGrid(
+                transform=Affine(*sidecar["transform"]),
+                shape=(array.shape[0], array.shape[1]),
+                crs=sidecar["crs"],
+            )
+        except (OSError, ValueError, KeyError) as exc:
+            log_warning(
+                logger,
+                LogTag.INFRA,
+                f"Ignoring unreadable cached population raster {array_path}: {exc}",
+            )
+            return False
+
+        self._content_hash = content_hash
+        self._nodata = nodata
+        self._grid = grid
+        self._raster = RasterData(
+            array=array,
+            transform=self._grid.transform,
+            crs=self._grid.crs,
+            nodata=self._nodata,
+            content_hash=self._content_hash,
+        )
+        return True
+
+    def _write_cached(self, cache_dir: str, cache_name: str) -> None:
+        assert self._grid is not None and self._png_bytes is not None
+        # Rasters of earlier metadata are outdated. Files of the current raster, and
+        # temporary files another job is still writing, are kept.
+        for stale_path in glob.glob(os.path.join(cache_dir, "population_*")):
+            stale_name = os.path.basename(stale_path)
+            if stale_name.startswith(f"{cache_name}.") or stale_name.endswith(".tmp"):
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(stale_path)
+
+        # Decoded block by block straight into the file, so the full raster is never
+        # in memory. Written under a temporary name (per process, as jobs of the same
+        # country can run concurrently) and renamed when complete, and the sidecar is
+        # written last, so a raster is only used once it is complete.
+        array_path = os.path.join(cache_dir, f"{cache_name}.npy")
+        temp_array_path = f"{array_path}.{os.getpid()}.tmp"
+        array = np.lib.format.open_memmap(
+            temp_array_path, mode="w+", dtype=np.float32, shape=self._grid.shape
+        )
+        for row_off, values in iter_rgba_png_float32_blocks(self._png_bytes):
+            array[row_off : row_off + values.shape[0]] = values
+        array.flush()
+        del array
+        os.replace(temp_array_path, array_path)
+
+        sidecar_path = os.path.join(cache_dir, f"{cache_name}.json")
+        temp_sidecar_path = f"{sidecar_path}.{os.getpid()}.tmp"
+        with open(temp_sidecar_path, "w") as f:
+            json.dump(
+                {
+                    "transform": list(self._grid.transform)[:6],
+                    "crs": self._grid.crs,
+                    "nodata": self._nodata,
+                    "content_hash": self._content_hash,
+                },
+                f,
+            )
+        os.replace(temp_sidecar_path, sidecar_path)
+        log_info(logger, LogTag.INFRA, f"Cached population raster of {self.country}")
+
+        if self._open_cached(cache_dir, cache_name):
+            # The windows are cropped from the cached raster from now on
+            self._png_bytes = None
+
+
+def _get_metadata_hash(raster_info: dict) -> str:
+    return hashlib.sha256(json.dumps(raster_info, sort_keys=True).encode()).hexdigest()
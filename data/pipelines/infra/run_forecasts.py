@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import logging
+import os
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
@@ -12,6 +13,7 @@ from shared.country_data import CountryCodeIso3
 
 from pipelines.drought.forecast import calculate_drought_forecasts
 from pipelines.flood.forecast import calculate_flood_forecasts
+from pipelines.flood.prepare_forecast import prepare_flood_forecasts
 from pipelines.infra.config_reader import ConfigReader
 from pipelines.infra.data_provider import DataProvider
 from pipelines.infra.data_submitter import DataSubmitter
@@ -28,6 +30,7 @@ from pipelines.infra.utils.alert_admin_aggregation import (
     aggregate_to_parent_admin_levels,
 )
 from pipelines.infra.utils.api_client import ApiClient
+from pipelines.infra.utils.cache_retention import apply_cache_retention
 from pipelines.infra.utils.infra_mock_generator import make_infra_mock_hazard_function
 from pipelines.infra.utils.nrw_logger import log_error, log_info, log_warning, LogTag
 
@@ -43,7 +46,15 @@ FORECAST_SOURCES: dict[str, list[ForecastSource]] = {
 
 HazardFunction = Callable[[DataProvider, DataSubmitter, str, int], None]
 
+# Optional per-hazard step that runs once before the per-country forecasts, for work
+# that is shared between countries. It receives the data providers of all countries,
+# and can load data sources into them up front.
+HazardPrepareFunction = Callable[
+    [list[CountryRunConfig], dict[CountryCodeIso3, DataProvider]], None
+]
+
 HAZARD_FUNCTIONS: dict[str, HazardFunction] = {}
+HAZARD_PREPARE_FUNCTIONS: dict[str, HazardPrepareFunction] = {}
 
 
 def _register_hazard_functions() -> None:
@@ -51,6 +62,8 @@ def _register_hazard_functions() -> None:
     HAZARD_FUNCTIONS["floods"] = calculate_flood_forecasts
     HAZARD_FUNCTIONS["drought"] = calculate_drought_forecasts
 
+    HAZARD_PREPARE_FUNCTIONS["floods"] = prepare_flood_forecasts
+
 
 def _run_country(
     hazard_fn: HazardFunction,
@@ -60,14 +73,9 @@ def _run_country(
     output_mode: OutputMode,
     output_path: str,
     api_client: ApiClient,
-    local_data: str | None = None,
-    local_data_date: str | None = None,
+    data_provider: DataProvider,
 ) -> list[str]:
-    data_provider = DataProvider(
-        api_client,
-        local_data=local_data,
-        local_data_date=local_data_date,
-    )
+    # Sources already loaded by the hazard prepare function are not loaded again
     load_success, load_errors = data_provider.try_load_data(country)
     if not load_success:
         return load_errors
@@ -144,6 +152,14 @@ def _resolve_source_target(mock: int | None) -> SourceTarget:
     return SourceTarget.MOCK_ALERT
 
 
+def _apply_cache_retention(local_data_date: str | None) -> None:
+    # Never fails the run: a full or unreadable cache is reported, not fatal
+    try:
+        apply_cache_retention({local_data_date} if local_data_date else set())
+    except (OSError, ValueError) as exc:
+        log_warning(logger, LogTag.INFRA, f"Cache retention failed: {exc}")
+
+
 def run_forecasts(
     config_path: str,
     mock: int | None = None,
@@ -206,6 +222,22 @@ def run_forecasts(
         f"Start '{hazard_type}' pipeline for '{', '.join(c.country_code_iso_3 for c in countries)}' (source target: '{source_target}'{', infra-only' if infra_only else ''})",
     )
 
+    if os.environ.get("DATA_CACHE_RETENTION", "false").lower() == "true":
+        _apply_cache_retention(local_data_date)
+
+    data_providers = {
+        country.country_code_iso_3: DataProvider(
+            api_client,
+            local_data=local_data,
+            local_data_date=local_data_date,
+        )
+        for country in countries
+    }
+
+    prepare_fn = HAZARD_PREPARE_FUNCTIONS.get(hazard_type)
+    if prepare_fn is not None and not infra_only:
+        prepare_fn(countries, data_providers)
+
     for country in countries:
         log_info(
             logger,
@@ -221,8 +253,8 @@ def run_forecasts(
             output_mode,
             output_path,
             api_client,
-            local_data=local_data,
-            local_data_date=local_data_date,
+            # Release the loaded data of each country once it has run
+            data_providers.pop(country.country_code_iso_3),
         )
         if errors:
             log_error(
@@ -0,0 +1,282 @@
+"""
+Zonal sums per admin area from a label raster.
+
+The admin areas of a country are rasterized once into an integer label raster on a
+raster grid (the population grid). Summing a raster on that grid per place code is
+then a single np.bincount, instead of rasterizing every admin area again for each
+call as rasterstats.zonal_stats does. A pixel belongs to an admin area when its
+center is inside it, as in zonal_stats with all_touched=False.
+
+Label rasters are cached in DATA_CACHE_DIR per country and admin level, keyed by a
+hash of the grid and the admin area geometries.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import glob
+import hashlib
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import shapely
+from pipelines.infra.data_types.admin_area_types import AdminAreasSet
+from pipelines.infra.data_types.loaded_data_types import (
+    RasterData,
+    RasterGrid,
+    SparseRasterData,
+)
+from pipelines.infra.utils.nrw_logger import log_info, log_warning, LogTag
+from pipelines.infra.utils.storage_helpers import get_admin_area_labels_cache_dir
+from rasterio.enums import MergeAlg
+from rasterio.features import rasterize
+from rasterio.transform import Affine
+
+logger = logging.getLogger(__name__)
+
+# Tolerance (in pixels) for a raster to count as aligned with the label grid
+_ALIGNMENT_TOLERANCE = 1e-6
+
+
+@dataclass
+class AdminAreaLabels:
+    """
+    Admin areas rasterized on a grid. Label 0 is outside all admin areas, label i is
+    the admin area place_codes[i - 1].
+
+    When admin areas overlap, a pixel can only have one label, so the sums would
+    differ from zonal_stats. Such label rasters are not exact, and are not used.
+    """
+
+    labels: np.ndarray
+    transform: Affine
+    place_codes: list[str]
+    exact: bool = True
+    _label_indexes: dict[str, int] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def __post_init__(self) -> None:
+        self._label_indexes = {
+            place_code: index + 1 for index, place_code in enumerate(self.place_codes)
+        }
+
+    def sum_by_place_code(
+        self, raster: RasterData | SparseRasterData, place_codes: list[str]
+    ) -> dict[str, float] | None:
+        """
+        Sum of the raster values per place code, rounded like the zonal_stats based
+        aggregation. Returns None if the raster is not on the label grid, or the
+        labels are not exact. A sparse raster is summed over its stored pixels only.
+        """
+        labels = self._get_window(raster)
+        if labels is None:
+            return None
+
+        if isinstance(raster, SparseRasterData):
+            fill_value = raster.fill_value
+            if fill_value not in (0, raster.nodata) and not math.isnan(fill_value):
+                # The pixels not stored would add to the sums too
+                return None
+            values = raster.values
+            labels = labels[np.divmod(raster.indexes, raster.shape[1])]
+        else:
+            values = raster.array
+        # Zeros add nothing, so only the exposed pixels are summed
+        summed = values != 0
+        if raster.nodata is not None:
+            summed &= values != raster.nodata
+        if np.issubdtype(values.dtype, np.floating):
+            summed &= ~np.isnan(values)
+        sums = np.bincount(
+            labels[summed],
+            weights=values[summed],
+            minlength=len(self.place_codes) + 1,
+        )
+
+        return {
+            place_code: round(float(sums[self._label_indexes[place_code]]), 0)
+            for place_code in place_codes
+            if place_code in self._label_indexes
+        }
+
+    def _get_window(self, raster: RasterData | SparseRasterData) -> np.ndarray | None:
+        if not self.exact:
+            return None
+        t = raster.transform
+        grid = self.transform
+        if (t.a, t.b, t.d, t.e) != (grid.a, grid.b, grid.d, grid.e):
+            return None
+        col_off = (t.c - grid.c) / grid.a
+        row_off = (t.f - grid.f) / grid.e
+        col, row = round(col_off), round(row_off)
+        if (
+            abs(col_off - col) > _ALIGNMENT_TOLERANCE
+            or abs(row_off - row) > _ALIGNMENT_TOLERANCE
+        ):
+            return None
+        height, width = raster.grid.shape
+        if (
+            row < 0
+            or col < 0
+            or row + height > self.labels.shape[0]
+            or col + width > self.labels.shape[1]
+        ):
+            return None
+        return self.labels[row : row + height, col : col + width]
+
+
+def get_admin_area_labels(
+    admin_areas: AdminAreasSet,
+    grid: RasterGrid,
+    country: str,
+    admin_level: int,
+) -> AdminAreaLabels:
+    """
+    Label raster of the admin areas on a raster grid, from the cache in
+    DATA_CACHE_DIR when the grid and admin areas are unchanged.
+    """
+    place_codes = list(admin_areas.admin_areas)
+    geometries = [area.get_geometry() for area in admin_areas.admin_areas.values()]
+    cache_key = _get_cache_key(grid, place_codes, geometries)
+    cache_dir = get_admin_area_labels_cache_dir(country)
+    cache_name = f"adm{admin_level}_{cache_key[:16]}"
+
+    if cache_dir is not None:
+        cached = _load_cached_labels(cache_dir, cache_name, grid.transform)
+        if cached is not None:
+            return cached
+
+    labels = _rasterize_labels(grid, geometries)
+    admin_area_labels = AdminAreaLabels(
+        labels=labels,
+        transform=grid.transform,
+        place_codes=place_codes,
+        exact=not _has_overlaps(grid, geometries),
+    )
+    if not admin_area_labels.exact:
+        log_warning(
+            logger,
+            LogTag.INFRA,
+            f"Admin areas of {country} (level {admin_level}) overlap, "
+            "summing with zonal_stats instead of a label raster",
+        )
+    log_info(
+        logger,
+        LogTag.INFRA,
+        f"Rasterized {len(place_codes)} admin areas of {country} "
+        f"(level {admin_level}) to a {labels.shape} label raster",
+    )
+
+    if cache_dir is not None:
+        try:
+            _save_labels(cache_dir, cache_name, f"adm{admin_level}_", admin_area_labels)
+        except OSError as exc:
+            log_warning(
+                logger,
+                LogTag.INFRA,
+                f"Could not cache admin area labels in {cache_dir}: {exc}",
+            )
+    return admin_area_labels
+
+
+def _get_cache_key(grid: RasterGrid, place_codes: list[str], geometries: list) -> str:
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            [list(grid.transform)[:6], grid.shape, grid.crs, place_codes]
+        ).encode()
+    )
+    for geometry in geometries:
+        digest.update(shapely.to_wkb(geometry))
+    return digest.hexdigest()
+
+
+def _rasterize_labels(grid: RasterGrid, geometries: list) -> np.ndarray:
+    dtype = np.uint16 if len(geometries) < np.iinfo(np.uint16).max else np.int32
+    if not geometries:
+        return np.zeros(grid.shape, dtype=dtype)
+    return rasterize(
+        ((geometry, label) for label, geometry in enumerate(geometries, start=1)),
+        out_shape=grid.shape,
+        transform=grid.transform,
+        fill=0,
+        all_touched=False,
+        dtype=dtype,
+    )
+
+
+def _has_overlaps(grid: RasterGrid, geometries: list) -> bool:
+    if len(geometries) < 2:
+        return False
+    coverage = np.asarray(
+        rasterize(
+            ((geometry, 1) for geometry in geometries),
+            out_shape=grid.shape,
+            transform=grid.transform,
+            fill=0,
+            all_touched=False,
+            merge_alg=MergeAlg.add,
+            dtype=np.uint8,
+        )
+    )
+    return bool((coverage > 1).any())
+
+
+def _load_cached_labels(
+    cache_dir: str, cache_name: str, transform: Affine
+) -> AdminAreaLabels | None:
+    array_path = os.path.join(cache_dir, f"{cache_name}.npy")
+    sidecar_path = os.path.join(cache_dir, f"{cache_name}.json")
+    if not os.path.exists(array_path) or not os.path.exists(sidecar_path):
+        return None
+    try:
+        with open(sidecar_path) as f:
+            sidecar = json.load(f)
+        labels = np.load(array_path, mmap_mode="r")
+    except (OSError, ValueError) as exc:
+        log_warning(
+            logger,
+            LogTag.INFRA,
+            f"Ignoring unreadable admin area labels {array_path}: {exc}",
+        )
+        return None
+    return AdminAreaLabels(
+        labels=labels,
+        transform=transform,
+        place_codes=sidecar["place_codes"],
+        exact=sidecar["exact"],
+    )
+
+
+def _save_labels(
+    cache_dir: str, cache_name: str, stale_prefix: str, labels: AdminAreaLabels
+) -> None:
+    # Label rasters of the same level for other grids or admin areas are outdated.
+    # Files of the current labels, and temporary files another job is still
+    # writing, are kept.
+    for stale_path in glob.glob(os.path.join(cache_dir, f"{stale_prefix}*")):
+        stale_name = os.path.basename(stale_path)
+        if stale_name.startswith(f"{cache_name}.") or stale_name.endswith(".tmp"):
+            continue
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(stale_path)
+
+    # Write under a temporary name (per process, as jobs of the same country can run
+    # concurrently) and rename when complete, so an interrupted run never leaves a
+    # truncated label raster behind
+    array_path = os.path.join(cache_dir, f"{cache_name}.npy")
+    temp_array_path = f"{array_path}.{os.getpid()}.tmp"
+    with open(temp_array_path, "wb") as f:
+        np.save(f, labels.labels)
+    os.replace(temp_array_path, array_path)
+
+    sidecar_path = os.path.join(cache_dir, f"{cache_name}.json")
+    temp_sidecar_path = f"{sidecar_path}.{os.getpid()}.tmp"
+    with open(temp_sidecar_path, "w") as f:
+        json.dump({"place_codes": labels.place_codes, "exact": labels.exact}, f)
+    os.replace(temp_sidecar_path, sidecar_path)
@@ -0,0 +1,232 @@
+"""
+Retention of the data cached in DATA_CACHE_DIR.
+
+Each cache directory has a policy with a maximum age and/or a maximum total size.
+The unit of eviction is a direct child of the cache directory (a forecast date
+folder, or a country folder for mock data), evicted least recently used first.
+Folders of the forecast dates in use are never evicted. Per-country folders have no
+date to protect them, so no folder used within the last min_idle_hours is evicted,
+as a concurrent job may still have it open.
+
+Runs at pipeline start (with DATA_CACHE_RETENTION=true), or on its own:
+
+    uv run python -m pipelines.infra.utils.cache_retention [--dry-run]
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+import click
+from dotenv import load_dotenv
+from pipelines.infra.utils.nrw_logger import log_info, log_warning, LogTag
+from pipelines.infra.utils.storage_helpers import (
+    ADMIN_AREA_LABELS_CACHE_DIR,
+    FLOOD_EXTENT_CACHE_DIR,
+    GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR,
+    GLOFAS_COUNTRY_SPLIT_DATA_DIR,
+    GLOFAS_MOCK_DATA_DIR,
+    GLOFAS_RAW_DATA_DIR,
+    POPULATION_CACHE_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+_GIB = 1024**3
+_SECONDS_PER_HOUR = 60 * 60
+_SECONDS_PER_DAY = 24 * _SECONDS_PER_HOUR
+
+
+@dataclass
+class CacheRetentionPolicy:
+    subdir: str
+    max_age_days: float | None = None
+    max_bytes: int | None = None
+    # With relatime mounts, reading updates the access time at most once a day, so
+    # anything read in the last day is still within two days
+    min_idle_hours: float = 48
+
+
+CACHE_RETENTION_POLICIES = [
+    # Global files of all 51 ensemble members are large, and only needed for about a week
+    CacheRetentionPolicy(GLOFAS_RAW_DATA_DIR, max_age_days=7, max_bytes=25 * _GIB),
+    CacheRetentionPolicy(
+        GLOFAS_COUNTRY_SPLIT_DATA_DIR, max_age_days=90, max_bytes=10 * _GIB
+    ),
+    CacheRetentionPolicy(GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR, max_age_days=365),
+    CacheRetentionPolicy(GLOFAS_MOCK_DATA_DIR, max_age_days=30),
+    # Per-country folders, revalidated against the seed repo on every run
+    CacheRetentionPolicy(FLOOD_EXTENT_CACHE_DIR, max_age_days=90),
+    CacheRetentionPolicy(ADMIN_AREA_LABELS_CACHE_DIR, max_age_days=90),
+    # Revalidated against the IBF API metadata on every run
+    CacheRetentionPolicy(POPULATION_CACHE_DIR, max_age_days=90),
+]
+
+
+@dataclass
+class _CacheEntry:
+    path: str
+    size: int
+    last_access: float
+
+
+def apply_cache_retention(
+    protected_dates: set[str] | None = None,
+    policies: list[CacheRetentionPolicy] = CACHE_RETENTION_POLICIES,
+    dry_run: bool = False,
+) -> int:
+    """
+    Evict cache folders that are too old, or least recently used beyond the size budget.
+
+    Folders named after one of the protected_dates, today's forecast date, or the most
+    recent date in each cache directory are never evicted, nor are folders used within
+    the min_idle_hours of their policy, even beyond the size budget.
+
+    Returns the number of bytes reclaimed (or that would be reclaimed, for a dry run).
+    """
+    cache_base = os.environ.get("DATA_CACHE_DIR")
+    if not cache_base:
+        raise ValueError("DATA_CACHE_DIR environment variable is required.")
+
+    protected = set(protected_dates or set())
+    protected.add(datetime.now(timezone.utc).strftime("%Y%m%d"))
+
+    reclaimed_bytes = 0
+    for policy in policies:
+        reclaimed_bytes += _apply_policy(cache_base, policy, protected, dry_run)
+
+    log_info(
+        logger,
+        LogTag.INFRA,
+        f"Cache retention {'would reclaim' if dry_run else 'reclaimed'} "
+        f"{_format_bytes(reclaimed_bytes)} in {cache_base}",
+    )
+    return reclaimed_bytes
+
+
+def _apply_policy(
+    cache_base: str,
+    policy: CacheRetentionPolicy,
+    protected_dates: set[str],
+    dry_run: bool,
+) -> int:
+    cache_dir = os.path.join(cache_base, policy.subdir)
+    if not os.path.isdir(cache_dir):
+        return 0
+
+    entries = [
+        _scan_entry(os.path.join(cache_dir, name)) for name in os.listdir(cache_dir)
+    ]
+    # The most recent date is the default for --local-data, so keep it as well
+    date_names = [
+        os.path.basename(entry.path)
+        for entry in entries
+        if os.path.basename(entry.path).isdigit()
+    ]
+    latest_date = max(date_names, default=None)
+    protected = protected_dates | ({latest_date} if latest_date else set())
+    total_bytes = sum(entry.size for entry in entries)
+
+    evicted: list[_CacheEntry] = []
+    now = time.time()
+    # Least recently used first
+    for entry in sorted(entries, key=lambda e: e.last_access):
+        if os.path.basename(entry.path) in protected:
+            continue
+        if now - entry.last_access < policy.min_idle_hours * _SECONDS_PER_HOUR:
+            continue
+        too_old = (
+            policy.max_age_days is not None
+            and now - entry.last_access > policy.max_age_days * _SECONDS_PER_DAY
+        )
+        over_budget = policy.max_bytes is not None and total_bytes > policy.max_bytes
+        if not too_old and not over_budget:
+            continue
+        evicted.append(entry)
+        total_bytes -= entry.size
+
+    reclaimed_bytes = 0
+    for entry in evicted:
+        if not dry_run:
+            try:
+                _remove(entry.path)
+            except OSError as exc:
+                log_warning(
+                    logger,
+                    LogTag.INFRA,
+                    f"Could not evict cache folder {entry.path}: {exc}",
+                )
+                continue
+        reclaimed_bytes += entry.size
+
+    if evicted:
+        log_info(
+            logger,
+            LogTag.INFRA,
+            f"Cache retention for {policy.subdir}: "
+            f"{'would evict' if dry_run else 'evicted'} "
+            f"{', '.join(sorted(os.path.basename(e.path) for e in evicted))} "
+            f"({_format_bytes(reclaimed_bytes)})",
+        )
+    return reclaimed_bytes
+
+
+def _scan_entry(path: str) -> _CacheEntry:
+    """Total size and last access (or modification) time of a file or folder."""
+    stat = os.lstat(path)
+    size = stat.st_size
+    last_access = max(stat.st_atime, stat.st_mtime)
+    if os.path.isdir(path):
+        size = 0
+        for dirpath, _, filenames in os.walk(path):
+            for filename in filenames:
+                file_stat = os.lstat(os.path.join(dirpath, filename))
+                size += file_stat.st_size
+                last_access = max(last_access, file_stat.st_atime, file_stat.st_mtime)
+    return _CacheEntry(path=path, size=size, last_access=last_access)
+
+
+def _remove(path: str) -> None:
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.remove(path)
+
+
+def _format_bytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+@click.command()
+@click.option(
+    "--protect-date",
+    "protected_dates",
+    multiple=True,
+    help="Forecast date (YYYYMMDD) to keep in addition to today's. Can be repeated.",
+)
+@click.option(
+    "--dry-run",
+    "dry_run",
+    is_flag=True,
+    default=False,
+    help="Only log what would be evicted.",
+)
+def main(protected_dates: tuple[str, ...], dry_run: bool) -> None:
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+    )
+    try:
+        apply_cache_retention(set(protected_dates), dry_run=dry_run)
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+
+
+if __name__ == "__main__":
+    main()
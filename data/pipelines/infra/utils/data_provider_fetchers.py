@@ -6,15 +6,14 @@ See the readme for more details on adding new data sources.
 
 import logging
 import os
+from collections.abc import Callable
 
-import numpy as np
 from pipelines.infra.data_types.admin_area_types import AdminAreasSet
 from pipelines.infra.data_types.data_config_types import (
     CountryRunConfig,
     DataSource,
     DataSourceConfig,
 )
-from pipelines.infra.data_types.enums import LayerName
 from pipelines.infra.data_types.flood_extent_provider import FloodExtentProvider
 from pipelines.infra.data_types.glofas_discharge_provider import (
     download_glofas_discharge_from_ftp,
@@ -22,17 +21,14 @@ from pipelines.infra.data_types.glofas_discharge_provider import (
     load_glofas_discharge_from_local_country_files,
     load_glofas_discharge_from_local_global_files,
 )
-from pipelines.infra.data_types.loaded_data_types import (
-    DataType,
-    LoadedDataSource,
-    RasterData,
-)
+from pipelines.infra.data_types.loaded_data_types import DataType, LoadedDataSource
 from pipelines.infra.data_types.location_point import LocationPoint
+from pipelines.infra.data_types.population_raster_provider import (
+    PopulationRasterProvider,
+)
 from pipelines.infra.utils.api_client import ApiClient
 from pipelines.infra.utils.dummy_data import DUMMY_DATA
-from rasterio.transform import Affine
 from shared.download_helpers import download_json_source
-from shared.image_helpers import rgba_png_to_float_array
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +50,7 @@ def load_data_container(
     api_client: ApiClient,
     local_data_date: str | None = None,
     local_data: str | None = None,
+    on_glofas_member_downloaded: Callable[[str], None] | None = None,
 ):
 
     match data_config.source:
@@ -85,7 +82,11 @@ def load_data_container(
             )
         case DataSource.GLOFAS_DISCHARGE_FTP:
             return _load_glofas_discharge(
-                data_config, container, local_data_date, local_data
+                data_config,
+                container,
+                local_data_date,
+                local_data,
+                on_glofas_member_downloaded,
             )
         case DataSource.GLOFAS_DISCHARGE_SEED_REPO_ALERT:
             return _load_glofas_discharge_seed_repo(data_config, container, "alert")
@@ -166,39 +167,10 @@ def _load_ibf_api_alert_configs(
 def _load_ibf_api_population_data(
     config: DataSourceConfig, container: LoadedDataSource, api_client: ApiClient
 ):
-    container.data_type = DataType.RASTER_DATA
-
-    layer_name = LayerName.POPULATION
-    raster_info = api_client.get_static_raster_metadata(
-        config.country_code_iso_3, layer_name
-    )
-    if raster_info is None:
-        container.error = f"Failed to download population raster metadata from API for {config.country_code_iso_3}"
-        raise ValueError(container.error)
-
-    png_bytes = api_client.get_static_raster_data_image(
-        config.country_code_iso_3, layer_name
-    )
-    if png_bytes is None:
-        container.error = f"Failed to download population raster data from API for {config.country_code_iso_3}"
-        raise ValueError(container.error)
-
-    population_array = rgba_png_to_float_array(png_bytes)
-    data_metadata = raster_info["metadata"]["data"]
-    extent = data_metadata["extent"]
-    crs = data_metadata["crs"]
-    nodata = data_metadata["nodata"]
-    width = population_array.shape[1]
-    height = population_array.shape[0]
-    x_res = (extent["xmax"] - extent["xmin"]) / width
-    y_res = (extent["ymax"] - extent["ymin"]) / height
-    transform = Affine(x_res, 0, extent["xmin"], 0, -y_res, extent["ymax"])
-
-    container.data = RasterData(
-        array=population_array.astype(np.float32),
-        transform=transform,
-        crs=crs,
-        nodata=nodata,
+    # Only a handle: the raster is downloaded when exposure is first computed
+    container.data_type = DataType.POPULATION_RASTER_PROVIDER
+    container.data = PopulationRasterProvider(
+        country=config.country_code_iso_3, api_client=api_client
     )
 
 
@@ -222,6 +194,8 @@ def _load_seed_repo_flood_extents(
         available_return_periods=manifest["return_periods"],
         base_url=base_url,
         country=country,
+        tiled=bool(manifest.get("tiled", False)),
+        exposure_table_filename=manifest.get("exposure_table"),
     )
 
 
@@ -262,6 +236,7 @@ def _load_glofas_discharge(
     container: LoadedDataSource,
     local_data_date: str | None,
     local_data: str | None,
+    on_member_downloaded: Callable[[str], None] | None,
 ) -> None:
     container.data_type = DataType.PATH_LIST
     if local_data == "global":
@@ -273,7 +248,9 @@ def _load_glofas_discharge(
             config.country_code_iso_3, local_data_date
         )
     else:
-        container.data = download_glofas_discharge_from_ftp(config.country_code_iso_3)
+        container.data = download_glofas_discharge_from_ftp(
+            config.country_code_iso_3, on_member_downloaded
+        )
 
 
 def _load_glofas_discharge_seed_repo(
@@ -1,30 +1,54 @@
 from __future__ import annotations
 
 import logging
+import math
+from dataclasses import dataclass, field
 
 import numpy as np
 from pipelines.infra.data_types.admin_area_types import AdminAreasSet
-from pipelines.infra.data_types.loaded_data_types import AlertConfig, RasterData
+from pipelines.infra.data_types.loaded_data_types import (
+    AlertConfig,
+    RasterData,
+    RasterGrid,
+    RasterT,
+    SparseRasterData,
+)
+from pipelines.infra.utils.admin_area_labels import AdminAreaLabels
 from pipelines.infra.utils.nrw_logger import log_warning, LogTag
+from pipelines.infra.utils.raster import get_bounds_window, get_raster_bounds
 from rasterio.enums import Resampling
 from rasterio.features import geometry_mask
 from rasterio.transform import Affine, from_bounds
 from rasterio.warp import reproject
 from rasterio.windows import from_bounds as window_from_bounds
 from rasterstats import zonal_stats
+from shapely.geometry.base import BaseGeometry
 
 logger = logging.getLogger(__name__)
 
+# Tolerance (in pixels) for a hazard grid to count as aligned with the population grid
+_ALIGNMENT_TOLERANCE = 1e-9
+
 
 def aggregate_population_exposed(
-    population_exposed_raster: RasterData,
+    population_exposed_raster: RasterData | SparseRasterData,
     place_codes_exposed: list[str],
     admin_areas: AdminAreasSet,
+    admin_area_labels: AdminAreaLabels | None = None,
 ) -> dict[str, float]:
     """
     Aggregate population exposed within the flood extent per place code.
+    With admin area labels on the population grid, this is a single pass over the
+    raster instead of rasterizing every admin area.
     """
 
+    if admin_area_labels is not None:
+        population_by_label = admin_area_labels.sum_by_place_code(
+            population_exposed_raster, place_codes_exposed
+        )
+        if population_by_label is not None:
+            return population_by_label
+
     population: dict[str, float] = {}
 
     geometries, pcodes_ordered = get_admin_area_geometries(
@@ -35,6 +59,8 @@ def aggregate_population_exposed(
     if not geometries:
         return population
 
+    if isinstance(population_exposed_raster, SparseRasterData):
+        population_exposed_raster = population_exposed_raster.to_raster_data()
     stats = zonal_stats(
         geometries,
         population_exposed_raster.array,
@@ -53,20 +79,33 @@ def aggregate_population_exposed(
 
 def compute_population_exposed(
     population_raster: RasterData,
-    hazard_extent_raster: RasterData,
-) -> RasterData | None:
+    hazard_extent_raster: RasterT,
+    reprojection_cache: ReprojectionCache | None = None,
+) -> RasterT | None:
     """
     Masks the population raster with the (binary) hazard extent raster
     so only exposed pixels count toward the population sum.
     Returns the exposed population as in-memory raster data.
+    With a reprojection cache, hazard extents on the same grid and window reuse one
+    nearest neighbour index map instead of reprojecting again.
+    For a sparse hazard extent the exposed population is sparse as well, and only the
+    flooded pixels are looked up.
     """
+    if isinstance(hazard_extent_raster, SparseRasterData):
+        hazard_size = math.prod(hazard_extent_raster.shape)
+    else:
+        hazard_size = hazard_extent_raster.array.size
     if (
         population_raster is None
         or hazard_extent_raster is None
         or population_raster.array.size == 0
-        or hazard_extent_raster.array.size == 0
+        or hazard_size == 0
     ):
         return None
+    if isinstance(hazard_extent_raster, SparseRasterData):
+        return _compute_sparse_population_exposed(
+            population_raster, hazard_extent_raster, reprojection_cache
+        )
 
     pop_array = population_raster.array
     pop_transform = population_raster.transform
@@ -76,34 +115,101 @@ def compute_population_exposed(
         pop_array, pop_transform, hazard_extent_raster, pop_crs
     )
 
-    hazard_array_resampled = np.zeros(cropped_pop_array.shape, dtype=np.float32)
-    reproject(
-        source=hazard_extent_raster.array.astype(np.float32),
-        destination=hazard_array_resampled,
-        src_transform=hazard_extent_raster.transform,
-        src_crs=hazard_extent_raster.crs,
-        dst_transform=cropped_pop_transform,
-        dst_crs=pop_crs,
-        resampling=Resampling.nearest,
+    hazard_mask = _get_aligned_hazard_mask(
+        hazard_extent_raster, cropped_pop_array.shape, cropped_pop_transform, pop_crs
     )
+    if hazard_mask is None and reprojection_cache is not None:
+        hazard_mask = _get_indexed_hazard_mask(
+            hazard_extent_raster,
+            RasterGrid(
+                transform=cropped_pop_transform,
+                shape=(cropped_pop_array.shape[0], cropped_pop_array.shape[1]),
+                crs=pop_crs,
+            ),
+            reprojection_cache,
+        )
+    if hazard_mask is None:
+        hazard_mask = _get_reprojected_hazard_mask(
+            hazard_extent_raster,
+            cropped_pop_array.shape,
+            cropped_pop_transform,
+            pop_crs,
+        )
 
-    binary_hazard_extent = (hazard_array_resampled > 0).astype(np.uint8)
-    population_in_hazard_extent = np.where(
-        binary_hazard_extent == 1, cropped_pop_array, 0.0
+    # Population copied into one float32 buffer, only where the hazard is
+    population_in_hazard_extent = np.zeros(cropped_pop_array.shape, dtype=np.float32)
+    np.copyto(
+        population_in_hazard_extent,
+        cropped_pop_array,
+        casting="same_kind",
+        where=hazard_mask,
     )
 
     return RasterData(
-        array=population_in_hazard_extent.astype(np.float32),
+        array=population_in_hazard_extent,
+        transform=cropped_pop_transform,
+        crs=pop_crs,
+        nodata=population_raster.nodata,
+    )
+
+
+def _compute_sparse_population_exposed(
+    population_raster: RasterData,
+    hazard_extent_raster: SparseRasterData,
+    reprojection_cache: ReprojectionCache | None,
+) -> SparseRasterData | None:
+    if hazard_extent_raster.fill_value > 0:
+        # The pixels not stored are hazard too, so nothing is saved by the sparse path
+        exposed = compute_population_exposed(
+            population_raster,
+            hazard_extent_raster.to_raster_data(),
+            reprojection_cache,
+        )
+        return (
+            SparseRasterData.from_raster_data(exposed) if exposed is not None else None
+        )
+
+    pop_crs = population_raster.crs
+    cropped_pop_array, cropped_pop_transform = _crop_to_hazard_bounds(
+        population_raster.array,
+        population_raster.transform,
+        hazard_extent_raster,
+        pop_crs,
+    )
+    pop_grid = RasterGrid(
+        transform=cropped_pop_transform,
+        shape=(cropped_pop_array.shape[0], cropped_pop_array.shape[1]),
+        crs=pop_crs,
+    )
+
+    flooded = hazard_extent_raster.indexes[hazard_extent_raster.values > 0]
+    exposed_indexes = _get_aligned_hazard_indexes(
+        hazard_extent_raster, flooded, pop_grid
+    )
+    if exposed_indexes is None:
+        exposed_indexes = _get_indexed_hazard_indexes(
+            hazard_extent_raster.grid, flooded, pop_grid, reprojection_cache
+        )
+
+    rows, cols = np.divmod(exposed_indexes, pop_grid.shape[1])
+    values = cropped_pop_array[rows, cols].astype(np.float32, copy=False)
+    # Zeros are the fill value, as in the dense exposed population
+    stored = values != 0
+    return SparseRasterData(
+        indexes=exposed_indexes[stored],
+        values=values[stored],
+        shape=pop_grid.shape,
         transform=cropped_pop_transform,
         crs=pop_crs,
         nodata=population_raster.nodata,
+        fill_value=0,
     )
 
 
 def _crop_to_hazard_bounds(
     pop_array: np.ndarray,
     pop_transform: Affine,
-    hazard_extent_raster: RasterData,
+    hazard_extent_raster: RasterData | SparseRasterData,
     pop_crs: str,
 ) -> tuple[np.ndarray, Affine]:
     """
@@ -111,28 +217,18 @@ def _crop_to_hazard_bounds(
     Returns the cropped array and its new transform. Falls back to the full array
     if the window is invalid or empty.
     """
-    if hazard_extent_raster.crs != pop_crs:
-        return pop_array, pop_transform
-
-    hazard_t = hazard_extent_raster.transform
-    hazard_rows, hazard_cols = hazard_extent_raster.array.shape
-    hazard_corners = [
-        hazard_t * (0, 0),
-        hazard_t * (hazard_cols, 0),
-        hazard_t * (0, hazard_rows),
-        hazard_t * (hazard_cols, hazard_rows),
-    ]
-    min_x = min(c[0] for c in hazard_corners)
-    max_x = max(c[0] for c in hazard_corners)
-    min_y = min(c[1] for c in hazard_corners)
-    max_y = max(c[1] for c in hazard_corners)
-
-    window = window_from_bounds(min_x, min_y, max_x, max_y, pop_transform)
-    row_start = max(int(np.floor(window.row_off)), 0)
-    col_start = max(int(np.floor(window.col_off)), 0)
-    row_end = min(int(np.ceil(window.row_off + window.height)), pop_array.shape[0])
-    col_end = min(int(np.ceil(window.col_off + window.width)), pop_array.shape[1])
-
+    if hazard_extent_raster.crs == pop_crs:
+        bounds = get_raster_bounds(hazard_extent_raster)
+        padding = 0
+    else:
+        # Transformed bounds follow the densified edges of the hazard extent, so a
+        # pixel of padding covers what falls between them
+        bounds = get_raster_bounds(hazard_extent_raster, pop_crs)
+        padding = 1
+
+    row_start, row_end, col_start, col_end = get_bounds_window(
+        pop_transform, pop_array.shape, bounds, padding
+    )
     if row_end <= row_start or col_end <= col_start:
         return pop_array, pop_transform
 
@@ -141,14 +237,259 @@ def _crop_to_hazard_bounds(
     return cropped, cropped_transform
 
 
+def _get_aligned_hazard_mask(
+    hazard_extent_raster: RasterData,
+    pop_shape: tuple[int, ...],
+    pop_transform: Affine,
+    pop_crs: str,
+) -> np.ndarray | None:
+    """
+    Hazard mask on the population grid, for a hazard grid aligned with it: the same
+    CRS, pixels a whole number of population pixels wide, and edges on population
+    pixel edges. Each population pixel center then lies inside exactly one hazard
+    pixel, so nearest neighbour resampling is an index lookup. Returns None for
+    other grids.
+    """
+    alignment = _get_grid_alignment(
+        hazard_extent_raster.transform, hazard_extent_raster.crs, pop_transform, pop_crs
+    )
+    if alignment is None:
+        return None
+    (row_factor, row_offset), (col_factor, col_offset) = alignment
+
+    # Index of the hazard pixel containing each population pixel center, per axis
+    hazard_rows, hazard_cols = hazard_extent_raster.array.shape
+    row_index = (np.arange(pop_shape[0]) + row_offset) // row_factor
+    col_index = (np.arange(pop_shape[1]) + col_offset) // col_factor
+
+    # Population pixels outside the hazard extent stay unexposed, as with reproject
+    valid_rows = (row_index >= 0) & (row_index < hazard_rows)
+    valid_cols = (col_index >= 0) & (col_index < hazard_cols)
+    hazard_mask = np.zeros(pop_shape, dtype=bool)
+    hazard_mask[np.ix_(valid_rows, valid_cols)] = (
+        hazard_extent_raster.array[np.ix_(row_index[valid_rows], col_index[valid_cols])]
+        > 0
+    )
+    return hazard_mask
+
+
+def _get_aligned_hazard_indexes(
+    hazard_extent_raster: SparseRasterData,
+    flooded: np.ndarray,
+    pop_grid: RasterGrid,
+) -> np.ndarray | None:
+    """
+    As _get_aligned_hazard_mask, for a sparse hazard extent: the sorted flat indexes
+    of the population pixels in its flooded pixels. Returns None for other grids.
+    """
+    alignment = _get_grid_alignment(
+        hazard_extent_raster.transform,
+        hazard_extent_raster.crs,
+        pop_grid.transform,
+        pop_grid.crs,
+    )
+    if alignment is None:
+        return None
+    (row_factor, row_offset), (col_factor, col_offset) = alignment
+
+    # Population pixels with their center in each flooded pixel, the inverse of the
+    # row and column indexes of _get_aligned_hazard_mask
+    hazard_rows, hazard_cols = np.divmod(flooded, hazard_extent_raster.shape[1])
+    rows = (hazard_rows * row_factor - row_offset)[:, None] + np.arange(row_factor)
+    cols = (hazard_cols * col_factor - col_offset)[:, None] + np.arange(col_factor)
+    height, width = pop_grid.shape
+    inside = ((rows >= 0) & (rows < height))[:, :, None] & (
+        (cols >= 0) & (cols < width)
+    )[:, None, :]
+    indexes = rows[:, :, None] * width + cols[:, None, :]
+    return np.sort(indexes[inside])
+
+
+def _get_grid_alignment(
+    hazard_transform: Affine,
+    hazard_crs: str,
+    pop_transform: Affine,
+    pop_crs: str,
+) -> tuple[tuple[int, int], tuple[int, int]] | None:
+    # (factor, offset) of the rows and of the columns, see _get_axis_alignment
+    if (
+        hazard_crs != pop_crs
+        or hazard_transform.b != 0
+        or hazard_transform.d != 0
+        or pop_transform.b != 0
+        or pop_transform.d != 0
+    ):
+        return None
+    row_alignment = _get_axis_alignment(
+        hazard_transform.e, hazard_transform.f, pop_transform.e, pop_transform.f
+    )
+    col_alignment = _get_axis_alignment(
+        hazard_transform.a, hazard_transform.c, pop_transform.a, pop_transform.c
+    )
+    if row_alignment is None or col_alignment is None:
+        return None
+    return row_alignment, col_alignment
+
+
+def _get_axis_alignment(
+    hazard_res: float,
+    hazard_origin: float,
+    pop_res: float,
+    pop_origin: float,
+) -> tuple[int, int] | None:
+    # Along one axis, population pixel i has its center in hazard pixel
+    # (i + offset) // factor
+    ratio = hazard_res / pop_res
+    factor = round(ratio)
+    offset = (pop_origin - hazard_origin) / pop_res
+    if (
+        factor < 1
+        or abs(ratio - factor) > _ALIGNMENT_TOLERANCE * factor
+        or abs(offset - round(offset)) > _ALIGNMENT_TOLERANCE
+    ):
+        return None
+    return factor, round(offset)
+
+
+@dataclass
+class ReprojectionCache:
+    """
+    Nearest neighbour index maps from hazard grids to population grids, per run.
+
+    Flood extents of a country share one grid, and stations sharing their place codes
+    clip them to the same window, so their exposure reprojects between the same two
+    grids. The first reprojection records which source pixel each destination pixel
+    takes (as 1-based flat indexes, 0 where no source pixel is taken), and later ones
+    are a single gather with that map.
+    """
+
+    index_maps: dict[tuple[RasterGrid, RasterGrid], np.ndarray] = field(
+        default_factory=dict
+    )
+
+
+def _get_indexed_hazard_mask(
+    hazard_extent_raster: RasterData,
+    pop_grid: RasterGrid,
+    reprojection_cache: ReprojectionCache,
+) -> np.ndarray:
+    index_map = _get_index_map(hazard_extent_raster.grid, pop_grid, reprojection_cache)
+    hazard_mask = np.zeros(pop_grid.shape, dtype=bool)
+    taken = index_map > 0
+    hazard_mask[taken] = hazard_extent_raster.array.ravel()[index_map[taken] - 1] > 0
+    return hazard_mask
+
+
+def _get_indexed_hazard_indexes(
+    hazard_grid: RasterGrid,
+    flooded: np.ndarray,
+    pop_grid: RasterGrid,
+    reprojection_cache: ReprojectionCache | None,
+) -> np.ndarray:
+    # Sorted flat indexes of the population pixels taking a flooded hazard pixel
+    index_map = _get_index_map(hazard_grid, pop_grid, reprojection_cache).reshape(-1)
+    taken = np.flatnonzero(index_map)
+    if flooded.size == 0:
+        return taken[:0]
+    sources = index_map[taken] - 1
+    positions = np.minimum(np.searchsorted(flooded, sources), flooded.size - 1)
+    return taken[flooded[positions] == sources]
+
+
+def _get_index_map(
+    hazard_grid: RasterGrid,
+    pop_grid: RasterGrid,
+    reprojection_cache: ReprojectionCache | None,
+) -> np.ndarray:
+    if reprojection_cache is None:
+        return _get_nearest_index_map(hazard_grid, pop_grid)
+    key = (hazard_grid, pop_grid)
+    index_map = reprojection_cache.index_maps.get(key)
+    if index_map is None:
+        index_map = _get_nearest_index_map(hazard_grid, pop_grid)
+        reprojection_cache.index_maps[key] = index_map
+    return index_map
+
+
+def _get_nearest_index_map(src_grid: RasterGrid, dst_grid: RasterGrid) -> np.ndarray:
+    # Reprojecting the flat indexes of the source pixels with the same resampling
+    # gives exactly the pixels reproject takes for the hazard values
+    src_size = src_grid.shape[0] * src_grid.shape[1]
+    dtype = np.int32 if src_size < np.iinfo(np.int32).max else np.int64
+    index_map = np.zeros(dst_grid.shape, dtype=dtype)
+    reproject(
+        source=np.arange(1, src_size + 1, dtype=dtype).reshape(src_grid.shape),
+        destination=index_map,
+        src_transform=src_grid.transform,
+        src_crs=src_grid.crs,
+        dst_transform=dst_grid.transform,
+        dst_crs=dst_grid.crs,
+        resampling=Resampling.nearest,
+    )
+    # Shared between the stations using the same grids
+    index_map.flags.writeable = False
+    return index_map
+
+
+def _get_reprojected_hazard_mask(
+    hazard_extent_raster: RasterData,
+    pop_shape: tuple[int, ...],
+    pop_transform: Affine,
+    pop_crs: str,
+) -> np.ndarray:
+    hazard_array_resampled = np.zeros(pop_shape, dtype=np.float32)
+    reproject(
+        source=hazard_extent_raster.array.astype(np.float32, copy=False),
+        destination=hazard_array_resampled,
+        src_transform=hazard_extent_raster.transform,
+        src_crs=hazard_extent_raster.crs,
+        dst_transform=pop_transform,
+        dst_crs=pop_crs,
+        resampling=Resampling.nearest,
+    )
+    return hazard_array_resampled > 0
+
+
+@dataclass
+class ClipWindow:
+    """Pixel window of a raster grid covering a place code set, and the mask of the set in it."""
+
+    row_off: int
+    row_end: int
+    col_off: int
+    col_end: int
+    transform: Affine
+    mask: np.ndarray
+
+
+@dataclass
+class ClipCache:
+    """
+    Per-run cache for clip_raster_to_admin_areas, for one AdminAreasSet.
+
+    Keyed by the sorted place codes (and the raster grid, for windows), so stations
+    sharing their place codes, and return periods sharing a grid, reuse one union and
+    one rasterized mask.
+    """
+
+    union_bounds: dict[tuple[str, ...], tuple[float, float, float, float]] = field(
+        default_factory=dict
+    )
+    windows: dict[tuple, ClipWindow] = field(default_factory=dict)
+
+
 def clip_raster_to_admin_areas(
     place_codes: list[str],
     admin_areas: AdminAreasSet,
-    raster: RasterData,
+    raster: RasterT,
     label: str = "",
-) -> RasterData:
-    """Clip a raster to the union of admin area geometries for the given place codes."""
-    geometries, _ = get_admin_area_geometries(
+    clip_cache: ClipCache | None = None,
+) -> RasterT:
+    """
+    Clip a raster to the union of admin area geometries for the given place codes.
+    A sparse raster stays sparse: only its stored pixels inside the union are kept.
+    """
+    geometries, place_codes_ordered = get_admin_area_geometries(
         place_codes=place_codes,
         admin_areas=admin_areas,
     )
@@ -161,20 +502,88 @@ def clip_raster_to_admin_areas(
         )
         return raster
 
-    combined_geom = admin_areas.admin_areas[place_codes[0]].to_geometry()
-    for pcode in place_codes[1:]:
-        area = admin_areas.admin_areas.get(pcode)
-        if area:
-            combined_geom = combined_geom.union(area.to_geometry())
+    place_code_set = tuple(sorted(place_codes_ordered))
+    grid_key = (place_code_set, tuple(raster.transform)[:6], raster.grid.shape)
+    window = clip_cache.windows.get(grid_key) if clip_cache else None
+    if window is None:
+        window = _get_clip_window(
+            raster,
+            geometries,
+            _get_union_bounds(place_code_set, admin_areas, clip_cache),
+        )
+        if clip_cache is not None:
+            clip_cache.windows[grid_key] = window
+
+    if isinstance(raster, SparseRasterData):
+        cropped = raster.crop_to_window(
+            window.row_off, window.row_end, window.col_off, window.col_end
+        )
+        if _fills_with_nodata(cropped):
+            inside = window.mask.reshape(-1)[cropped.indexes]
+            return SparseRasterData(
+                indexes=cropped.indexes[inside],
+                values=cropped.values[inside],
+                shape=cropped.shape,
+                transform=window.transform,
+                crs=raster.crs,
+                nodata=raster.nodata,
+                fill_value=raster.fill_value,
+            )
+        cropped_array = cropped.to_raster_data().array
+    else:
+        cropped_array = raster.array[
+            window.row_off : window.row_end, window.col_off : window.col_end
+        ]
+    nodata = raster.nodata
+    clipped = np.where(window.mask, cropped_array, nodata)
+
+    clipped_raster = RasterData(
+        array=clipped.astype(np.float32),
+        transform=window.transform,
+        crs=raster.crs,
+        nodata=nodata,
+    )
+    if isinstance(raster, SparseRasterData):
+        # Outside the union is nodata, so it is the fill value of the clipped raster
+        return SparseRasterData.from_raster_data(clipped_raster)
+    return clipped_raster
 
-    minx, miny, maxx, maxy = combined_geom.bounds
+
+def _fills_with_nodata(raster: SparseRasterData) -> bool:
+    if math.isnan(raster.nodata):
+        return math.isnan(raster.fill_value)
+    return raster.fill_value == raster.nodata
+
+
+def _get_union_bounds(
+    place_code_set: tuple[str, ...],
+    admin_areas: AdminAreasSet,
+    clip_cache: ClipCache | None,
+) -> tuple[float, float, float, float]:
+    if clip_cache is not None and place_code_set in clip_cache.union_bounds:
+        return clip_cache.union_bounds[place_code_set]
+    # From the cached bounds of the source geometries, without merging them
+    bounds = admin_areas.get_bounds(list(place_code_set))
+    # The place codes have geometries to clip to, so they have bounds
+    assert bounds is not None
+    if clip_cache is not None:
+        clip_cache.union_bounds[place_code_set] = bounds
+    return bounds
+
+
+def _get_clip_window(
+    raster: RasterData | SparseRasterData,
+    geometries: list[BaseGeometry],
+    union_bounds: tuple[float, float, float, float],
+) -> ClipWindow:
+    minx, miny, maxx, maxy = union_bounds
     window = window_from_bounds(minx, miny, maxx, maxy, raster.transform)
     row_off = max(int(np.floor(window.row_off)), 0)
     col_off = max(int(np.floor(window.col_off)), 0)
-    row_end = min(int(np.ceil(window.row_off + window.height)), raster.array.shape[0])
-    col_end = min(int(np.ceil(window.col_off + window.width)), raster.array.shape[1])
+    height, width = raster.grid.shape
+    row_end = min(int(np.ceil(window.row_off + window.height)), height)
+    col_end = min(int(np.ceil(window.col_off + window.width)), width)
 
-    cropped_array = raster.array[row_off:row_end, col_off:col_end]
     t = raster.transform
     cropped_transform = from_bounds(
         t.c + col_off * t.a,
@@ -187,39 +596,35 @@ def clip_raster_to_admin_areas(
 
     mask_array = geometry_mask(
         geometries,
-        out_shape=cropped_array.shape,
+        out_shape=(row_end - row_off, col_end - col_off),
         transform=cropped_transform,
         invert=True,
     )
-
-    nodata = raster.nodata
-    clipped = np.where(mask_array, cropped_array, nodata)
-
-    return RasterData(
-        array=clipped.astype(np.float32),
+    # Shared between the stations using the same place codes
+    mask_array.flags.writeable = False
+
+    return ClipWindow(
+        row_off=row_off,
+        row_end=row_end,
+        col_off=col_off,
+        col_end=col_end,
         transform=cropped_transform,
-        crs=raster.crs,
-        nodata=nodata,
+        mask=mask_array,
     )
 
 
 def get_admin_area_geometries(
     place_codes: list[str],
     admin_areas: AdminAreasSet,
-) -> tuple[list[dict], list[str]]:
-    geometries: list[dict] = []
+) -> tuple[list[BaseGeometry], list[str]]:
+    geometries: list[BaseGeometry] = []
     place_codes_ordered: list[str] = []
 
     for place_code in place_codes:
         admin_area = admin_areas.admin_areas.get(place_code)
         if admin_area is None:
             continue
-        geometries.append(
-            {
-                "type": admin_area.geometry_type,
-                "coordinates": admin_area.coordinates,
-            }
-        )
+        geometries.append(admin_area.get_geometry())
         place_codes_ordered.append(place_code)
 
     return geometries, place_codes_ordered
@@ -0,0 +1,166 @@
+"""
+Manifest of verified GloFAS ensemble files in a glofas/raw/<date> cache directory.
+
+For each completely downloaded member the manifest records the remote size and
+modification time reported by the FTP server, and the local size, mtime and a CRC32
+checksum. Deciding whether a cached member can be reused then only needs a stat call,
+instead of trusting any non-empty file.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import zlib
+from dataclasses import asdict, dataclass
+
+from pipelines.infra.utils.nrw_logger import log_warning, LogTag
+
+logger = logging.getLogger(__name__)
+
+GLOFAS_DOWNLOAD_MANIFEST_FILENAME = "manifest.json"
+
+_CHECKSUM_BLOCK_SIZE = 1024 * 1024
+
+
+@dataclass
+class RemoteFileInfo:
+    """Size and modification time (YYYYMMDDHHMMSS) of a file on the FTP server."""
+
+    size: int | None
+    mtime: str | None
+
+
+@dataclass
+class ManifestEntry:
+    remote_size: int | None
+    remote_mtime: str | None
+    size: int
+    mtime_ns: int
+    checksum: str
+
+
+class GlofasDownloadManifest:
+    """
+    Manifest of the verified ensemble files in one GloFAS raw data directory.
+
+    Entries are recorded by the download workers, so recording is thread-safe and
+    the manifest is saved after every member. An interrupted run keeps the members
+    it completed.
+    """
+
+    def __init__(self, directory: str, entries: dict[str, ManifestEntry]) -> None:
+        self.directory = directory
+        self.path = os.path.join(directory, GLOFAS_DOWNLOAD_MANIFEST_FILENAME)
+        self.entries = entries
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, directory: str) -> GlofasDownloadManifest:
+        """Load the manifest of a directory. A missing or unreadable manifest is empty."""
+        path = os.path.join(directory, GLOFAS_DOWNLOAD_MANIFEST_FILENAME)
+        if not os.path.exists(path):
+            return cls(directory, {})
+        try:
+            with open(path) as f:
+                raw_entries = json.load(f)["members"]
+            entries = {
+                filename: ManifestEntry(**entry)
+                for filename, entry in raw_entries.items()
+            }
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            log_warning(
+                logger,
+                LogTag.INFRA,
+                f"Ignoring unreadable GloFAS download manifest {path}: {exc}",
+            )
+            return cls(directory, {})
+        return cls(directory, entries)
+
+    def record(self, local_path: str, remote: RemoteFileInfo | None) -> None:
+        """Record a completely downloaded member."""
+        stat = os.stat(local_path)
+        entry = ManifestEntry(
+            remote_size=remote.size if remote else None,
+            remote_mtime=remote.mtime if remote else None,
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+            checksum=_compute_checksum(local_path),
+        )
+        with self._lock:
+            self.entries[os.path.basename(local_path)] = entry
+            self._save()
+
+    def is_verified(self, local_path: str) -> bool:
+        """
+        Whether the local file is the complete member recorded in the manifest.
+
+        Size and mtime are compared first. Only when the mtime changed (e.g. the file
+        was copied) the checksum is computed to confirm the content.
+        """
+        entry = self.entries.get(os.path.basename(local_path))
+        if entry is None:
+            return False
+        try:
+            stat = os.stat(local_path)
+        except FileNotFoundError:
+            return False
+        if stat.st_size != entry.size:
+            return False
+        if entry.remote_size is not None and stat.st_size != entry.remote_size:
+            return False
+        if stat.st_mtime_ns == entry.mtime_ns:
+            return True
+        if _compute_checksum(local_path) != entry.checksum:
+            return False
+        with self._lock:
+            entry.mtime_ns = stat.st_mtime_ns
+            self._save()
+        return True
+
+    def matches_remote(self, filename: str, remote: RemoteFileInfo | None) -> bool:
+        """Whether the recorded member is the same version as the file on the server."""
+        entry = self.entries.get(filename)
+        if entry is None:
+            return False
+        if remote is None:
+            return True
+        if remote.size is not None and remote.size != entry.remote_size:
+            return False
+        return remote.mtime is None or remote.mtime == entry.remote_mtime
+
+    def get_verified_paths(self) -> list[str]:
+        """Paths of all recorded members that are still complete on disk, sorted."""
+        return sorted(
+            path
+            for path in (
+                os.path.join(self.directory, filename) for filename in self.entries
+            )
+            if self.is_verified(path)
+        )
+
+    def _save(self) -> None:
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(
+                {
+                    "members": {
+                        filename: asdict(entry)
+                        for filename, entry in sorted(self.entries.items())
+                    }
+                },
+                f,
+                indent=2,
+            )
+        os.replace(temp_path, self.path)
+
+
+def _compute_checksum(path: str) -> str:
+    """Fast (non-cryptographic) CRC32 checksum of a file."""
+    checksum = 0
+    with open(path, "rb") as f:
+        while block := f.read(_CHECKSUM_BLOCK_SIZE):
+            checksum = zlib.crc32(block, checksum)
+    return f"crc32:{checksum:08x}"
@@ -9,9 +9,12 @@ import numpy as np
 import xarray as xr
 from PIL import Image
 from pipelines.infra.data_types.admin_area_types import AdminAreasSet
-from pipelines.infra.data_types.loaded_data_types import RasterData
+from pipelines.infra.data_types.loaded_data_types import RasterData, SparseRasterData
 from pipelines.infra.data_types.location_point import LocationPoint
 from pipelines.infra.utils.nrw_logger import log_info, LogTag
+from rasterio.transform import Affine
+from rasterio.warp import transform_bounds
+from rasterio.windows import from_bounds as window_from_bounds
 
 logger = logging.getLogger(__name__)
 
@@ -26,59 +29,128 @@ def get_bounding_box(
     point_locations: dict[str, LocationPoint] | None = None,
 ) -> BoundingBox:
     """Compute (min_lon, min_lat, max_lon, max_lat) from admin area geometries and optionally point locations."""
-    from shapely.geometry import MultiPoint
-    from shapely.ops import unary_union
-
-    geoms = [a.to_geometry() for a in admin_areas.admin_areas.values()]
-
+    all_bounds = []
+    admin_area_bounds = admin_areas.get_bounds()
+    if admin_area_bounds is not None:
+        all_bounds.append(admin_area_bounds)
     if point_locations:
-        geoms.append(
-            MultiPoint([(float(p.lon), float(p.lat)) for p in point_locations.values()])
-        )
+        lons = np.array([float(p.lon) for p in point_locations.values()])
+        lats = np.array([float(p.lat) for p in point_locations.values()])
+        all_bounds.append((lons.min(), lats.min(), lons.max(), lats.max()))
+
+    if not all_bounds:
+        return (np.nan, np.nan, np.nan, np.nan)
+    return (
+        float(min(bounds[0] for bounds in all_bounds)),
+        float(min(bounds[1] for bounds in all_bounds)),
+        float(max(bounds[2] for bounds in all_bounds)),
+        float(max(bounds[3] for bounds in all_bounds)),
+    )
 
-    return unary_union(geoms).bounds
 
+def get_place_codes_bounding_box(
+    admin_areas: AdminAreasSet, place_codes: list[str]
+) -> BoundingBox | None:
+    """Bounding box of the admin areas with the given place codes, or None if there are none."""
+    return admin_areas.get_bounds(place_codes)
 
-def slice_netcdf_to_bounds(
-    input_path: str,
+
+def get_bounds_window(
+    transform: Affine,
+    shape: tuple[int, ...],
     bounds: BoundingBox,
-    output_path: str | None = None,
-) -> str:
-    """Slice a global NetCDF file to the given bounding box.
+    padding: int = 0,
+) -> tuple[int, int, int, int]:
+    """
+    Pixel window (row_start, row_end, col_start, col_end) of a grid covering the
+    bounds, widened by padding pixels and limited to the grid.
+    """
+    window = window_from_bounds(*bounds, transform=transform)
+    row_start = max(int(np.floor(window.row_off)) - padding, 0)
+    col_start = max(int(np.floor(window.col_off)) - padding, 0)
+    row_end = min(int(np.ceil(window.row_off + window.height)) + padding, shape[0])
+    col_end = min(int(np.ceil(window.col_off + window.width)) + padding, shape[1])
+    return row_start, max(row_end, row_start), col_start, max(col_end, col_start)
+
+
+def get_raster_bounds(
+    raster: RasterData | SparseRasterData, crs: str | None = None
+) -> BoundingBox:
+    """
+    Bounds of a raster, in its own CRS or transformed to another CRS. Transformed
+    bounds cover the densified edges of the raster, not only its corners.
+    """
+    extent = get_raster_extent(raster)
+    bounds = (extent["xmin"], extent["ymin"], extent["xmax"], extent["ymax"])
+    if crs is None or crs == raster.crs:
+        return bounds
+    return transform_bounds(raster.crs, crs, *bounds)
 
-    Returns the path to the sliced file. If output_path is None, a temporary
-    file is created in the same directory as the input file.
+
+def crop_raster_to_bounds(
+    raster: RasterData, bounds: BoundingBox, padding: int = 1
+) -> RasterData:
+    """
+    Crop a raster to the pixels covering the bounds (in the raster CRS), plus padding
+    pixels around them. The cropped array is a view: nothing is copied or decoded.
     """
-    min_lon, min_lat, max_lon, max_lat = bounds
+    row_start, row_end, col_start, col_end = get_bounds_window(
+        raster.transform, raster.array.shape, bounds, padding
+    )
+    return RasterData(
+        array=raster.array[row_start:row_end, col_start:col_end],
+        transform=raster.transform * Affine.translation(col_start, row_start),
+        crs=raster.crs,
+        nodata=raster.nodata,
+    )
 
-    with xr.open_dataset(input_path) as nc_file:
-        sliced = nc_file.sel(
-            lon=slice(min_lon, max_lon),
-            lat=slice(max_lat, min_lat),
-        )
 
-        try:
-            if output_path is None:
-                directory = os.path.dirname(input_path)
-                basename = os.path.splitext(os.path.basename(input_path))[0]
-                output_path = os.path.join(directory, f"{basename}_sliced.nc")
+def crop_sparse_raster_to_bounds(
+    raster: SparseRasterData, bounds: BoundingBox, padding: int = 1
+) -> SparseRasterData:
+    """As crop_raster_to_bounds, for a sparse raster."""
+    return raster.crop_to_window(
+        *get_bounds_window(raster.transform, raster.shape, bounds, padding)
+    )
+
 
-            sliced.to_netcdf(output_path)
-        finally:
-            sliced.close()
+def slice_netcdf_to_multiple_bounds(
+    input_path: str,
+    bounds_by_output_path: dict[str, BoundingBox],
+) -> list[str]:
+    """Slice a global NetCDF file to several bounding boxes in a single pass.
+
+    The input file is opened and decoded once, and one sliced file is written per
+    output path. Each file is written under a temporary name and renamed when
+    complete, so an interrupted run never leaves a truncated slice behind. Returns
+    the written output paths.
+    """
+    with xr.open_dataset(input_path) as nc_file:
+        for output_path, bounds in bounds_by_output_path.items():
+            min_lon, min_lat, max_lon, max_lat = bounds
+            sliced = nc_file.sel(
+                lon=slice(min_lon, max_lon),
+                lat=slice(max_lat, min_lat),
+            )
+            temp_path = f"{output_path}.tmp"
+            try:
+                sliced.to_netcdf(temp_path)
+            finally:
+                sliced.close()
+            os.replace(temp_path, output_path)
 
     log_info(
         logger,
         LogTag.INFRA,
-        f"Sliced NetCDF {input_path} to bounds {bounds} -> {output_path}",
+        f"Sliced NetCDF {input_path} to {len(bounds_by_output_path)} bounding boxes",
     )
-    return output_path
+    return list(bounds_by_output_path)
 
 
-def get_raster_extent(raster: RasterData) -> dict[str, float]:
+def get_raster_extent(raster: RasterData | SparseRasterData) -> dict[str, float]:
     """Return raster bounds as an extent dict expected by the API layer."""
     t = raster.transform
-    rows, cols = raster.array.shape
+    rows, cols = raster.grid.shape
     corners = [
         t * (0, 0),
         t * (cols, 0),
@@ -95,18 +167,41 @@ def get_raster_extent(raster: RasterData) -> dict[str, float]:
     }
 
 
-def raster_to_base64_png(raster: RasterData) -> str:
-    array = raster.array.copy()
-    array = np.where(np.isnan(array), 0, array)
-    array = np.clip(array, 0, None)
-
-    max_val = array.max()
-    if max_val > 0:
-        normalized = (array / max_val * 255).astype(np.uint8)
+def raster_to_base64_png(raster: RasterData | SparseRasterData) -> str:
+    if isinstance(raster, SparseRasterData):
+        normalized = _sparse_to_greyscale(raster)
     else:
-        normalized = array.astype(np.uint8)
+        array = _clip_to_positive(raster.array)
+        normalized = _scale_to_greyscale(array, array.max())
 
     img = Image.fromarray(normalized, mode="L")
     buffer = io.BytesIO()
     img.save(buffer, format="PNG")
     return base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def _sparse_to_greyscale(raster: SparseRasterData) -> np.ndarray:
+    # Only the stored values and the fill value are scaled, then the image is filled
+    values = _clip_to_positive(raster.values)
+    fill = _clip_to_positive(np.array([raster.fill_value], dtype=values.dtype))
+    if values.size < raster.shape[0] * raster.shape[1]:
+        max_val = np.concatenate([values, fill]).max()
+    else:
+        max_val = values.max()
+
+    normalized = np.full(
+        raster.shape, _scale_to_greyscale(fill, max_val)[0], dtype=np.uint8
+    )
+    normalized.reshape(-1)[raster.indexes] = _scale_to_greyscale(values, max_val)
+    return normalized
+
+
+def _clip_to_positive(array: np.ndarray) -> np.ndarray:
+    array = np.where(np.isnan(array), 0, array)
+    return np.clip(array, 0, None)
+
+
+def _scale_to_greyscale(array: np.ndarray, max_val: float) -> np.ndarray:
+    if max_val > 0:
+        return (array / max_val * 255).astype(np.uint8)
+    return array.astype(np.uint8)
@@ -2,8 +2,16 @@
 Helper files for working with directories for both blob storage and local file systems
 """
 
+import fcntl
+import filecmp
+import logging
 import os
 import shutil
+import threading
+
+from pipelines.infra.utils.nrw_logger import log_error, LogTag
+
+logger = logging.getLogger(__name__)
 
 # Raw data directly from GloFAS
 GLOFAS_RAW_DATA_DIR = "glofas/raw"
@@ -17,8 +25,28 @@ GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR = "glofas/country_split_alert"
 # Country-sliced mock GloFAS data
 GLOFAS_MOCK_DATA_DIR = "glofas/country_mock_data"
 
+# Decoded flood extent rasters from the seed repo
+FLOOD_EXTENT_CACHE_DIR = "flood_extents"
+
+# Admin areas rasterized to label rasters on the population grid
+ADMIN_AREA_LABELS_CACHE_DIR = "admin_area_labels"
+
+# Decoded population rasters from the IBF API
+POPULATION_CACHE_DIR = "population"
+
 GLOFAS_FILE_SUFFIX = ".nc"
 
+# Suffix for GloFAS files that are still being downloaded
+GLOFAS_PARTIAL_FILE_SUFFIX = ".part"
+
+# Suffix for the remote size and modification time a partial GloFAS file was started
+# from, checked before the download is resumed
+GLOFAS_PARTIAL_INFO_SUFFIX = ".part.json"
+
+# Consolidated per-country GloFAS ensemble cube (raw array + JSON sidecar)
+GLOFAS_CUBE_FILE_SUFFIX = ".npy"
+GLOFAS_CUBE_SIDECAR_SUFFIX = ".json"
+
 
 def get_glofas_country_split_path(country: str, netcdf_path: str) -> str:
     """
@@ -36,6 +64,17 @@ def get_glofas_country_split_path(country: str, netcdf_path: str) -> str:
     return os.path.join(output_dir, f"{basename}_sliced_{country}{GLOFAS_FILE_SUFFIX}")
 
 
+def get_glofas_discharge_cube_path(country: str, country_sliced_path: str) -> str:
+    """
+    Get path for the consolidated ensemble cube of a country, next to its country-split
+    GloFAS NetCDF files. The JSON sidecar uses the same path with GLOFAS_CUBE_SIDECAR_SUFFIX.
+    """
+    return os.path.join(
+        os.path.dirname(country_sliced_path),
+        f"dis_cube_{country}{GLOFAS_CUBE_FILE_SUFFIX}",
+    )
+
+
 def get_glofas_country_split_alert_path(netcdf_path: str) -> str:
     """
     Get resolved output path for storing alert-triggering country-split GloFAS data.
@@ -76,6 +115,45 @@ def get_glofas_mock_data_dir(country: str) -> str:
     return output_dir
 
 
+def get_flood_extent_cache_dir(country: str) -> str | None:
+    """
+    Get resolved path to the FLOOD_EXTENT_CACHE_DIR for a country.
+    Returns None when DATA_CACHE_DIR is not set, which disables the cache.
+    """
+    cache_base = os.environ.get("DATA_CACHE_DIR")
+    if not cache_base:
+        return None
+    output_dir = os.path.join(cache_base, FLOOD_EXTENT_CACHE_DIR, country)
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+def get_admin_area_labels_cache_dir(country: str) -> str | None:
+    """
+    Get resolved path to the ADMIN_AREA_LABELS_CACHE_DIR for a country.
+    Returns None when DATA_CACHE_DIR is not set, which disables the cache.
+    """
+    cache_base = os.environ.get("DATA_CACHE_DIR")
+    if not cache_base:
+        return None
+    output_dir = os.path.join(cache_base, ADMIN_AREA_LABELS_CACHE_DIR, country)
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
+def get_population_cache_dir(country: str) -> str | None:
+    """
+    Get resolved path to the POPULATION_CACHE_DIR for a country.
+    Returns None when DATA_CACHE_DIR is not set, which disables the cache.
+    """
+    cache_base = os.environ.get("DATA_CACHE_DIR")
+    if not cache_base:
+        return None
+    output_dir = os.path.join(cache_base, POPULATION_CACHE_DIR, country)
+    os.makedirs(output_dir, exist_ok=True)
+    return output_dir
+
+
 def get_cached_glofas_files(forecast_date: str) -> list[str] | None:
     """
     Return cached GloFAS NetCDF files for the given forecast_date if they exist.
@@ -157,11 +235,80 @@ def get_cached_glofas_country_split_files(
     return files
 
 
-def archive_alert_glofas_files(country_sliced_netcdf_paths: list[str]) -> None:
+def archive_alert_glofas_files(
+    country_sliced_netcdf_paths: list[str],
+) -> threading.Thread | None:
     """
     Archive country-sliced GloFAS NetCDF files to alert storage with longer retention.
-    """
 
+    Files already archived with the same content are skipped. Others are hardlinked,
+    which costs no disk writes: the country-split files are only ever replaced, never
+    written in place, so the archived link keeps its content. Files that cannot be
+    linked (e.g. storage on another filesystem) are copied in a background thread,
+    which is returned so callers can join it before their run ends. Where the
+    filesystem supports it (e.g. Btrfs or XFS), the copy is a copy-on-write clone. A
+    failing copy is logged and leaves no partial file behind.
+    """
+    pending_copies: list[tuple[str, str]] = []
     for country_sliced_path in country_sliced_netcdf_paths:
         alert_path = get_glofas_country_split_alert_path(country_sliced_path)
-        shutil.copy2(country_sliced_path, alert_path)
+        if _is_archived(country_sliced_path, alert_path):
+            continue
+        try:
+            _replace_with_hardlink(country_sliced_path, alert_path)
+        except OSError:
+            pending_copies.append((country_sliced_path, alert_path))
+
+    if not pending_copies:
+        return None
+    copy_thread = threading.Thread(
+        target=_copy_files, args=(pending_copies,), name="glofas-alert-archive"
+    )
+    copy_thread.start()
+    return copy_thread
+
+
+def _is_archived(source_path: str, alert_path: str) -> bool:
+    if not os.path.exists(alert_path):
+        return False
+    if os.path.samefile(source_path, alert_path):
+        return True
+    return filecmp.cmp(source_path, alert_path, shallow=False)
+
+
+def _replace_with_hardlink(source_path: str, target_path: str) -> None:
+    temp_path = f"{target_path}.tmp"
+    if os.path.lexists(temp_path):
+        os.remove(temp_path)
+    os.link(source_path, temp_path)
+    os.replace(temp_path, target_path)
+
+
+# FICLONE from linux/fs.h
+_FICLONE = 0x40049409
+
+
+def _clone_file(source_path: str, target_path: str) -> None:
+    """Reflink a file, which shares its blocks until either file is written."""
+    with open(source_path, "rb") as source, open(target_path, "wb") as target:
+        fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+    shutil.copystat(source_path, target_path)
+
+
+def _copy_files(source_and_target_paths: list[tuple[str, str]]) -> None:
+    for source_path, target_path in source_and_target_paths:
+        temp_path = f"{target_path}.tmp"
+        try:
+            try:
+                _clone_file(source_path, temp_path)
+            except OSError:
+                shutil.copy2(source_path, temp_path)
+            os.replace(temp_path, target_path)
+        except OSError as exc:
+            log_error(
+                logger,
+                LogTag.INFRA,
+                f"Archiving {source_path} to {target_path} failed: {exc}",
+            )
+            if os.path.lexists(temp_path):
+                os.remove(temp_path)
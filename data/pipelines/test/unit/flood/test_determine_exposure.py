@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+from unittest.mock import patch
+
 import numpy as np
+import shapely
 from pipelines.constants import DEFAULT_CRS, POPULATION_NODATA_VALUE
 from pipelines.flood.determine_exposure import (
     clip_flood_extent_to_admin_areas,
@@ -15,8 +18,10 @@ from pipelines.infra.data_types.loaded_data_types import RasterData
 from pipelines.infra.data_types.location_point import LocationPoint
 from pipelines.infra.utils.exposure import (
     aggregate_population_exposed,
+    ClipCache,
     compute_population_exposed,
 )
+from rasterio.features import geometry_mask
 from rasterio.transform import from_origin
 
 
@@ -212,3 +217,107 @@ def test_determine_spatial_extent_returns_early_when_place_codes_empty():
 
     assert valid_codes == []
     assert clipped is None
+
+
+def _build_two_admin_areas() -> AdminAreasSet:
+    admin_areas = _build_partial_admin_areas()
+    admin_areas.admin_areas["PC002"] = AdminArea(
+        properties=AdminAreaProperties(
+            pcode="PC002",
+            name="Neighbour Test Area",
+            admin_level=1,
+            country_code="PC",
+        ),
+        geometry_type="Polygon",
+        coordinates=[
+            [[1.0, 1.0], [1.0, 2.0], [2.0, 2.0], [2.0, 1.0], [1.0, 1.0]],
+        ],
+    )
+    return admin_areas
+
+
+def test_clip_cache_reuses_mask_for_same_place_code_set():
+    admin_areas = _build_two_admin_areas()
+    flood_extent = RasterData(
+        array=np.arange(16, dtype=np.float32).reshape(4, 4),
+        transform=from_origin(0, 2, 0.5, 0.5),
+        crs=DEFAULT_CRS,
+        nodata=0,
+    )
+    other_return_period = RasterData(
+        array=flood_extent.array * 2,
+        transform=flood_extent.transform,
+        crs=DEFAULT_CRS,
+        nodata=0,
+    )
+    clip_cache = ClipCache()
+
+    with patch(
+        "pipelines.infra.utils.exposure.geometry_mask", wraps=geometry_mask
+    ) as mock_mask, patch.object(
+        admin_areas, "get_bounds", wraps=admin_areas.get_bounds
+    ) as mock_bounds:
+        first = clip_flood_extent_to_admin_areas(
+            ["PC001", "PC002"], admin_areas, flood_extent, "G1", clip_cache
+        )
+        second = clip_flood_extent_to_admin_areas(
+            ["PC002", "PC001"], admin_areas, other_return_period, "G2", clip_cache
+        )
+
+    assert mock_mask.call_count == 1
+    assert mock_bounds.call_count == 1
+    uncached = clip_flood_extent_to_admin_areas(
+        ["PC001", "PC002"], admin_areas, flood_extent, "G1"
+    )
+    np.testing.assert_array_equal(first.array, uncached.array)
+    np.testing.assert_array_equal(second.array, uncached.array * 2)
+    assert first.transform == uncached.transform
+
+
+def test_clip_cache_rasterizes_again_for_another_grid():
+    admin_areas = _build_two_admin_areas()
+    clip_cache = ClipCache()
+
+    with patch(
+        "pipelines.infra.utils.exposure.geometry_mask", wraps=geometry_mask
+    ) as mock_mask:
+        for resolution in (0.5, 0.25):
+            size = int(2 / resolution)
+            clip_flood_extent_to_admin_areas(
+                ["PC001", "PC002"],
+                admin_areas,
+                RasterData(
+                    array=np.ones((size, size), dtype=np.float32),
+                    transform=from_origin(0, 2, resolution, resolution),
+                    crs=DEFAULT_CRS,
+                    nodata=0,
+                ),
+                "G1",
+                clip_cache,
+            )
+
+    assert mock_mask.call_count == 2
+    assert len(clip_cache.union_bounds) == 1
+
+
+def test_clip_cache_union_bounds_match_union_of_geometries():
+    admin_areas = _build_two_admin_areas()
+    clip_cache = ClipCache()
+
+    clip_flood_extent_to_admin_areas(
+        ["PC002", "PC001"],
+        admin_areas,
+        RasterData(
+            array=np.ones((4, 4), dtype=np.float32),
+            transform=from_origin(0, 2, 0.5, 0.5),
+            crs=DEFAULT_CRS,
+            nodata=0,
+        ),
+        "G1",
+        clip_cache,
+    )
+
+    expected = shapely.union_all(
+        [admin_areas.admin_areas[pcode].to_geometry() for pcode in ("PC001", "PC002")]
+    ).bounds
+    assert clip_cache.union_bounds == {("PC001", "PC002"): expected}
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+from pipelines.flood.determine_alerts import (
+    build_station_threshold_tables,
+    determine_temporal_extent,
+    ReturnPeriodThresholds,
+    screen_alerting_stations,
+)
+from pipelines.flood.extract_forecast import TimeIntervalDischarge
+
+THRESHOLDS: list[ReturnPeriodThresholds] = [
+    {
+        "station_code": "G0001",
+        # Deliberately not sorted by return period or value
+        "thresholds": [
+            {"return_period": 5.0, "threshold_value": 200.0},
+            {"return_period": 1.5, "threshold_value": 100.0},
+            {"return_period": 10.0, "threshold_value": 300.0},
+        ],
+    },
+    {
+        "station_code": "G0002",
+        "thresholds": [{"return_period": 5.0, "threshold_value": 200.0}],
+    },
+]
+
+
+def _interval(day: int, discharges: list[float]) -> TimeIntervalDischarge:
+    return TimeIntervalDischarge(
+        time_interval_start=f"2026-03-{day:02d}",
+        time_interval_end=f"2026-03-{day:02d}",
+        ensemble_discharges=discharges,
+    )
+
+
+# ---------------------------------------------------------------------------
+# StationThresholdTable.classify
+# ---------------------------------------------------------------------------
+
+
+def test_classify_returns_highest_exceeded_return_period() -> None:
+    table = build_station_threshold_tables(THRESHOLDS)["G0001"]
+
+    result = table.classify(np.array([50.0, 100.0, 100.1, 250.0, 300.0, 1e6]))
+
+    # Thresholds must be exceeded, not only reached
+    np.testing.assert_array_equal(result, [0.0, 0.0, 1.5, 5.0, 5.0, 10.0])
+
+
+def test_classify_nan_discharge_exceeds_nothing() -> None:
+    table = build_station_threshold_tables(THRESHOLDS)["G0001"]
+
+    assert table.classify(np.array([np.nan])).tolist() == [0.0]
+
+
+def test_classify_equal_threshold_values_prefer_first_listed() -> None:
+    table = build_station_threshold_tables(
+        [
+            {
+                "station_code": "G0001",
+                "thresholds": [
+                    {"return_period": 2.0, "threshold_value": 100.0},
+                    {"return_period": 5.0, "threshold_value": 100.0},
+                ],
+            }
+        ]
+    )["G0001"]
+
+    assert table.classify(np.array([150.0])).tolist() == [2.0]
+
+
+def test_classify_keeps_exact_return_periods() -> None:
+    # Return periods that their (rounded) label does not represent exactly
+    table = build_station_threshold_tables(
+        [
+            {
+                "station_code": "G0001",
+                "thresholds": [
+                    {"return_period": 1.5, "threshold_value": 100.0},
+                    {"return_period": 100 / 3, "threshold_value": 200.0},
+                    {"return_period": 1234567.0, "threshold_value": 300.0},
+                ],
+            }
+        ]
+    )["G0001"]
+
+    result = table.classify(np.array([150.0, 250.0, 350.0]))
+
+    assert result.tolist() == [1.5, 100 / 3, 1234567.0]
+
+
+def test_first_entry_of_a_station_wins() -> None:
+    tables = build_station_threshold_tables(
+        [
+            THRESHOLDS[1],
+            {
+                "station_code": "G0002",
+                "thresholds": [{"return_period": 5.0, "threshold_value": 1.0}],
+            },
+        ]
+    )
+
+    assert tables["G0002"].threshold_values.tolist() == [200.0]
+
+
+# ---------------------------------------------------------------------------
+# determine_temporal_extent
+# ---------------------------------------------------------------------------
+
+
+def test_severities_for_intervals_with_median_above_a_threshold() -> None:
+    discharges = [
+        _interval(1, [50.0, 60.0, 70.0]),
+        _interval(2, [90.0, 150.0, 250.0]),
+        _interval(3, [350.0, math.nan, 210.0]),
+    ]
+
+    severities = determine_temporal_extent(
+        "G0001", discharges, build_station_threshold_tables(THRESHOLDS)
+    )
+
+    assert [s.time_interval_start for s in severities] == [
+        "2026-03-02",
+        "2026-03-03",
+    ]
+    assert severities[0].median_return_period == 1.5
+    assert severities[0].ensemble_return_periods == [0.0, 1.5, 5.0]
+    # The median ignores missing members, which are classified as 0
+    assert severities[1].median_return_period == 5.0
+    assert severities[1].ensemble_return_periods == [10.0, 0.0, 5.0]
+
+
+def test_accepts_threshold_list_and_differing_member_counts() -> None:
+    discharges = [
+        _interval(1, [150.0, 150.0]),
+        _interval(2, [250.0, 250.0, 250.0]),
+        _interval(3, [math.nan, math.nan]),
+        _interval(4, []),
+    ]
+
+    severities = determine_temporal_extent("G0001", discharges, THRESHOLDS)
+
+    assert [s.ensemble_return_periods for s in severities] == [
+        [1.5, 1.5],
+        [5.0, 5.0, 5.0],
+    ]
+
+
+def test_station_without_minimum_return_period_is_skipped() -> None:
+    severities = determine_temporal_extent("G0002", [_interval(1, [500.0])], THRESHOLDS)
+
+    assert severities == []
+
+
+def test_station_without_thresholds_is_skipped() -> None:
+    severities = determine_temporal_extent("G9999", [_interval(1, [500.0])], THRESHOLDS)
+
+    assert severities == []
+
+
+# ---------------------------------------------------------------------------
+# screen_alerting_stations
+# ---------------------------------------------------------------------------
+
+
+def test_screening_matches_determine_temporal_extent() -> None:
+    thresholds: list[ReturnPeriodThresholds] = [
+        *THRESHOLDS,
+        {
+            "station_code": "G0003",
+            "thresholds": [
+                {"return_period": 1.5, "threshold_value": 10.0},
+                {"return_period": 2.0, "threshold_value": 20.0},
+            ],
+        },
+    ]
+    tables = build_station_threshold_tables(thresholds)
+    station_discharges = {
+        # Median above 1.5yr on the second interval only
+        "G0001": [_interval(1, [50.0, 60.0]), _interval(2, [90.0, 150.0, 250.0])],
+        # Missing minimum return period
+        "G0002": [_interval(1, [500.0])],
+        # All members missing, or below the lowest threshold
+        "G0003": [_interval(1, [math.nan, math.nan]), _interval(2, [5.0, 50.0, 8.0])],
+        # Not an alert config station
+        "G0004": [_interval(1, [1e6])],
+    }
+    station_codes = ["G0001", "G0002", "G0003", "G9999"]
+
+    alerting = screen_alerting_stations(station_codes, station_discharges, tables)
+
+    assert alerting == {"G0001"}
+    for station_code in station_codes:
+        severities = determine_temporal_extent(
+            station_code, station_discharges.get(station_code, []), tables
+        )
+        assert bool(severities) == (station_code in alerting)
+
+
+def test_screening_without_valid_stations_is_empty() -> None:
+    tables = build_station_threshold_tables(THRESHOLDS)
+
+    assert screen_alerting_stations(["G0002"], {"G0002": []}, tables) == set()
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+import rasterio
+import xarray as xr
+from pipelines.flood.extract_forecast import extract_discharge_glofas_stations
+from pipelines.infra.data_types.location_point import LocationPoint
+
+FORECAST_DATE = "20260326"
+
+
+def _write_sliced_files(
+    directory: Path, count: int, chunksizes: tuple[int, int, int] | None = None
+) -> list[str]:
+    """Write small sliced files with a distinct value per member, lead time and pixel."""
+    lat = np.arange(5.0, -5.5, -0.5)
+    lon = np.arange(33.0, 42.5, 0.5)
+    paths: list[str] = []
+    for ensemble_index in range(count):
+        dis = (
+            np.arange(8 * lat.size * lon.size, dtype="float32").reshape(
+                8, lat.size, lon.size
+            )
+            / 7
+            + 1000 * ensemble_index
+        )
+        dataset = xr.Dataset(
+            {"dis": (("time", "lat", "lon"), dis)},
+            coords={"time": np.arange(8), "lat": lat, "lon": lon},
+        )
+        path = directory / f"dis_{ensemble_index:02d}_{FORECAST_DATE}00_sliced_KEN.nc"
+        encoding = {"dis": {"chunksizes": chunksizes}} if chunksizes else None
+        dataset.to_netcdf(path, encoding=encoding)
+        paths.append(str(path))
+    return paths
+
+
+STATIONS = {
+    "G0001": LocationPoint(id="G0001", name="A", lat=1.3, lon=36.8),
+    "G0002": LocationPoint(id="G0002", name="B", lat=-4.9, lon=33.1),
+    "G0003": LocationPoint(id="G0003", name="C", lat=4.2, lon=41.9),
+}
+
+
+def test_extracts_same_values_as_sampling_each_station(tmp_path: Path) -> None:
+    paths = _write_sliced_files(tmp_path, count=3)
+    temporal_extent = {"lead-time-spectrum": ["2-day", "3-day", "4-day"]}
+
+    discharges = extract_discharge_glofas_stations(STATIONS, paths, temporal_extent)
+
+    assert set(discharges) == set(STATIONS)
+    for station_code, station in STATIONS.items():
+        intervals = discharges[station_code]
+        assert [interval.time_interval_start for interval in intervals] == [
+            "2026-03-28T00:00:00Z",
+            "2026-03-29T00:00:00Z",
+            "2026-03-30T00:00:00Z",
+        ]
+        for lead_time, interval in zip(range(2, 5), intervals):
+            expected = []
+            for path in paths:
+                with rasterio.open(path) as src:
+                    sampled = list(
+                        src.sample([(station.lon, station.lat)], indexes=lead_time + 1)
+                    )
+                expected.append(float(sampled[0][0]))
+            assert interval.ensemble_discharges == expected
+
+
+def test_stations_outside_grid_get_nan(tmp_path: Path) -> None:
+    paths = _write_sliced_files(tmp_path, count=2)
+    stations = {
+        **STATIONS,
+        "G0009": LocationPoint(id="G0009", name="Far", lat=20.0, lon=10.0),
+    }
+
+    discharges = extract_discharge_glofas_stations(
+        stations, paths, {"lead-time-spectrum": ["0-day"]}
+    )
+
+    assert all(math.isnan(v) for v in discharges["G0009"][0].ensemble_discharges)
+    assert not any(math.isnan(v) for v in discharges["G0001"][0].ensemble_discharges)
+
+
+def test_returns_empty_series_when_no_files_exist(tmp_path: Path) -> None:
+    missing = [str(tmp_path / f"dis_00_{FORECAST_DATE}00_sliced_KEN.nc")]
+
+    discharges = extract_discharge_glofas_stations(
+        STATIONS, missing, {"lead-time-spectrum": ["0-day"]}
+    )
+
+    assert discharges == {station_code: [] for station_code in STATIONS}
+
+
+@pytest.mark.parametrize("chunksizes", [None, (8, 4, 4)], ids=["contiguous", "chunked"])
+def test_station_pixels_only_reads_same_values_from_global_files(
+    tmp_path: Path, chunksizes: tuple[int, int, int] | None
+) -> None:
+    # Global files have no '_sliced' suffix
+    paths = []
+    for path in _write_sliced_files(tmp_path, count=3, chunksizes=chunksizes):
+        global_path = path.replace("_sliced_KEN", "")
+        Path(path).rename(global_path)
+        paths.append(global_path)
+    stations = {
+        **STATIONS,
+        # Shares a pixel with G0001
+        "G0004": LocationPoint(id="G0004", name="D", lat=1.35, lon=36.9),
+        "G0009": LocationPoint(id="G0009", name="Far", lat=20.0, lon=10.0),
+    }
+    temporal_extent = {"lead-time-spectrum": ["1-day", "2-day", "3-day"]}
+
+    expected = extract_discharge_glofas_stations(stations, paths, temporal_extent)
+    discharges = extract_discharge_glofas_stations(
+        stations, paths, temporal_extent, station_pixels_only=True
+    )
+
+    assert discharges["G0009"][0].time_interval_start == "2026-03-27T00:00:00Z"
+    assert all(math.isnan(v) for v in discharges["G0009"][0].ensemble_discharges)
+    del discharges["G0009"], expected["G0009"]
+    assert discharges == expected
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import xarray as xr
+from pipelines.flood.extract_forecast import extract_discharge_glofas_stations
+from pipelines.infra.data_types.glofas_discharge_cube import load_glofas_discharge_cube
+from pipelines.infra.data_types.location_point import LocationPoint
+from pipelines.infra.utils.storage_helpers import GLOFAS_COUNTRY_SPLIT_DATA_DIR
+
+FORECAST_DATE = "20260326"
+TEMPORAL_EXTENT = {"lead-time-spectrum": [f"{day}-day" for day in range(4)]}
+
+
+def _write_country_split_files(cache_base: Path, count: int) -> list[str]:
+    """Write small country-split files with a distinct value per member, lead time and pixel."""
+    split_dir = cache_base / GLOFAS_COUNTRY_SPLIT_DATA_DIR / FORECAST_DATE
+    split_dir.mkdir(parents=True, exist_ok=True)
+    lat = np.arange(5.0, -5.5, -0.5)
+    lon = np.arange(33.0, 42.5, 0.5)
+    paths: list[str] = []
+    for ensemble_index in range(count):
+        dis = (
+            np.arange(4 * lat.size * lon.size, dtype="float32").reshape(
+                4, lat.size, lon.size
+            )
+            + 1000 * ensemble_index
+        )
+        dataset = xr.Dataset(
+            {"dis": (("time", "lat", "lon"), dis)},
+            coords={"time": np.arange(4), "lat": lat, "lon": lon},
+        )
+        path = split_dir / f"dis_{ensemble_index:02d}_{FORECAST_DATE}00_sliced_KEN.nc"
+        dataset.to_netcdf(path)
+        paths.append(str(path))
+    return paths
+
+
+def _station(lat: float, lon: float) -> LocationPoint:
+    return LocationPoint(id="G0001", name="Station", lat=lat, lon=lon)
+
+
+def test_cube_extraction_matches_per_file_extraction(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_country_split_files(tmp_path, count=3)
+    cube = load_glofas_discharge_cube("KEN", paths)
+    station = _station(lat=1.3, lon=36.8)
+
+    from_files = extract_discharge_glofas_stations(
+        {"G0001": station}, paths, TEMPORAL_EXTENT
+    )
+    from_cube = extract_discharge_glofas_stations(
+        {"G0001": station}, paths, TEMPORAL_EXTENT, discharge_cube=cube
+    )
+
+    assert from_cube == from_files
+    assert cube.discharge.shape == (3, 4, 21, 19)
+
+
+def test_cube_is_reused_when_up_to_date(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_country_split_files(tmp_path, count=2)
+    load_glofas_discharge_cube("KEN", paths)
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_cube._write_cube"
+    ) as mock_write:
+        cube = load_glofas_discharge_cube("KEN", paths)
+
+    mock_write.assert_not_called()
+    assert cube.member_paths == paths
+
+
+def test_cube_is_rebuilt_when_members_change(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_country_split_files(tmp_path, count=3)
+    load_glofas_discharge_cube("KEN", paths[:2])
+
+    cube = load_glofas_discharge_cube("KEN", paths)
+
+    assert cube.discharge.shape[0] == 3
+    assert not [name for name in os.listdir(Path(paths[0]).parent) if "tmp" in name]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import json
 from unittest.mock import patch
 
 import numpy as np
@@ -13,8 +14,10 @@ from pipelines.infra.data_types.loaded_data_types import (
     DataType,
     LoadedDataSource,
     RasterData,
+    SparseRasterData,
 )
 from pipelines.infra.utils.data_provider_fetchers import _load_seed_repo_flood_extents
+from rasterio.transform import Affine
 from shared.country_data import CountryCodeIso3
 
 # Fake URLs; actual HTTP calls are mocked via patch() so these are never fetched
@@ -101,14 +104,16 @@ class TestLoadSeedRepoFloodExtents:
         config = _make_config()
         container = _make_container()
 
-        with patch(
-            "pipelines.infra.utils.data_provider_fetchers.download_json_source",
-            return_value=None,
-        ):
-            with pytest.raises(
+        with (
+            patch(
+                "pipelines.infra.utils.data_provider_fetchers.download_json_source",
+                return_value=None,
+            ),
+            pytest.raises(
                 FileNotFoundError, match="Failed to download flood extents manifest"
-            ):
-                _load_seed_repo_flood_extents(config, container)
+            ),
+        ):
+            _load_seed_repo_flood_extents(config, container)
 
         assert container.error is not None
 
@@ -170,11 +175,323 @@ class TestFloodExtentProviderGetRaster:
             country="KEN",
         )
 
+        with (
+            patch(
+                "pipelines.infra.data_types.flood_extent_provider.download_object",
+                return_value=None,
+            ),
+            pytest.raises(
+                FileNotFoundError, match="Failed to download flood extent PNG"
+            ),
+        ):
+            provider.get_raster(10)
+
+
+class TestFloodExtentProviderDiskCache:
+    PNG_URL = f"{MOCK_FLOOD_EXTENT_BASE_URL}KEN_flood_extent_rp10.png"
+
+    @staticmethod
+    def _make_provider() -> FloodExtentProvider:
+        return FloodExtentProvider(
+            available_return_periods=[10],
+            base_url=MOCK_FLOOD_EXTENT_BASE_URL,
+            country="KEN",
+        )
+
+    @staticmethod
+    def _serve(responses: dict[str, tuple[bytes, str]], requests: list):
+        """Serve (content, etag) per URL, with HTTP 304 when the etag matches."""
+
+        def download(url: str, etag: str | None = None):
+            requests.append((url, etag))
+            if url not in responses:
+                return None
+            content, current_etag = responses[url]
+            if etag == current_etag:
+                return None, etag
+            return content, current_etag
+
+        return patch(
+            "pipelines.infra.data_types.flood_extent_provider.download_object_if_none_match",
+            side_effect=download,
+        )
+
+    def _responses(self, flood_values: np.ndarray, png_etag: str = '"png-1"'):
+        return {
+            self.PNG_URL: (_make_rgba_png_bytes(flood_values), png_etag),
+            f"{MOCK_FLOOD_EXTENT_BASE_URL}KEN_flood_extent_rp10_metadata.json": (
+                json.dumps(_make_metadata(2, 2)).encode(),
+                '"json-1"',
+            ),
+        }
+
+    def test_repeat_run_reuses_decoded_raster(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+        flood_values = np.array([[0.5, 1.2], [0.0, 3.0]])
+        responses = self._responses(flood_values)
+        requests: list = []
+
+        with self._serve(responses, requests):
+            first = self._make_provider().get_raster(10)
+            with patch(
+                "pipelines.infra.data_types.flood_extent_provider.rgba_png_to_float32_array"
+            ) as mock_decode:
+                second = self._make_provider().get_raster(10)
+
+        mock_decode.assert_not_called()
+        # The repeat run revalidates with the stored ETags
+        assert requests[2:] == [
+            (self.PNG_URL, '"png-1"'),
+            (requests[1][0], '"json-1"'),
+        ]
+        assert isinstance(second.array, np.memmap)
+        assert second.array.dtype == np.float32
+        np.testing.assert_allclose(second.array, flood_values, atol=0.01)
+        np.testing.assert_array_equal(second.array, first.array)
+        assert second.transform == first.transform
+        assert second.crs == DEFAULT_CRS
+        assert second.nodata == 0
+
+    def test_changed_png_is_decoded_again(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+        requests: list = []
+        with self._serve(self._responses(np.zeros((2, 2))), requests):
+            self._make_provider().get_raster(10)
+
+        changed_values = np.array([[2.0, 2.0], [2.0, 2.0]])
+        with self._serve(self._responses(changed_values, '"png-2"'), requests):
+            raster = self._make_provider().get_raster(10)
+
+        np.testing.assert_allclose(raster.array, changed_values, atol=0.01)
+        assert not list(tmp_path.rglob("*.tmp"))
+
+    def test_uses_cached_raster_when_revalidation_fails(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+        flood_values = np.array([[1.0, 1.0], [1.0, 1.0]])
+        requests: list = []
+        with self._serve(self._responses(flood_values), requests):
+            self._make_provider().get_raster(10)
+
+        with self._serve({}, requests):
+            raster = self._make_provider().get_raster(10)
+
+        np.testing.assert_allclose(raster.array, flood_values, atol=0.01)
+
+    def test_raises_without_cache_when_download_fails(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+
+        with (
+            self._serve({}, []),
+            pytest.raises(
+                FileNotFoundError, match="Failed to download flood extent PNG"
+            ),
+        ):
+            self._make_provider().get_raster(10)
+
+
+class TestFloodExtentProviderTiles:
+    # 4x4 raster in 2x2 tiles; the top-right tile has no flooding and is not stored
+    FLOOD_VALUES = np.array(
+        [
+            [1.0, 2.0, 0.0, 0.0],
+            [3.0, 4.0, 0.0, 0.0],
+            [5.0, 6.0, 7.0, 8.0],
+            [9.0, 1.5, 2.5, 3.5],
+        ]
+    )
+
+    def _tile_index(self) -> dict:
+        metadata = _make_metadata(4, 4)
+        return {
+            "tile_size": 2,
+            "width": 4,
+            "height": 4,
+            "transform": metadata["transform"],
+            "crs": metadata["crs"],
+            "nodata": metadata["nodata"],
+            "tile_filename": "KEN_flood_extent_rp10_tile_{row}_{col}.png",
+            "tiles": [[0, 0], [1, 0], [1, 1]],
+        }
+
+    def _tile_pngs(self) -> dict[str, bytes]:
+        return {
+            f"{MOCK_FLOOD_EXTENT_BASE_URL}KEN_flood_extent_rp10_tile_{row}_{col}.png": (
+                _make_rgba_png_bytes(
+                    self.FLOOD_VALUES[row * 2 : row * 2 + 2, col * 2 : col * 2 + 2]
+                )
+            )
+            for row, col in [(0, 0), (1, 0), (1, 1)]
+        }
+
+    def test_assembles_window_from_intersecting_tiles(self, monkeypatch):
+        monkeypatch.delenv("DATA_CACHE_DIR", raising=False)
+        provider = FloodExtentProvider(
+            available_return_periods=[10],
+            base_url=MOCK_FLOOD_EXTENT_BASE_URL,
+            country="KEN",
+            tiled=True,
+        )
+        tile_pngs = self._tile_pngs()
+        # Covers columns 2-3 of rows 0-1 (with a pixel around them)
+        bounds = (33.025, 11.985, 33.035, 11.995)
+
         with patch(
+            "pipelines.infra.data_types.flood_extent_provider.download_json_source",
+            return_value=self._tile_index(),
+        ), patch(
             "pipelines.infra.data_types.flood_extent_provider.download_object",
-            return_value=None,
+            side_effect=tile_pngs.get,
+        ) as mock_download:
+            raster = provider.get_raster(10, bounds)
+
+        # Rows 0-2, columns 1-3: the missing tile is filled with zeros
+        np.testing.assert_allclose(raster.array, self.FLOOD_VALUES[0:3, 1:4], atol=0.01)
+        assert raster.transform.c == pytest.approx(33.01)
+        assert raster.transform.f == pytest.approx(12.0)
+        assert [call.args[0][-7:] for call in mock_download.call_args_list] == [
+            "0_0.png",
+            "1_0.png",
+            "1_1.png",
+        ]
+
+    def test_decodes_only_tiles_intersecting_bounds(self, monkeypatch):
+        monkeypatch.delenv("DATA_CACHE_DIR", raising=False)
+        provider = FloodExtentProvider(
+            available_return_periods=[10],
+            base_url=MOCK_FLOOD_EXTENT_BASE_URL,
+            country="KEN",
+            tiled=True,
+        )
+        tile_pngs = self._tile_pngs()
+
+        with patch(
+            "pipelines.infra.data_types.flood_extent_provider.download_json_source",
+            return_value=self._tile_index(),
+        ), patch(
+            "pipelines.infra.data_types.flood_extent_provider.download_object",
+            side_effect=tile_pngs.get,
+        ) as mock_download:
+            # The bottom-right pixel, padded to rows and columns 2-3
+            raster = provider.get_raster(10, (33.03, 11.96, 33.04, 11.97))
+
+        np.testing.assert_allclose(raster.array, self.FLOOD_VALUES[2:4, 2:4], atol=0.01)
+        assert mock_download.call_count == 1
+        assert mock_download.call_args.args[0].endswith("_tile_1_1.png")
+
+    def test_caches_decoded_tiles_on_disk(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+        tile_pngs = self._tile_pngs()
+        bounds = (33.0, 11.96, 33.04, 12.0)
+        requests: list = []
+        rasters: list[RasterData] = []
+
+        def download(url: str, etag: str | None = None):
+            requests.append(etag)
+            if etag == '"tile-1"':
+                return None, etag
+            return tile_pngs[url], '"tile-1"'
+
+        for _ in range(2):
+            provider = FloodExtentProvider(
+                available_return_periods=[10],
+                base_url=MOCK_FLOOD_EXTENT_BASE_URL,
+                country="KEN",
+                tiled=True,
+            )
+            with patch(
+                "pipelines.infra.data_types.flood_extent_provider.download_json_source",
+                return_value=self._tile_index(),
+            ), patch(
+                "pipelines.infra.data_types.flood_extent_provider.download_object_if_none_match",
+                side_effect=download,
+            ):
+                rasters.append(provider.get_raster(10, bounds))
+
+        assert requests == [None] * 3 + ['"tile-1"'] * 3
+        np.testing.assert_allclose(rasters[1].array, self.FLOOD_VALUES, atol=0.01)
+
+    def test_untiled_raster_is_cropped_to_bounds(self):
+        provider = FloodExtentProvider(
+            available_return_periods=[10],
+            base_url=MOCK_FLOOD_EXTENT_BASE_URL,
+            country="KEN",
+        )
+
+        with patch(
+            "pipelines.infra.data_types.flood_extent_provider.download_object",
+            return_value=_make_rgba_png_bytes(self.FLOOD_VALUES),
+        ), patch(
+            "pipelines.infra.data_types.flood_extent_provider.download_json_source",
+            return_value=_make_metadata(4, 4),
         ):
-            with pytest.raises(
-                FileNotFoundError, match="Failed to download flood extent PNG"
+            raster = provider.get_raster(10, (33.025, 11.985, 33.035, 11.995))
+
+        np.testing.assert_allclose(raster.array, self.FLOOD_VALUES[0:3, 1:4], atol=0.01)
+        assert np.shares_memory(raster.array, provider.get_raster(10).array)
+
+    def test_sparse_raster_matches_dense_raster(self, monkeypatch):
+        monkeypatch.delenv("DATA_CACHE_DIR", raising=False)
+        provider = FloodExtentProvider(
+            available_return_periods=[10],
+            base_url=MOCK_FLOOD_EXTENT_BASE_URL,
+            country="KEN",
+        )
+        bounds = (33.025, 11.985, 33.035, 11.995)
+
+        with patch(
+            "pipelines.infra.data_types.flood_extent_provider.download_object",
+            return_value=_make_rgba_png_bytes(self.FLOOD_VALUES),
+        ), patch(
+            "pipelines.infra.data_types.flood_extent_provider.download_json_source",
+            return_value=_make_metadata(4, 4),
+        ), patch(
+            "pipelines.infra.data_types.flood_extent_provider.rgba_png_to_float32_array",
+        ) as mock_decode:
+            sparse = provider.get_sparse_raster(10)
+            window = provider.get_sparse_raster(10, bounds)
+
+        # Decoded block by block, never into a dense raster
+        mock_decode.assert_not_called()
+        assert isinstance(sparse, SparseRasterData)
+        assert sparse.indexes.size == np.count_nonzero(self.FLOOD_VALUES)
+        np.testing.assert_allclose(
+            sparse.to_raster_data().array, self.FLOOD_VALUES, atol=0.01
+        )
+        assert sparse.transform == Affine(0.01, 0.0, 33.0, 0.0, -0.01, 12.0)
+        np.testing.assert_allclose(
+            window.to_raster_data().array, self.FLOOD_VALUES[0:3, 1:4], atol=0.01
+        )
+
+    def test_sparse_tiled_window_matches_dense_window(self, monkeypatch):
+        monkeypatch.delenv("DATA_CACHE_DIR", raising=False)
+        tile_pngs = self._tile_pngs()
+        rasters: list[RasterData] = []
+
+        for sparse in (False, True):
+            provider = FloodExtentProvider(
+                available_return_periods=[10],
+                base_url=MOCK_FLOOD_EXTENT_BASE_URL,
+                country="KEN",
+                tiled=True,
+            )
+            with patch(
+                "pipelines.infra.data_types.flood_extent_provider.download_json_source",
+                return_value=self._tile_index(),
+            ), patch(
+                "pipelines.infra.data_types.flood_extent_provider.download_object",
+                side_effect=tile_pngs.get,
             ):
-                provider.get_raster(10)
+                for bounds in (
+                    (33.025, 11.985, 33.035, 11.995),
+                    (33.0, 11.96, 33.04, 12.0),
+                ):
+                    if sparse:
+                        raster = provider.get_sparse_raster(10, bounds)
+                        assert raster.indexes.tolist() == sorted(raster.indexes)
+                        rasters.append(raster.to_raster_data())
+                    else:
+                        rasters.append(provider.get_raster(10, bounds))
+
+        for dense, from_sparse in zip(rasters[:2], rasters[2:]):
+            np.testing.assert_array_equal(from_sparse.array, dense.array)
+            assert from_sparse.transform == dense.transform
@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import numpy as np
+from pipelines.constants import DEFAULT_CRS
+from pipelines.flood.determine_exposure import determine_spatial_extent
+from pipelines.flood.precomputed_exposure import (
+    build_flood_exposure_table,
+    lookup_precomputed_exposure,
+)
+from pipelines.infra.data_types.admin_area_types import (
+    AdminArea,
+    AdminAreaProperties,
+    AdminAreasSet,
+)
+from pipelines.infra.data_types.flood_exposure_table import FloodExposureTable
+from pipelines.infra.data_types.flood_extent_provider import FloodExtentProvider
+from pipelines.infra.data_types.loaded_data_types import AlertConfig, RasterData
+from pipelines.infra.data_types.location_point import LocationPoint
+from pipelines.infra.utils.exposure import (
+    aggregate_population_exposed,
+    compute_population_exposed,
+)
+from rasterio.transform import from_origin
+
+STATION = LocationPoint(name="Station", lat=1.0, lon=1.0, id="G0001")
+
+
+def _square(pcode: str, min_x: float) -> AdminArea:
+    return AdminArea(
+        properties=AdminAreaProperties(
+            pcode=pcode, name=pcode, admin_level=2, country_code="KEN"
+        ),
+        geometry_type="Polygon",
+        coordinates=[
+            [
+                [min_x, 0.0],
+                [min_x, 2.0],
+                [min_x + 2.0, 2.0],
+                [min_x + 2.0, 0.0],
+                [min_x, 0.0],
+            ]
+        ],
+    )
+
+
+def _admin_areas() -> AdminAreasSet:
+    return AdminAreasSet(
+        admin_areas={"PC001": _square("PC001", 0.0), "PC002": _square("PC002", 2.0)}
+    )
+
+
+POPULATION_HASH = "population-1"
+
+
+def _population() -> RasterData:
+    return RasterData(
+        array=np.arange(1, 17, dtype=np.float32).reshape(4, 4) * 10,
+        transform=from_origin(0, 2, 1, 1),
+        crs=DEFAULT_CRS,
+        nodata=-9999.0,
+    )
+
+
+def _flood_extents() -> dict[int, RasterData]:
+    transform = from_origin(0, 2, 0.5, 0.5)
+    rp10 = np.zeros((4, 8), dtype=np.float32)
+    rp10[0:2, 1:6] = 1.5
+    rp50 = np.zeros((4, 8), dtype=np.float32)
+    rp50[:, 1:7] = 2.5
+    return {
+        return_period: RasterData(
+            array=array, transform=transform, crs=DEFAULT_CRS, nodata=0
+        )
+        for return_period, array in ((10, rp10), (50, rp50))
+    }
+
+
+def _provider() -> FloodExtentProvider:
+    provider = FloodExtentProvider(
+        available_return_periods=[10, 50], base_url="http://mock/", country="KEN"
+    )
+    for return_period, raster in _flood_extents().items():
+        provider._cache[f"rp{return_period}"] = raster
+    return provider
+
+
+def _build_table(alert_configs: list[AlertConfig]) -> FloodExposureTable:
+    return build_flood_exposure_table(
+        country="KEN",
+        admin_level=2,
+        alert_configs=alert_configs,
+        glofas_stations={"G0001": STATION},
+        admin_areas=_admin_areas(),
+        population_raster=_population(),
+        population_hash=POPULATION_HASH,
+        flood_extent_provider=_provider(),
+    )
+
+
+def _clip(return_period: int, place_codes: list[str]) -> tuple[RasterData, list[str]]:
+    clipped, place_codes_exposed = determine_spatial_extent(
+        station=STATION,
+        station_place_codes=place_codes,
+        admin_areas=_admin_areas(),
+        flood_extent_raster=_flood_extents()[return_period],
+    )
+    assert clipped is not None
+    return clipped, place_codes_exposed
+
+
+# ---------------------------------------------------------------------------
+# build_flood_exposure_table
+# ---------------------------------------------------------------------------
+
+
+def test_table_matches_computed_exposure_for_every_return_period() -> None:
+    place_codes = ["PC001", "PC002"]
+    table = _build_table([AlertConfig("G0001", place_codes, [])])
+
+    assert len(table.exposure) == 2
+    for return_period in (10, 50):
+        clipped, place_codes_exposed = _clip(return_period, place_codes)
+        exposed_raster = compute_population_exposed(_population(), clipped)
+        assert exposed_raster is not None
+        expected = aggregate_population_exposed(
+            exposed_raster, place_codes_exposed, _admin_areas()
+        )
+
+        looked_up = lookup_precomputed_exposure(
+            table,
+            POPULATION_HASH,
+            clipped,
+            place_codes_exposed,
+            _admin_areas(),
+        )
+
+        assert looked_up == expected
+        assert any(value > 0 for value in expected.values())
+
+
+def test_alert_configs_without_station_are_skipped() -> None:
+    table = _build_table([AlertConfig("G9999", ["PC001"], [])])
+
+    assert table.exposure == {}
+
+
+# ---------------------------------------------------------------------------
+# lookup_precomputed_exposure
+# ---------------------------------------------------------------------------
+
+
+def test_lookup_misses_for_other_inputs() -> None:
+    table = _build_table([AlertConfig("G0001", ["PC001", "PC002"], [])])
+    clipped, place_codes_exposed = _clip(10, ["PC001", "PC002"])
+
+    assert (
+        lookup_precomputed_exposure(
+            table,
+            "population-2",
+            clipped,
+            place_codes_exposed,
+            _admin_areas(),
+        )
+        is None
+    )
+
+    # The same place code in another set is clipped differently
+    clipped_alone, _ = _clip(10, ["PC001"])
+    assert (
+        lookup_precomputed_exposure(
+            table, POPULATION_HASH, clipped_alone, ["PC001"], _admin_areas()
+        )
+        is None
+    )
+
+    changed_areas = _admin_areas()
+    changed_areas.admin_areas["PC002"] = _square("PC002", 2.5)
+    assert (
+        lookup_precomputed_exposure(
+            table,
+            POPULATION_HASH,
+            clipped,
+            place_codes_exposed,
+            changed_areas,
+        )
+        is None
+    )
+
+
+def test_lookup_without_table_or_population_hash() -> None:
+    table = _build_table([AlertConfig("G0001", ["PC001"], [])])
+    clipped, place_codes_exposed = _clip(10, ["PC001"])
+    assert (
+        lookup_precomputed_exposure(
+            None,
+            POPULATION_HASH,
+            clipped,
+            place_codes_exposed,
+            _admin_areas(),
+        )
+        is None
+    )
+    assert (
+        lookup_precomputed_exposure(
+            table, None, clipped, place_codes_exposed, _admin_areas()
+        )
+        is None
+    )
+
+
+# ---------------------------------------------------------------------------
+# FloodExtentProvider.get_exposure_table
+# ---------------------------------------------------------------------------
+
+
+def test_provider_downloads_exposure_table_once() -> None:
+    table = _build_table([AlertConfig("G0001", ["PC001"], [])])
+    provider = FloodExtentProvider(
+        available_return_periods=[10],
+        base_url="http://mock/",
+        country="KEN",
+        exposure_table_filename="KEN_flood_exposure.json",
+    )
+
+    with patch(
+        "pipelines.infra.data_types.flood_extent_provider.download_json_source",
+        return_value=table.to_json(),
+    ) as mock_download:
+        first = provider.get_exposure_table()
+        second = provider.get_exposure_table()
+
+    mock_download.assert_called_once_with(
+        "http://mock/KEN_flood_exposure.json", check_count=False
+    )
+    assert first == table
+    assert second is first
+
+
+def test_provider_without_exposure_table() -> None:
+    provider = FloodExtentProvider(
+        available_return_periods=[10], base_url="http://mock/", country="KEN"
+    )
+
+    with patch(
+        "pipelines.infra.data_types.flood_extent_provider.download_json_source"
+    ) as mock_download:
+        assert provider.get_exposure_table() is None
+
+    mock_download.assert_not_called()
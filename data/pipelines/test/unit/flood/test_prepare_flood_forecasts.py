@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pipelines.flood.prepare_forecast import prepare_flood_forecasts
+from pipelines.infra.data_provider import DataProvider
+from pipelines.infra.data_types.admin_area_types import AdminAreasSet
+from pipelines.infra.data_types.data_config_types import (
+    CountryRunConfig,
+    DataSource,
+    DataSourceConfig,
+)
+from pipelines.infra.data_types.enums import HazardType
+from pipelines.infra.data_types.loaded_data_types import LoadedDataSource
+from shared.country_data import CountryCodeIso3
+
+NETCDF_PATHS = ["/cache/glofas/raw/20260326/dis_00_2026032600.nc"]
+
+
+def _make_config(code: str, sources: list[DataSource]) -> CountryRunConfig:
+    return CountryRunConfig(
+        country_code_iso_3=CountryCodeIso3(code),
+        target_admin_level=3,
+        data_sources=[
+            DataSourceConfig(
+                country_code_iso_3=CountryCodeIso3(code),
+                source=source,
+                hazard_type=HazardType.FLOODS,
+            )
+            for source in sources
+        ],
+    )
+
+
+def _fake_load_data_container(
+    country_config: CountryRunConfig,
+    source_config: DataSourceConfig,
+    data_container: LoadedDataSource,
+    **kwargs,
+) -> None:
+    if source_config.source == DataSource.GLOFAS_DISCHARGE_FTP:
+        data_container.data = NETCDF_PATHS
+    elif source_config.source == DataSource.ADMIN_AREA_IBF_API:
+        data_container.data = MagicMock(spec=AdminAreasSet)
+    elif source_config.source == DataSource.GLOFAS_STATIONS_IBF_API:
+        data_container.data = {"G0001": MagicMock()}
+    else:
+        data_container.data = MagicMock()
+
+
+FLOOD_SOURCES = [
+    DataSource.ADMIN_AREA_IBF_API,
+    DataSource.GLOFAS_STATIONS_IBF_API,
+    DataSource.GLOFAS_DISCHARGE_FTP,
+    DataSource.POPULATION_IBF_API,
+]
+
+
+def test_prepare_slices_all_countries_in_one_call() -> None:
+    configs = [_make_config("KEN", FLOOD_SOURCES), _make_config("UGA", FLOOD_SOURCES)]
+    providers = {
+        config.country_code_iso_3: DataProvider(MagicMock()) for config in configs
+    }
+
+    with (
+        patch(
+            "pipelines.infra.data_provider.load_data_container",
+            side_effect=_fake_load_data_container,
+        ) as mock_load,
+        patch(
+            "pipelines.flood.prepare_forecast.get_bounding_box",
+            return_value=(0.0, 0.0, 1.0, 1.0),
+        ),
+        patch(
+            "pipelines.flood.prepare_forecast.slice_glofas_discharge_to_countries"
+        ) as mock_slice,
+    ):
+        prepare_flood_forecasts(configs, providers)
+
+    mock_slice.assert_called_once_with(
+        NETCDF_PATHS,
+        {"KEN": (0.0, 0.0, 1.0, 1.0), "UGA": (0.0, 0.0, 1.0, 1.0)},
+    )
+    # Only the sources needed for slicing are loaded up front
+    loaded_sources = {call.args[1].source for call in mock_load.call_args_list}
+    assert DataSource.POPULATION_IBF_API not in loaded_sources
+    assert mock_load.call_count == 6
+
+
+def test_prepared_sources_are_not_loaded_again_in_country_run() -> None:
+    config = _make_config("KEN", FLOOD_SOURCES)
+    provider = DataProvider(MagicMock())
+
+    with (
+        patch(
+            "pipelines.infra.data_provider.load_data_container",
+            side_effect=_fake_load_data_container,
+        ) as mock_load,
+        patch(
+            "pipelines.flood.prepare_forecast.get_bounding_box",
+            return_value=(0.0, 0.0, 1.0, 1.0),
+        ),
+        patch("pipelines.flood.prepare_forecast.slice_glofas_discharge_to_countries"),
+    ):
+        prepare_flood_forecasts([config], {config.country_code_iso_3: provider})
+        success, errors = provider.try_load_data(config)
+
+    assert success, errors
+    assert mock_load.call_count == len(FLOOD_SOURCES)
+
+
+def test_prepare_skips_countries_without_ftp_source() -> None:
+    config = _make_config("KEN", [DataSource.GLOFAS_DISCHARGE_SEED_REPO_ALERT])
+    provider = DataProvider(MagicMock())
+
+    with (
+        patch("pipelines.infra.data_provider.load_data_container") as mock_load,
+        patch(
+            "pipelines.flood.prepare_forecast.slice_glofas_discharge_to_countries"
+        ) as mock_slice,
+    ):
+        prepare_flood_forecasts([config], {config.country_code_iso_3: provider})
+
+    mock_load.assert_not_called()
+    mock_slice.assert_not_called()
+
+
+def test_prepare_does_not_slice_in_station_pixel_mode(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setenv("GLOFAS_STATION_PIXEL_MODE", "true")
+    config = _make_config("KEN", FLOOD_SOURCES)
+    provider = DataProvider(MagicMock())
+
+    with (
+        patch("pipelines.infra.data_provider.load_data_container") as mock_load,
+        patch(
+            "pipelines.flood.prepare_forecast.slice_glofas_discharge_to_countries"
+        ) as mock_slice,
+    ):
+        prepare_flood_forecasts([config], {config.country_code_iso_3: provider})
+
+    mock_load.assert_not_called()
+    mock_slice.assert_not_called()
+
+
+def test_prepare_downloads_within_streaming_slicer() -> None:
+    configs = [_make_config("KEN", FLOOD_SOURCES), _make_config("UGA", FLOOD_SOURCES)]
+    providers = {
+        config.country_code_iso_3: DataProvider(MagicMock()) for config in configs
+    }
+    events: list[str] = []
+
+    def fake_load(country_config, source_config, data_container, **kwargs) -> None:
+        events.append(source_config.source)
+        _fake_load_data_container(country_config, source_config, data_container)
+
+    mock_slicer = MagicMock()
+    slicer = mock_slicer.return_value
+
+    def enter() -> MagicMock:
+        events.append("enter")
+        return slicer
+
+    slicer.__enter__.side_effect = enter
+    slicer.__exit__.side_effect = lambda *args: events.append("exit")
+
+    with (
+        patch(
+            "pipelines.infra.data_provider.load_data_container",
+            side_effect=fake_load,
+        ) as mock_load,
+        patch(
+            "pipelines.flood.prepare_forecast.get_bounding_box",
+            return_value=(0.0, 0.0, 1.0, 1.0),
+        ),
+        patch("pipelines.flood.prepare_forecast.GlofasStreamingSlicer", mock_slicer),
+        patch("pipelines.flood.prepare_forecast.slice_glofas_discharge_to_countries"),
+    ):
+        prepare_flood_forecasts(configs, providers)
+
+    # The bounds of all countries are known before the first member is downloaded
+    mock_slicer.assert_called_once_with(
+        {"KEN": (0.0, 0.0, 1.0, 1.0), "UGA": (0.0, 0.0, 1.0, 1.0)}
+    )
+    # Every download reports its members to the slicer
+    for call in mock_load.call_args_list:
+        if call.args[1].source == DataSource.GLOFAS_DISCHARGE_FTP:
+            assert call.kwargs["on_glofas_member_downloaded"] == slicer.submit
+    enter_index = events.index("enter")
+    assert DataSource.GLOFAS_DISCHARGE_FTP not in events[:enter_index]
+    assert events[enter_index + 1 :] == [
+        DataSource.GLOFAS_DISCHARGE_FTP,
+        DataSource.GLOFAS_DISCHARGE_FTP,
+        "exit",
+    ]
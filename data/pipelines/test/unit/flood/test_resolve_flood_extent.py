@@ -89,6 +89,21 @@ def test_falls_back_to_empty_when_no_lower_return_period_exists():
     assert selected.nodata == _MOCK_RASTER.nodata
 
 
+def test_passes_bounds_to_provider():
+    provider = _make_provider([10, 50])
+    time_interval_severities = _build_time_interval_severities(50)
+    bounds = (33.0, 1.0, 34.0, 2.0)
+
+    with patch.object(provider, "get_raster", return_value=_MOCK_RASTER) as mock:
+        compute_flood_extent(
+            time_interval_severities=time_interval_severities,
+            flood_extent_provider=provider,
+            bounds=bounds,
+        )
+
+    mock.assert_called_once_with(50, bounds)
+
+
 def test_raises_when_no_available_return_periods():
     provider = _make_provider([])
     time_interval_severities = _build_time_interval_severities(10)
@@ -0,0 +1,174 @@
+from __future__ import annotations
+
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from rasterio.transform import from_origin
+
+from pipelines.constants import DEFAULT_CRS
+from pipelines.infra.data_types.admin_area_types import (
+    AdminArea,
+    AdminAreaProperties,
+    AdminAreasSet,
+)
+from pipelines.infra.data_types.loaded_data_types import RasterData
+from pipelines.infra.utils import admin_area_labels as labels_module
+from pipelines.infra.utils.admin_area_labels import get_admin_area_labels
+from pipelines.infra.utils.exposure import aggregate_population_exposed
+
+
+def _area(pcode: str, min_x: float, min_y: float, size: float) -> AdminArea:
+    return AdminArea(
+        properties=AdminAreaProperties(
+            pcode=pcode, name=pcode, admin_level=2, country_code="KEN"
+        ),
+        geometry_type="Polygon",
+        coordinates=[
+            [
+                [min_x, min_y],
+                [min_x, min_y + size],
+                [min_x + size, min_y + size],
+                [min_x + size, min_y],
+                [min_x, min_y],
+            ]
+        ],
+    )
+
+
+def _admin_areas() -> AdminAreasSet:
+    # Edges off the pixel grid, so some pixels are only partly inside an area
+    return AdminAreasSet(
+        admin_areas={
+            "PC001": _area("PC001", 0.0, 0.0, 2.3),
+            "PC002": _area("PC002", 2.3, 0.0, 2.3),
+            "PC003": _area("PC003", 0.7, 2.3, 3.1),
+        }
+    )
+
+
+def _population() -> RasterData:
+    rng = np.random.default_rng(0)
+    array = rng.uniform(0, 500, size=(12, 12)).astype(np.float32)
+    array[array < 100] = 0
+    array[0, 0] = -9999.0
+    return RasterData(
+        array=array,
+        transform=from_origin(0, 6, 0.5, 0.5),
+        crs=DEFAULT_CRS,
+        nodata=-9999.0,
+    )
+
+
+def _window(raster: RasterData, row: int, col: int, size: int) -> RasterData:
+    t = raster.transform
+    return RasterData(
+        array=raster.array[row : row + size, col : col + size].copy(),
+        transform=from_origin(t.c + col * t.a, t.f + row * t.e, t.a, -t.e),
+        crs=raster.crs,
+        nodata=raster.nodata,
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_cache_dir(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("DATA_CACHE_DIR", raising=False)
+
+
+# ---------------------------------------------------------------------------
+# Sums per place code
+# ---------------------------------------------------------------------------
+
+
+def test_sums_match_zonal_stats() -> None:
+    population = _population()
+    labels = get_admin_area_labels(_admin_areas(), population.grid, "KEN", 2)
+    place_codes = ["PC001", "PC002", "PC003", "PC999"]
+
+    # The whole grid and a window of it, as cropped to a flood extent
+    for raster in (population, _window(population, 3, 2, 6)):
+        expected = aggregate_population_exposed(raster, place_codes, _admin_areas())
+
+        assert labels.sum_by_place_code(raster, place_codes) == expected
+        assert (
+            aggregate_population_exposed(
+                raster, place_codes, _admin_areas(), admin_area_labels=labels
+            )
+            == expected
+        )
+
+
+def test_falls_back_to_zonal_stats_off_the_label_grid() -> None:
+    population = _population()
+    labels = get_admin_area_labels(_admin_areas(), population.grid, "KEN", 2)
+    t = population.transform
+    shifted = RasterData(
+        array=population.array,
+        transform=from_origin(t.c + 0.25, t.f, 0.5, 0.5),
+        crs=DEFAULT_CRS,
+        nodata=-9999.0,
+    )
+
+    assert labels.sum_by_place_code(shifted, ["PC001"]) is None
+    assert aggregate_population_exposed(
+        shifted, ["PC001"], _admin_areas(), admin_area_labels=labels
+    ) == aggregate_population_exposed(shifted, ["PC001"], _admin_areas())
+
+
+def test_overlapping_admin_areas_are_not_exact() -> None:
+    admin_areas = _admin_areas()
+    admin_areas.admin_areas["PC004"] = _area("PC004", 1.0, 1.0, 2.0)
+    population = _population()
+
+    labels = get_admin_area_labels(admin_areas, population.grid, "KEN", 2)
+
+    assert not labels.exact
+    assert labels.sum_by_place_code(population, ["PC001"]) is None
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+
+def test_labels_are_cached_per_grid_and_admin_areas(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    population = _population()
+    expected = get_admin_area_labels(_admin_areas(), population.grid, "KEN", 2)
+
+    with patch.object(
+        labels_module, "rasterize", wraps=labels_module.rasterize
+    ) as mock_rasterize:
+        cached = get_admin_area_labels(_admin_areas(), population.grid, "KEN", 2)
+    mock_rasterize.assert_not_called()
+    assert isinstance(cached.labels, np.memmap)
+    np.testing.assert_array_equal(cached.labels, expected.labels)
+    assert cached.place_codes == expected.place_codes
+    assert cached.sum_by_place_code(population, ["PC001"]) == (
+        expected.sum_by_place_code(population, ["PC001"])
+    )
+
+    # Changed admin areas replace the label raster of the level
+    changed_areas = _admin_areas()
+    changed_areas.admin_areas["PC003"] = _area("PC003", 0.7, 2.3, 3.0)
+    get_admin_area_labels(changed_areas, population.grid, "KEN", 2)
+    cache_dir = tmp_path / "admin_area_labels" / "KEN"
+    assert len([name for name in os.listdir(cache_dir) if name.endswith(".npy")]) == 1
+
+
+def test_saving_labels_keeps_temporary_files_of_other_jobs(
+    tmp_path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    cache_dir = tmp_path / "admin_area_labels" / "KEN"
+    cache_dir.mkdir(parents=True)
+    other_job_path = cache_dir / "adm2_0123456789abcdef.npy.999.tmp"
+    other_job_path.write_bytes(b"")
+
+    get_admin_area_labels(_admin_areas(), _population().grid, "KEN", 2)
+
+    assert other_job_path.exists()
+    assert len([name for name in os.listdir(cache_dir) if name.endswith(".npy")]) == 1
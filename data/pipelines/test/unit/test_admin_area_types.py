@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import shapely
+from shapely.geometry import MultiPoint, shape
+from shapely.ops import unary_union
+from shapely.validation import make_valid
+
+from pipelines.infra.data_types.admin_area_types import AdminAreasSet
+from pipelines.infra.data_types.location_point import LocationPoint
+from pipelines.infra.utils.raster import get_bounding_box
+
+POLYGON = {
+    "type": "Polygon",
+    "coordinates": [
+        [[0.0, 0.0], [0.0, 2.0], [2.0, 2.0], [2.0, 0.0], [0.0, 0.0]],
+        [[0.5, 0.5], [0.5, 1.0], [1.0, 1.0], [0.5, 0.5]],
+    ],
+}
+MULTIPOLYGON = {
+    "type": "MultiPolygon",
+    "coordinates": [
+        [[[3.0, 0.0], [3.0, 1.0], [4.0, 1.0], [3.0, 0.0]]],
+        [[[5.0, 0.0], [5.0, 1.0], [6.0, 1.0], [6.0, 0.0], [5.0, 0.0]]],
+    ],
+}
+# A bow tie, which is invalid until make_valid
+BOW_TIE = {
+    "type": "Polygon",
+    "coordinates": [[[0.0, 0.0], [1.0, 1.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]],
+}
+
+
+def _feature_collection(*geometries: dict | None) -> dict:
+    return {
+        "features": [
+            {
+                "properties": {"placeCode": f"PC{i}", "adminLevel": 1},
+                "geometry": geometry,
+            }
+            for i, geometry in enumerate(geometries)
+        ]
+    }
+
+
+def test_from_api_builds_geometries_without_keeping_coordinates() -> None:
+    admin_areas = AdminAreasSet.from_api(
+        _feature_collection(POLYGON, MULTIPOLYGON, BOW_TIE)
+    )
+
+    for i, geojson in enumerate((POLYGON, MULTIPOLYGON, BOW_TIE)):
+        admin_area = admin_areas.admin_areas[f"PC{i}"]
+        assert admin_area.coordinates == []
+        assert admin_area.geometry is not None
+        assert shapely.to_wkb(admin_area.get_geometry()) == shapely.to_wkb(
+            shape(geojson)
+        )
+        assert admin_area.to_geometry().equals(make_valid(shape(geojson)))
+
+
+def test_from_api_keeps_coordinates_it_cannot_build() -> None:
+    polygon_3d = {
+        "type": "Polygon",
+        "coordinates": [
+            [[0.0, 0.0, 1.0], [0.0, 1.0, 1.0], [1.0, 1.0, 1.0], [0.0, 0.0, 1.0]]
+        ],
+    }
+
+    admin_areas = AdminAreasSet.from_api(_feature_collection(POLYGON, polygon_3d, None))
+
+    # The other polygons are still built up front
+    assert admin_areas.admin_areas["PC0"].geometry is not None
+    area_3d = admin_areas.admin_areas["PC1"]
+    assert area_3d.geometry is None
+    assert area_3d.coordinates == polygon_3d["coordinates"]
+    assert area_3d.get_geometry().has_z
+    assert admin_areas.admin_areas["PC2"].geometry is None
+
+
+def test_validated_geometry_is_computed_once() -> None:
+    admin_area = AdminAreasSet.from_api(_feature_collection(BOW_TIE)).admin_areas["PC0"]
+
+    with patch(
+        "pipelines.infra.data_types.admin_area_types.make_valid", wraps=make_valid
+    ) as mock_make_valid:
+        first = admin_area.to_geometry()
+        second = admin_area.to_geometry()
+
+    assert mock_make_valid.call_count == 1
+    assert first is second
+    assert first.is_valid
+
+
+# ---------------------------------------------------------------------------
+# Bounding boxes
+# ---------------------------------------------------------------------------
+
+
+def test_bounds_of_all_or_some_admin_areas() -> None:
+    admin_areas = AdminAreasSet.from_api(
+        _feature_collection(
+            POLYGON, MULTIPOLYGON, {"type": "Polygon", "coordinates": []}
+        )
+    )
+
+    assert admin_areas.get_bounds() == (0.0, 0.0, 6.0, 2.0)
+    assert admin_areas.get_bounds(["PC1", "PC9"]) == (3.0, 0.0, 6.0, 1.0)
+    # Empty geometries and unknown place codes have no bounds
+    assert admin_areas.get_bounds(["PC2", "PC9"]) is None
+
+
+def test_bounds_are_computed_once() -> None:
+    admin_areas = AdminAreasSet.from_api(_feature_collection(POLYGON, MULTIPOLYGON))
+
+    with patch(
+        "pipelines.infra.data_types.admin_area_types.shapely.bounds",
+        wraps=shapely.bounds,
+    ) as mock_bounds:
+        admin_areas.get_bounds()
+        admin_areas.get_bounds(["PC0"])
+
+    assert mock_bounds.call_count == 1
+
+
+def test_bounding_box_merges_point_locations() -> None:
+    admin_areas = AdminAreasSet.from_api(
+        _feature_collection(POLYGON, MULTIPOLYGON, BOW_TIE)
+    )
+    stations = {
+        "G1": LocationPoint(name="G1", lat=-1.0, lon=2.5, id="G1"),
+        "G2": LocationPoint(name="G2", lat=0.5, lon=7.0, id="G2"),
+    }
+
+    expected = unary_union(
+        [area.to_geometry() for area in admin_areas.admin_areas.values()]
+        + [MultiPoint([(2.5, -1.0), (7.0, 0.5)])]
+    ).bounds
+    assert get_bounding_box(admin_areas, stations) == expected
+    assert get_bounding_box(AdminAreasSet(admin_areas={}), stations) == (
+        2.5,
+        -1.0,
+        7.0,
+        0.5,
+    )
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import os
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from pipelines.infra.utils.cache_retention import (
+    apply_cache_retention,
+    CacheRetentionPolicy,
+)
+
+DAY = 24 * 60 * 60
+
+
+def _write_date_folder(
+    cache_dir: Path, subdir: str, date: str, size: int, age_days: float
+) -> Path:
+    folder = cache_dir / subdir / date
+    folder.mkdir(parents=True)
+    file_path = folder / "dis_00.nc"
+    file_path.write_bytes(b"x" * size)
+    timestamp = time.time() - age_days * DAY
+    os.utime(file_path, (timestamp, timestamp))
+    os.utime(folder, (timestamp, timestamp))
+    return folder
+
+
+@pytest.fixture
+def cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+
+# ---------------------------------------------------------------------------
+# Eviction
+# ---------------------------------------------------------------------------
+
+
+def test_evicts_folders_older_than_max_age(cache_dir: Path) -> None:
+    old = _write_date_folder(cache_dir, "raw", "20260101", 10, age_days=10)
+    recent = _write_date_folder(cache_dir, "raw", "20260105", 10, age_days=2)
+    latest = _write_date_folder(cache_dir, "raw", "20260110", 10, age_days=20)
+
+    reclaimed = apply_cache_retention(
+        policies=[CacheRetentionPolicy("raw", max_age_days=7)]
+    )
+
+    assert reclaimed == 10
+    assert not old.exists()
+    assert recent.exists()
+    # The most recent date is kept, however old
+    assert latest.exists()
+
+
+def test_evicts_least_recently_used_beyond_max_bytes(cache_dir: Path) -> None:
+    oldest = _write_date_folder(cache_dir, "raw", "20260101", 100, age_days=3)
+    older = _write_date_folder(cache_dir, "raw", "20260102", 100, age_days=2)
+    newer = _write_date_folder(cache_dir, "raw", "20260103", 100, age_days=1)
+
+    reclaimed = apply_cache_retention(
+        policies=[CacheRetentionPolicy("raw", max_bytes=150)]
+    )
+
+    assert reclaimed == 200
+    assert not oldest.exists()
+    assert not older.exists()
+    assert newer.exists()
+
+
+def test_keeps_protected_and_todays_dates(cache_dir: Path) -> None:
+    today = datetime.now(timezone.utc).strftime("%Y%m%d")
+    protected = _write_date_folder(cache_dir, "raw", "20260101", 10, age_days=30)
+    todays = _write_date_folder(cache_dir, "raw", today, 10, age_days=30)
+    evicted = _write_date_folder(cache_dir, "raw", "20260102", 10, age_days=30)
+
+    apply_cache_retention(
+        protected_dates={"20260101"},
+        policies=[CacheRetentionPolicy("raw", max_age_days=7, max_bytes=0)],
+    )
+
+    assert protected.exists()
+    assert todays.exists()
+    assert not evicted.exists()
+
+
+def test_keeps_recently_used_country_folders(cache_dir: Path) -> None:
+    in_use = _write_date_folder(cache_dir, "population", "KEN", 100, age_days=1)
+    idle = _write_date_folder(cache_dir, "population", "UGA", 100, age_days=3)
+
+    reclaimed = apply_cache_retention(
+        policies=[CacheRetentionPolicy("population", max_bytes=0)]
+    )
+
+    assert reclaimed == 100
+    assert in_use.exists()
+    assert not idle.exists()
+
+
+def test_dry_run_reports_without_removing(cache_dir: Path) -> None:
+    old = _write_date_folder(cache_dir, "raw", "20260101", 10, age_days=10)
+    _write_date_folder(cache_dir, "raw", "20260110", 10, age_days=1)
+
+    reclaimed = apply_cache_retention(
+        policies=[CacheRetentionPolicy("raw", max_age_days=7)], dry_run=True
+    )
+
+    assert reclaimed == 10
+    assert old.exists()
+
+
+def test_missing_cache_folder_is_skipped(cache_dir: Path) -> None:
+    assert (
+        apply_cache_retention(policies=[CacheRetentionPolicy("raw", max_age_days=7)])
+        == 0
+    )
+
+
+def test_requires_data_cache_dir(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("DATA_CACHE_DIR", raising=False)
+
+    with pytest.raises(ValueError, match="DATA_CACHE_DIR"):
+        apply_cache_retention()
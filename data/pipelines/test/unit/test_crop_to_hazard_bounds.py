@@ -1,12 +1,20 @@
+from unittest.mock import patch
+
 import numpy as np
+import pytest
 from rasterio.transform import Affine
+from rasterio.warp import reproject as exposure_reproject
 
 from pipelines.constants import DEFAULT_CRS
 from pipelines.infra.data_types.loaded_data_types import RasterData
 from pipelines.infra.utils.exposure import (
     _crop_to_hazard_bounds,
+    _get_aligned_hazard_mask,
+    _get_reprojected_hazard_mask,
     compute_population_exposed,
+    ReprojectionCache,
 )
+from pipelines.infra.utils.raster import crop_raster_to_bounds
 
 
 class TestCropToHazardBounds:
@@ -152,3 +160,172 @@ class TestComputePopulationExposedWithCrop:
 
         assert result is not None
         np.testing.assert_allclose(result.array.sum(), pop_array.sum(), rtol=0.01)
+
+
+class TestHazardMask:
+    def _population(self) -> RasterData:
+        rng = np.random.default_rng(0)
+        return RasterData(
+            array=rng.uniform(0, 100, size=(60, 80)).astype(np.float32),
+            transform=Affine(0.01, 0, 0.0, 0, -0.01, 0.6),
+            crs=DEFAULT_CRS,
+            nodata=-9999.0,
+        )
+
+    def _hazard(
+        self, factor: int, col_off: int, row_off: int, crs: str = DEFAULT_CRS
+    ) -> RasterData:
+        rng = np.random.default_rng(factor)
+        array = rng.choice([0.0, 0.5, 2.0, np.nan], size=(17, 23)).astype(np.float32)
+        return RasterData(
+            array=array,
+            transform=Affine(
+                0.01 * factor,
+                0,
+                col_off * 0.01,
+                0,
+                -0.01 * factor,
+                0.6 - row_off * 0.01,
+            ),
+            crs=crs,
+            nodata=0,
+        )
+
+    @pytest.mark.parametrize(
+        "factor, col_off, row_off",
+        [(1, 5, 7), (3, 4, 2), (2, -5, -3), (4, 60, 50)],
+    )
+    def test_aligned_mask_matches_reprojected_mask(self, factor, col_off, row_off):
+        population = self._population()
+        hazard = self._hazard(factor, col_off, row_off)
+        shape = population.array.shape
+
+        aligned = _get_aligned_hazard_mask(
+            hazard, shape, population.transform, population.crs
+        )
+
+        assert aligned is not None
+        np.testing.assert_array_equal(
+            aligned,
+            _get_reprojected_hazard_mask(
+                hazard, shape, population.transform, population.crs
+            ),
+        )
+
+    def test_unaligned_grids_are_reprojected(self):
+        population = self._population()
+        half_pixel = self._hazard(1, 5, 7)
+        half_pixel.transform = half_pixel.transform * Affine.translation(0.5, 0)
+        finer = self._hazard(1, 5, 7)
+        finer.transform = finer.transform * Affine.scale(0.5)
+
+        for hazard in (half_pixel, finer):
+            assert (
+                _get_aligned_hazard_mask(
+                    hazard,
+                    population.array.shape,
+                    population.transform,
+                    population.crs,
+                )
+                is None
+            )
+
+    def test_exposure_matches_full_reprojection(self):
+        population = self._population()
+        population.array[10, 10] = population.nodata
+
+        for hazard in (self._hazard(3, 4, 2), self._hazard(1, 5, 7, "EPSG:3857")):
+            if hazard.crs != DEFAULT_CRS:
+                # The same area, in web mercator
+                hazard.transform = Affine(1113.2, 0, 5565.97, 0, -1113.2, 59018.5)
+            result = compute_population_exposed(population, hazard)
+
+            # Reprojected onto the full population grid, as before cropping
+            full_mask = _get_reprojected_hazard_mask(
+                hazard,
+                population.array.shape,
+                population.transform,
+                population.crs,
+            )
+            expected = np.where(full_mask, population.array, 0.0).astype(np.float32)
+            assert result is not None
+            assert result.array.dtype == np.float32
+            assert result.array.size < expected.size
+            assert result.array.sum(dtype=np.float64) == expected.sum(dtype=np.float64)
+            assert np.count_nonzero(result.array) == np.count_nonzero(expected)
+
+    def test_index_map_matches_reprojection(self):
+        population = self._population()
+        hazards = [self._hazard(1, 5, 7), self._hazard(1, 5, 7, "EPSG:3857")]
+        hazards[0].transform = hazards[0].transform * Affine.translation(0.5, 0.25)
+        hazards[1].transform = Affine(1113.2, 0, 5565.97, 0, -1113.2, 59018.5)
+
+        for hazard in hazards:
+            expected = compute_population_exposed(population, hazard)
+            reprojection_cache = ReprojectionCache()
+            for _ in range(2):
+                result = compute_population_exposed(
+                    population, hazard, reprojection_cache=reprojection_cache
+                )
+                assert result is not None and expected is not None
+                assert result.transform == expected.transform
+                np.testing.assert_array_equal(result.array, expected.array)
+            assert len(reprojection_cache.index_maps) == 1
+
+    def test_index_map_is_reused_for_the_same_grids(self):
+        population = self._population()
+        hazard = self._hazard(1, 5, 7)
+        hazard.transform = hazard.transform * Affine.translation(0.5, 0.25)
+        # Another return period on the same grid
+        other_hazard = RasterData(
+            array=hazard.array[::-1].copy(),
+            transform=hazard.transform,
+            crs=hazard.crs,
+            nodata=hazard.nodata,
+        )
+        reprojection_cache = ReprojectionCache()
+
+        with patch(
+            "pipelines.infra.utils.exposure.reproject", wraps=exposure_reproject
+        ) as mock_reproject:
+            compute_population_exposed(
+                population, hazard, reprojection_cache=reprojection_cache
+            )
+            result = compute_population_exposed(
+                population, other_hazard, reprojection_cache=reprojection_cache
+            )
+
+        assert mock_reproject.call_count == 1
+        expected = compute_population_exposed(population, other_hazard)
+        assert result is not None and expected is not None
+        np.testing.assert_array_equal(result.array, expected.array)
+
+
+class TestCropRasterToBounds:
+    def test_crops_to_bounds_with_padding_as_view(self):
+        raster = RasterData(
+            array=np.arange(100, dtype=np.float32).reshape(10, 10),
+            transform=Affine(0.1, 0, 0.0, 0, -0.1, 1.0),
+            crs=DEFAULT_CRS,
+            nodata=-9999.0,
+        )
+
+        cropped = crop_raster_to_bounds(raster, (0.3, 0.5, 0.5, 0.7))
+
+        # Rows 3-4 and columns 3-4, plus a pixel around them
+        np.testing.assert_array_equal(cropped.array, raster.array[2:6, 2:6])
+        assert np.shares_memory(cropped.array, raster.array)
+        assert cropped.transform.c == pytest.approx(0.2)
+        assert cropped.transform.f == pytest.approx(0.8)
+
+    def test_bounds_outside_raster_give_empty_array(self):
+        raster = RasterData(
+            array=np.ones((10, 10), dtype=np.float32),
+            transform=Affine(0.1, 0, 0.0, 0, -0.1, 1.0),
+            crs=DEFAULT_CRS,
+            nodata=-9999.0,
+        )
+
+        cropped = crop_raster_to_bounds(raster, (5.0, 5.0, 6.0, 6.0))
+
+        assert cropped.array.size == 0
@@ -1,23 +1,42 @@
 from __future__ import annotations
 
+import ftplib
+import json
 import os
+import queue
+import threading
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
+import numpy as np
 import pytest
+import xarray as xr
 
 from pipelines.infra.data_types.glofas_discharge_provider import (
-    _get_highest_ensemble_index,
+    _download_ensemble_files,
+    _download_ensemble_worker,
+    _download_ftp_file,
+    _get_pending_ensemble_filenames,
+    _list_remote_ensemble_files,
     _resolve_forecast_date,
+    _try_reuse_existing_download,
     _validate_ensemble_count,
     GLOFAS_MIN_ENSEMBLE_COUNT,
+    GlofasStreamingSlicer,
     load_glofas_discharge_from_local_country_files,
     load_glofas_discharge_from_local_global_files,
+    slice_glofas_discharge_to_countries,
+)
+from pipelines.infra.utils.glofas_download_manifest import (
+    GlofasDownloadManifest,
+    RemoteFileInfo,
 )
 from pipelines.infra.utils.storage_helpers import (
+    archive_alert_glofas_files,
     find_latest_forecast_date_in_cache,
     get_cached_glofas_files,
     get_glofas_raw_data_dir,
+    GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR,
     GLOFAS_COUNTRY_SPLIT_DATA_DIR,
     GLOFAS_RAW_DATA_DIR,
 )
@@ -235,6 +254,141 @@ def test_find_latest_returns_none_when_dir_missing(
     assert result is None
 
 
+# ---------------------------------------------------------------------------
+# archive_alert_glofas_files
+# ---------------------------------------------------------------------------
+
+
+def test_archive_hardlinks_country_split_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_country_split_files(tmp_path, FORECAST_DATE, "KEN", count=2)
+
+    assert archive_alert_glofas_files(paths) is None
+
+    alert_dir = tmp_path / GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR / FORECAST_DATE
+    for path in paths:
+        assert os.path.samefile(path, alert_dir / os.path.basename(path))
+
+
+def test_archive_skips_files_archived_with_same_content(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_country_split_files(tmp_path, FORECAST_DATE, "KEN", count=1)
+    alert_dir = tmp_path / GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR / FORECAST_DATE
+    alert_dir.mkdir(parents=True)
+    alert_path = alert_dir / os.path.basename(paths[0])
+    alert_path.write_bytes(Path(paths[0]).read_bytes())
+
+    with patch("pipelines.infra.utils.storage_helpers.os.link") as mock_link:
+        archive_alert_glofas_files(paths)
+
+    mock_link.assert_not_called()
+    assert not os.path.samefile(paths[0], alert_path)
+
+
+def test_archive_replaces_files_archived_with_other_content(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_country_split_files(tmp_path, FORECAST_DATE, "KEN", count=1)
+    alert_dir = tmp_path / GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR / FORECAST_DATE
+    alert_dir.mkdir(parents=True)
+    alert_path = alert_dir / os.path.basename(paths[0])
+    alert_path.write_bytes(b"older_forecast")
+
+    archive_alert_glofas_files(paths)
+
+    assert os.path.samefile(paths[0], alert_path)
+
+
+def test_archive_copies_in_background_when_hardlink_fails(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_country_split_files(tmp_path, FORECAST_DATE, "KEN", count=2)
+
+    with patch(
+        "pipelines.infra.utils.storage_helpers.os.link",
+        side_effect=OSError("cross-device link"),
+    ):
+        copy_thread = archive_alert_glofas_files(paths)
+
+    assert copy_thread is not None
+    copy_thread.join()
+    alert_dir = tmp_path / GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR / FORECAST_DATE
+    for path in paths:
+        alert_path = alert_dir / os.path.basename(path)
+        assert not os.path.samefile(path, alert_path)
+        assert alert_path.read_bytes() == Path(path).read_bytes()
+
+
+def test_archive_copy_failure_leaves_no_partial_file(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_country_split_files(tmp_path, FORECAST_DATE, "KEN", count=2)
+
+    def copy_first_file_only(source_path: str, target_path: str) -> None:
+        Path(target_path).write_bytes(b"partial")
+        if source_path == paths[0]:
+            raise OSError("No space left on device")
+
+    with (
+        patch(
+            "pipelines.infra.utils.storage_helpers.os.link",
+            side_effect=OSError("cross-device link"),
+        ),
+        patch(
+            "pipelines.infra.utils.storage_helpers.fcntl.ioctl",
+            side_effect=OSError("Operation not supported"),
+        ),
+        patch(
+            "pipelines.infra.utils.storage_helpers.shutil.copy2",
+            side_effect=copy_first_file_only,
+        ),
+    ):
+        copy_thread = archive_alert_glofas_files(paths)
+        assert copy_thread is not None
+        copy_thread.join()
+
+    # The failure is logged, and the other file is still archived
+    alert_dir = tmp_path / GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR / FORECAST_DATE
+    assert os.listdir(alert_dir) == [os.path.basename(paths[1])]
+
+
+def test_archive_clones_files_where_supported(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_country_split_files(tmp_path, FORECAST_DATE, "KEN", count=1)
+
+    def clone(target_fd: int, request: int, source_fd: int) -> None:
+        os.write(target_fd, os.read(source_fd, 1024))
+
+    with (
+        patch(
+            "pipelines.infra.utils.storage_helpers.os.link",
+            side_effect=OSError("cross-device link"),
+        ),
+        patch(
+            "pipelines.infra.utils.storage_helpers.fcntl.ioctl", side_effect=clone
+        ) as mock_ioctl,
+        patch("pipelines.infra.utils.storage_helpers.shutil.copy2") as mock_copy,
+    ):
+        copy_thread = archive_alert_glofas_files(paths)
+        assert copy_thread is not None
+        copy_thread.join()
+
+    assert mock_ioctl.call_args.args[1] == 0x40049409
+    mock_copy.assert_not_called()
+    alert_dir = tmp_path / GLOFAS_COUNTRY_SPLIT_ALERT_DATA_DIR / FORECAST_DATE
+    alert_path = alert_dir / os.path.basename(paths[0])
+    assert alert_path.read_bytes() == Path(paths[0]).read_bytes()
+
+
 # ---------------------------------------------------------------------------
 # load_glofas_discharge_from_local_country
 # ---------------------------------------------------------------------------
@@ -357,35 +511,282 @@ def test_load_from_global_cache_raises_for_nonexistent_date(
         load_glofas_discharge_from_local_global_files("KEN", "20260101")
 
 
-# _get_highest_ensemble_index
+# _get_pending_ensemble_filenames
 # ---------------------------------------------------------------------------
 
 
-def test_highest_ensemble_index_standard_filenames() -> None:
-    files = [
-        "/cache/glofas/raw/20260701/dis_00_2026070100.nc",
-        "/cache/glofas/raw/20260701/dis_05_2026070100.nc",
-        "/cache/glofas/raw/20260701/dis_50_2026070100.nc",
-    ]
-    assert _get_highest_ensemble_index(files) == 50
+def _load_manifest() -> GlofasDownloadManifest:
+    return GlofasDownloadManifest.load(get_glofas_raw_data_dir(FORECAST_DATE))
 
 
-def test_highest_ensemble_index_single_file() -> None:
-    files = ["/cache/glofas/raw/20260701/dis_03_2026070100.nc"]
-    assert _get_highest_ensemble_index(files) == 3
+def _record_in_manifest(paths: list[str]) -> GlofasDownloadManifest:
+    manifest = _load_manifest()
+    for path in paths:
+        manifest.record(path, _remote_info(path))
+    return manifest
 
 
-def test_highest_ensemble_index_empty_list() -> None:
-    assert _get_highest_ensemble_index([]) == -1
+def _remote_info(path: str, mtime: str = "20260326080000") -> RemoteFileInfo:
+    return RemoteFileInfo(size=os.path.getsize(path), mtime=mtime)
 
 
-def test_highest_ensemble_index_ignores_unparsable_names() -> None:
-    files = [
-        "/cache/glofas/raw/20260701/dis_10_2026070100.nc",
-        "/cache/glofas/raw/20260701/readme.txt",
-        "/cache/glofas/raw/20260701/other_file.nc",
-    ]
-    assert _get_highest_ensemble_index(files) == 10
+def test_pending_ensemble_filenames_skips_verified_members(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_cached_files(tmp_path, FORECAST_DATE, count=3)
+    manifest = _record_in_manifest(paths)
+    remote_files = {os.path.basename(path): _remote_info(path) for path in paths}
+    # A partial download is not a completed member, so it stays pending
+    cache_dir = tmp_path / GLOFAS_RAW_DATA_DIR / FORECAST_DATE
+    (cache_dir / f"dis_03_{FORECAST_DATE}00.nc.part").write_bytes(b"partial")
+
+    result = _get_pending_ensemble_filenames(FORECAST_DATE, 5, manifest, remote_files)
+
+    assert result == [f"dis_03_{FORECAST_DATE}00.nc", f"dis_04_{FORECAST_DATE}00.nc"]
+
+
+def test_pending_ensemble_filenames_refetches_truncated_and_changed_members(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_cached_files(tmp_path, FORECAST_DATE, count=3)
+    manifest = _record_in_manifest(paths)
+    remote_files = {os.path.basename(path): _remote_info(path) for path in paths}
+    # Member 0 got truncated on disk, member 1 was republished on the server
+    Path(paths[0]).write_bytes(b"fake")
+    remote_files[os.path.basename(paths[1])].mtime = "20260326120000"
+
+    result = _get_pending_ensemble_filenames(FORECAST_DATE, 3, manifest, remote_files)
+
+    assert result == [os.path.basename(paths[0]), os.path.basename(paths[1])]
+
+
+def test_pending_ensemble_filenames_adopts_complete_files_without_manifest(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_cached_files(tmp_path, FORECAST_DATE, count=2)
+    remote_files = {os.path.basename(path): _remote_info(path) for path in paths}
+    # Member 1 is shorter than the file on the server
+    remote_files[os.path.basename(paths[1])].size = 1000
+    manifest = _load_manifest()
+
+    result = _get_pending_ensemble_filenames(FORECAST_DATE, 2, manifest, remote_files)
+
+    assert result == [os.path.basename(paths[1])]
+    assert _load_manifest().get_verified_paths() == [paths[0]]
+
+
+def test_pending_ensemble_filenames_all_when_nothing_cached(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+
+    result = _get_pending_ensemble_filenames(FORECAST_DATE, 3, _load_manifest(), {})
+
+    assert result == [f"dis_{i:02d}_{FORECAST_DATE}00.nc" for i in range(3)]
+
+
+# ---------------------------------------------------------------------------
+# _try_reuse_existing_download
+# ---------------------------------------------------------------------------
+
+
+def test_reuse_existing_download_when_enough_members_verified(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_cached_files(tmp_path, FORECAST_DATE, GLOFAS_MIN_ENSEMBLE_COUNT)
+    manifest = _record_in_manifest(paths)
+
+    assert _try_reuse_existing_download(FORECAST_DATE, manifest) == paths
+
+
+def test_reuse_existing_download_ignores_truncated_members(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_cached_files(tmp_path, FORECAST_DATE, GLOFAS_MIN_ENSEMBLE_COUNT)
+    manifest = _record_in_manifest(paths)
+    Path(paths[0]).write_bytes(b"fake")
+
+    assert _try_reuse_existing_download(FORECAST_DATE, manifest) is None
+
+
+def test_reuse_existing_download_ignores_files_without_manifest(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    _write_cached_files(tmp_path, FORECAST_DATE, GLOFAS_MIN_ENSEMBLE_COUNT)
+
+    assert _try_reuse_existing_download(FORECAST_DATE, _load_manifest()) is None
+
+
+def test_load_from_global_cache_skips_files_failing_manifest(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    paths = _write_cached_files(tmp_path, FORECAST_DATE, count=3)
+    _record_in_manifest(paths)
+    Path(paths[1]).write_bytes(b"fake")
+
+    result = load_glofas_discharge_from_local_global_files("KEN", FORECAST_DATE)
+
+    assert result == [paths[0], paths[2]]
+
+
+# ---------------------------------------------------------------------------
+# _download_ftp_file (streaming to a partial file with byte-offset resume)
+# ---------------------------------------------------------------------------
+
+
+REMOTE_CONTENT = b"0123456789" * 10
+
+
+def _mock_ftp_streaming(fail_after_bytes: int | None = None) -> MagicMock:
+    """Mock FTP session that streams REMOTE_CONTENT in blocks, honouring REST.
+
+    When fail_after_bytes is set, the transfer breaks after that many bytes.
+    """
+    mock_ftp = MagicMock()
+
+    def retrbinary(command: str, callback, rest: int | None = None) -> None:
+        content = REMOTE_CONTENT[rest or 0 :]
+        for start in range(0, len(content), 10):
+            if fail_after_bytes is not None and start >= fail_after_bytes:
+                raise ftplib.error_temp("426 Connection closed; transfer aborted")
+            callback(content[start : start + 10])
+
+    mock_ftp.retrbinary.side_effect = retrbinary
+    return mock_ftp
+
+
+def test_download_ftp_file_streams_to_disk_and_renames(tmp_path: Path) -> None:
+    local_path = str(tmp_path / "dis_00.nc")
+
+    transferred, _ = _download_ftp_file(
+        _mock_ftp_streaming(), "dis_00.nc", local_path, "host", "user", "pass", "dir"
+    )
+
+    assert Path(local_path).read_bytes() == REMOTE_CONTENT
+    assert transferred == len(REMOTE_CONTENT)
+    assert not Path(f"{local_path}.part").exists()
+
+
+def test_download_ftp_file_resumes_from_byte_offset_after_failure(
+    tmp_path: Path,
+) -> None:
+    local_path = str(tmp_path / "dis_00.nc")
+    failing_ftp = _mock_ftp_streaming(fail_after_bytes=40)
+    reconnected_ftp = _mock_ftp_streaming()
+
+    with (
+        patch(
+            "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+            return_value=reconnected_ftp,
+        ),
+        patch("pipelines.infra.data_types.glofas_discharge_provider.time.sleep"),
+    ):
+        transferred, ftp = _download_ftp_file(
+            failing_ftp, "dis_00.nc", local_path, "host", "user", "pass", "dir"
+        )
+
+    assert ftp is reconnected_ftp
+    assert Path(local_path).read_bytes() == REMOTE_CONTENT
+    assert transferred == len(REMOTE_CONTENT)
+    assert reconnected_ftp.retrbinary.call_args.kwargs["rest"] == 40
+
+
+def test_download_ftp_file_resumes_partial_file_from_earlier_run(
+    tmp_path: Path,
+) -> None:
+    local_path = str(tmp_path / "dis_00.nc")
+    Path(f"{local_path}.part").write_bytes(REMOTE_CONTENT[:30])
+    mock_ftp = _mock_ftp_streaming()
+
+    transferred, _ = _download_ftp_file(
+        mock_ftp, "dis_00.nc", local_path, "host", "user", "pass", "dir"
+    )
+
+    assert Path(local_path).read_bytes() == REMOTE_CONTENT
+    assert transferred == len(REMOTE_CONTENT) - 30
+    assert mock_ftp.retrbinary.call_args.kwargs["rest"] == 30
+
+
+def test_download_ftp_file_resumes_partial_file_of_same_remote_version(
+    tmp_path: Path,
+) -> None:
+    local_path = str(tmp_path / "dis_00.nc")
+    remote = RemoteFileInfo(size=len(REMOTE_CONTENT), mtime="20260326080000")
+    Path(f"{local_path}.part").write_bytes(REMOTE_CONTENT[:30])
+    Path(f"{local_path}.part.json").write_text(
+        json.dumps({"size": len(REMOTE_CONTENT), "mtime": "20260326080000"})
+    )
+    mock_ftp = _mock_ftp_streaming()
+
+    transferred, _ = _download_ftp_file(
+        mock_ftp, "dis_00.nc", local_path, "host", "user", "pass", "dir", remote
+    )
+
+    assert Path(local_path).read_bytes() == REMOTE_CONTENT
+    assert transferred == len(REMOTE_CONTENT) - 30
+    assert not Path(f"{local_path}.part.json").exists()
+
+
+@pytest.mark.parametrize(
+    "recorded",
+    [
+        {"size": len(REMOTE_CONTENT), "mtime": "20260325080000"},
+        {"size": 50, "mtime": "20260326080000"},
+        None,
+    ],
+    ids=["other-mtime", "other-size", "not-recorded"],
+)
+def test_download_ftp_file_restarts_partial_file_of_other_remote_version(
+    tmp_path: Path, recorded: dict | None
+) -> None:
+    local_path = str(tmp_path / "dis_00.nc")
+    remote = RemoteFileInfo(size=len(REMOTE_CONTENT), mtime="20260326080000")
+    Path(f"{local_path}.part").write_bytes(b"x" * 30)
+    if recorded is not None:
+        Path(f"{local_path}.part.json").write_text(json.dumps(recorded))
+    mock_ftp = _mock_ftp_streaming()
+
+    transferred, _ = _download_ftp_file(
+        mock_ftp, "dis_00.nc", local_path, "host", "user", "pass", "dir", remote
+    )
+
+    assert Path(local_path).read_bytes() == REMOTE_CONTENT
+    assert transferred == len(REMOTE_CONTENT)
+    assert mock_ftp.retrbinary.call_args.kwargs["rest"] is None
+
+
+def test_download_ftp_file_keeps_partial_file_when_retries_exhausted(
+    tmp_path: Path,
+) -> None:
+    local_path = str(tmp_path / "dis_00.nc")
+
+    with (
+        patch(
+            "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+            side_effect=lambda *args, **kwargs: _mock_ftp_streaming(fail_after_bytes=0),
+        ),
+        patch("pipelines.infra.data_types.glofas_discharge_provider.time.sleep"),
+        pytest.raises(ConnectionError, match="after 3 attempts"),
+    ):
+        _download_ftp_file(
+            _mock_ftp_streaming(fail_after_bytes=20),
+            "dis_00.nc",
+            local_path,
+            "host",
+            "user",
+            "pass",
+            "dir",
+        )
+
+    assert not Path(local_path).exists()
+    assert Path(f"{local_path}.part").read_bytes() == REMOTE_CONTENT[:20]
 
 
 # ---------------------------------------------------------------------------
@@ -484,3 +885,476 @@ def test_resolve_forecast_date_fails_after_retries_exhausted_in_production(
 
         with pytest.raises(FileNotFoundError, match="after 14 attempts"):
             _resolve_forecast_date("20260707", "user", "pass", "host")
+
+
+# ---------------------------------------------------------------------------
+# _download_ensemble_files (parallel FTP sessions)
+# ---------------------------------------------------------------------------
+
+
+def _ensemble_filenames(count: int) -> list[str]:
+    return [f"dis_{i:02d}_{FORECAST_DATE}00.nc" for i in range(count)]
+
+
+def test_download_ensemble_files_keeps_previously_completed_members(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    manifest = _record_in_manifest(_write_cached_files(tmp_path, FORECAST_DATE, 2))
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+        side_effect=lambda *args, **kwargs: _mock_ftp_serving_files(),
+    ):
+        result = _download_ensemble_files(
+            "host",
+            "user",
+            "pass",
+            FORECAST_DATE,
+            _ensemble_filenames(4)[2:],
+            4,
+            "KEN",
+            manifest,
+            {},
+        )
+
+    assert [os.path.basename(path) for path in result] == _ensemble_filenames(4)
+
+
+def _mock_ftp_serving_files(failing_filename: str | None = None) -> MagicMock:
+    """Mock FTP session that serves the filename itself as the file content."""
+    mock_ftp = MagicMock()
+
+    def retrbinary(command: str, callback, rest: int | None = None) -> None:
+        filename = command.removeprefix("RETR ")
+        if filename == failing_filename:
+            raise ftplib.error_perm("550 No such file")
+        callback(filename.encode())
+
+    mock_ftp.retrbinary.side_effect = retrbinary
+    return mock_ftp
+
+
+def test_download_ensemble_files_uses_parallel_ftp_sessions(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+        side_effect=lambda *args, **kwargs: _mock_ftp_serving_files(),
+    ) as mock_connect:
+        result = _download_ensemble_files(
+            "host",
+            "user",
+            "pass",
+            FORECAST_DATE,
+            _ensemble_filenames(6),
+            6,
+            "KEN",
+            _load_manifest(),
+            {},
+            parallelism=3,
+        )
+
+    assert [os.path.basename(path) for path in result] == _ensemble_filenames(6)
+    for path in result:
+        assert Path(path).read_bytes() == os.path.basename(path).encode()
+    assert mock_connect.call_count == 3
+    assert _load_manifest().get_verified_paths() == result
+
+
+def test_download_ensemble_files_limits_sessions_to_pending_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+        side_effect=lambda *args, **kwargs: _mock_ftp_serving_files(),
+    ) as mock_connect:
+        result = _download_ensemble_files(
+            "host",
+            "user",
+            "pass",
+            FORECAST_DATE,
+            _ensemble_filenames(2),
+            2,
+            "KEN",
+            _load_manifest(),
+            {},
+            parallelism=8,
+        )
+
+    assert len(result) == 2
+    assert mock_connect.call_count == 2
+
+
+def test_download_ensemble_files_raises_when_member_is_rejected(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    failing_filename = f"dis_03_{FORECAST_DATE}00.nc"
+
+    with (
+        patch(
+            "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+            side_effect=lambda *args, **kwargs: _mock_ftp_serving_files(
+                failing_filename
+            ),
+        ),
+        pytest.raises(FileNotFoundError, match=failing_filename),
+    ):
+        _download_ensemble_files(
+            "host",
+            "user",
+            "pass",
+            FORECAST_DATE,
+            _ensemble_filenames(6),
+            6,
+            "KEN",
+            _load_manifest(),
+            {},
+            parallelism=2,
+        )
+
+
+def test_download_ensemble_files_connects_only_when_files_are_pending(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    manifest = _record_in_manifest(_write_cached_files(tmp_path, FORECAST_DATE, 2))
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp"
+    ) as mock_connect:
+        result = _download_ensemble_files(
+            "host", "user", "pass", FORECAST_DATE, [], 2, "KEN", manifest, {}
+        )
+
+    mock_connect.assert_not_called()
+    assert [os.path.basename(path) for path in result] == _ensemble_filenames(2)
+
+
+def test_download_ensemble_worker_stops_others_when_it_cannot_connect(
+    tmp_path: Path,
+) -> None:
+    filename_queue: queue.Queue[str] = queue.Queue()
+    filename_queue.put(_ensemble_filenames(1)[0])
+    stop_event = threading.Event()
+
+    with (
+        patch(
+            "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+            side_effect=ftplib.error_temp("421 Too many connections"),
+        ),
+        pytest.raises(ftplib.error_temp),
+    ):
+        _download_ensemble_worker(
+            filename_queue,
+            stop_event,
+            "host",
+            "user",
+            "pass",
+            f"DATA/{FORECAST_DATE}",
+            str(tmp_path),
+            1,
+            "KEN",
+            MagicMock(),
+            {},
+            None,
+        )
+
+    assert stop_event.is_set()
+
+
+# ---------------------------------------------------------------------------
+# slice_glofas_discharge_to_countries
+# ---------------------------------------------------------------------------
+
+
+def _write_global_netcdf_files(cache_base: Path, count: int) -> list[str]:
+    """Write small 'global' ensemble files on a 1 degree grid with descending lat."""
+    raw_dir = cache_base / GLOFAS_RAW_DATA_DIR / FORECAST_DATE
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    lat = np.arange(10.0, -10.5, -1.0)
+    lon = np.arange(20.0, 50.5, 1.0)
+    paths: list[str] = []
+    for ensemble_index in range(count):
+        dis = np.full((2, lat.size, lon.size), float(ensemble_index), dtype="float32")
+        dataset = xr.Dataset(
+            {"dis": (("time", "lat", "lon"), dis)},
+            coords={"time": [0, 1], "lat": lat, "lon": lon},
+        )
+        path = raw_dir / f"dis_{ensemble_index:02d}_{FORECAST_DATE}00.nc"
+        dataset.to_netcdf(path)
+        paths.append(str(path))
+    return paths
+
+
+COUNTRY_BOUNDS = {
+    "KEN": (33.0, -5.0, 42.0, 5.0),
+    "UGA": (29.0, -2.0, 35.0, 4.0),
+}
+
+
+def test_slice_to_countries_writes_one_file_per_country_and_member(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GLOFAS_SLICE_PARALLELISM", "1")
+    netcdf_paths = _write_global_netcdf_files(tmp_path, count=2)
+
+    result = slice_glofas_discharge_to_countries(netcdf_paths, COUNTRY_BOUNDS)
+
+    assert set(result) == {"KEN", "UGA"}
+    for country, (min_lon, min_lat, max_lon, max_lat) in COUNTRY_BOUNDS.items():
+        assert [os.path.basename(path) for path in result[country]] == [
+            f"dis_{i:02d}_{FORECAST_DATE}00_sliced_{country}.nc" for i in range(2)
+        ]
+        for ensemble_index, path in enumerate(result[country]):
+            with xr.open_dataset(path) as sliced:
+                assert float(sliced.lon.min()) == min_lon
+                assert float(sliced.lon.max()) == max_lon
+                assert float(sliced.lat.min()) == min_lat
+                assert float(sliced.lat.max()) == max_lat
+                assert float(sliced.dis.mean()) == ensemble_index
+    assert not list(tmp_path.rglob("*.tmp"))
+
+
+def test_slice_to_countries_reuses_up_to_date_slices(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GLOFAS_SLICE_PARALLELISM", "1")
+    netcdf_paths = _write_global_netcdf_files(tmp_path, count=2)
+    slice_glofas_discharge_to_countries(netcdf_paths, COUNTRY_BOUNDS)
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider.slice_netcdf_to_multiple_bounds"
+    ) as mock_slice:
+        result = slice_glofas_discharge_to_countries(
+            netcdf_paths, {"KEN": COUNTRY_BOUNDS["KEN"]}
+        )
+
+    mock_slice.assert_not_called()
+    assert len(result["KEN"]) == 2
+
+
+def test_slice_to_countries_reslices_when_source_is_newer(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GLOFAS_SLICE_PARALLELISM", "1")
+    netcdf_paths = _write_global_netcdf_files(tmp_path, count=2)
+    result = slice_glofas_discharge_to_countries(netcdf_paths, COUNTRY_BOUNDS)
+    sliced_mtime = os.path.getmtime(result["KEN"][1])
+    os.utime(netcdf_paths[1], (sliced_mtime + 10, sliced_mtime + 10))
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider.slice_netcdf_to_multiple_bounds"
+    ) as mock_slice:
+        slice_glofas_discharge_to_countries(netcdf_paths, COUNTRY_BOUNDS)
+
+    mock_slice.assert_called_once()
+    netcdf_path, bounds_by_output_path = mock_slice.call_args.args
+    assert netcdf_path == netcdf_paths[1]
+    assert len(bounds_by_output_path) == 2
+
+
+def test_slice_to_countries_in_process_pool(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GLOFAS_SLICE_PARALLELISM", "2")
+    netcdf_paths = _write_global_netcdf_files(tmp_path, count=2)
+
+    result = slice_glofas_discharge_to_countries(netcdf_paths, COUNTRY_BOUNDS)
+
+    for paths in result.values():
+        for path in paths:
+            assert os.path.getsize(path) > 0
+
+
+def test_streaming_slicer_slices_members_as_they_are_downloaded(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("GLOFAS_SLICE_PARALLELISM", "1")
+    # Serve small global files from a separate server folder, so the slicer
+    # receives real NetCDF members
+    server_dir = tmp_path / "server"
+    server_dir.mkdir()
+    filenames: list[str] = []
+    for path in _write_global_netcdf_files(tmp_path, count=2):
+        os.replace(path, server_dir / os.path.basename(path))
+        filenames.append(os.path.basename(path))
+
+    def retrbinary(command: str, callback, rest: int | None = None) -> None:
+        callback((server_dir / command.removeprefix("RETR ")).read_bytes())
+
+    mock_ftp = MagicMock()
+    mock_ftp.retrbinary.side_effect = retrbinary
+
+    with (
+        patch(
+            "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+            return_value=mock_ftp,
+        ),
+        GlofasStreamingSlicer(COUNTRY_BOUNDS) as slicer,
+    ):
+        downloaded_paths = _download_ensemble_files(
+            "host",
+            "user",
+            "pass",
+            FORECAST_DATE,
+            filenames,
+            2,
+            "KEN",
+            _load_manifest(),
+            {},
+            parallelism=1,
+            on_member_downloaded=slicer.submit,
+        )
+
+    # All slices were made while downloading, so nothing is left to slice
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider.slice_netcdf_to_multiple_bounds"
+    ) as mock_slice:
+        result = slice_glofas_discharge_to_countries(downloaded_paths, COUNTRY_BOUNDS)
+
+    mock_slice.assert_not_called()
+    for paths in result.values():
+        for ensemble_index, path in enumerate(paths):
+            with xr.open_dataset(path) as sliced:
+                assert float(sliced.dis.mean()) == ensemble_index
+
+
+def test_download_ensemble_files_reports_every_member(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    _record_in_manifest(_write_cached_files(tmp_path, FORECAST_DATE, 1))
+    on_member_downloaded = MagicMock()
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+        side_effect=lambda *args, **kwargs: _mock_ftp_serving_files(),
+    ):
+        downloaded_paths = _download_ensemble_files(
+            "host",
+            "user",
+            "pass",
+            FORECAST_DATE,
+            _ensemble_filenames(2)[1:],
+            2,
+            "KEN",
+            _load_manifest(),
+            {},
+            on_member_downloaded=on_member_downloaded,
+        )
+
+    # Including the member downloaded by an earlier run
+    reported_paths = [call.args[0] for call in on_member_downloaded.call_args_list]
+    assert sorted(reported_paths) == downloaded_paths
+
+
+def test_failing_member_callback_does_not_fail_download(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+        side_effect=lambda *args, **kwargs: _mock_ftp_serving_files(),
+    ):
+        downloaded_paths = _download_ensemble_files(
+            "host",
+            "user",
+            "pass",
+            FORECAST_DATE,
+            _ensemble_filenames(2),
+            2,
+            "KEN",
+            _load_manifest(),
+            {},
+            on_member_downloaded=MagicMock(side_effect=RuntimeError("pool broken")),
+        )
+
+    assert len(downloaded_paths) == 2
+
+
+def test_download_ensemble_files_rejects_truncated_member(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+    filename = _ensemble_filenames(1)[0]
+    remote_files = {filename: RemoteFileInfo(size=1000, mtime="20260326080000")}
+
+    with (
+        patch(
+            "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+            side_effect=lambda *args, **kwargs: _mock_ftp_serving_files(),
+        ),
+        pytest.raises(ConnectionError, match="truncated"),
+    ):
+        _download_ensemble_files(
+            "host",
+            "user",
+            "pass",
+            FORECAST_DATE,
+            [filename],
+            1,
+            "KEN",
+            _load_manifest(),
+            remote_files,
+        )
+
+    assert _load_manifest().entries == {}
+    assert not (tmp_path / GLOFAS_RAW_DATA_DIR / FORECAST_DATE / filename).exists()
+
+
+# ---------------------------------------------------------------------------
+# _list_remote_ensemble_files
+# ---------------------------------------------------------------------------
+
+
+def test_list_remote_ensemble_files_uses_mlsd() -> None:
+    mock_ftp = MagicMock()
+    mock_ftp.mlsd.return_value = [
+        ("dis_00_2026032600.nc", {"size": "120", "modify": "20260326080000"}),
+        ("dis_01_2026032600.nc", {"size": "130", "modify": "20260326080100"}),
+    ]
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+        return_value=mock_ftp,
+    ):
+        result = _list_remote_ensemble_files(
+            "host", "user", "pass", FORECAST_DATE, _ensemble_filenames(3)
+        )
+
+    assert result == {
+        "dis_00_2026032600.nc": RemoteFileInfo(size=120, mtime="20260326080000"),
+        "dis_01_2026032600.nc": RemoteFileInfo(size=130, mtime="20260326080100"),
+    }
+    mock_ftp.size.assert_not_called()
+
+
+def test_list_remote_ensemble_files_falls_back_to_size_and_mdtm() -> None:
+    mock_ftp = MagicMock()
+    mock_ftp.mlsd.side_effect = ftplib.error_perm("500 Unknown command")
+    mock_ftp.size.return_value = 120
+    mock_ftp.sendcmd.return_value = "213 20260326080000"
+
+    with patch(
+        "pipelines.infra.data_types.glofas_discharge_provider._connect_ftp",
+        return_value=mock_ftp,
+    ):
+        result = _list_remote_ensemble_files(
+            "host", "user", "pass", FORECAST_DATE, _ensemble_filenames(1)
+        )
+
+    assert result == {
+        "dis_00_2026032600.nc": RemoteFileInfo(size=120, mtime="20260326080000")
+    }
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from pipelines.infra.utils.glofas_download_manifest import (
+    GLOFAS_DOWNLOAD_MANIFEST_FILENAME,
+    GlofasDownloadManifest,
+    RemoteFileInfo,
+)
+
+REMOTE = RemoteFileInfo(size=16, mtime="20260326080000")
+
+
+def _write_member(directory: Path, content: bytes = b"complete_member!") -> str:
+    path = directory / "dis_00_2026032600.nc"
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_recorded_member_is_verified_after_reload(tmp_path: Path) -> None:
+    path = _write_member(tmp_path)
+    GlofasDownloadManifest(str(tmp_path), {}).record(path, REMOTE)
+
+    manifest = GlofasDownloadManifest.load(str(tmp_path))
+
+    assert manifest.is_verified(path)
+    assert manifest.matches_remote(os.path.basename(path), REMOTE)
+    assert manifest.get_verified_paths() == [path]
+
+
+def test_member_with_new_mtime_is_verified_by_checksum(tmp_path: Path) -> None:
+    path = _write_member(tmp_path)
+    manifest = GlofasDownloadManifest(str(tmp_path), {})
+    manifest.record(path, REMOTE)
+    os.utime(path, ns=(0, 0))
+
+    assert manifest.is_verified(path)
+
+    # Same size but different content
+    Path(path).write_bytes(b"corrupt_member!!")
+    assert not manifest.is_verified(path)
+
+
+def test_unreadable_manifest_is_treated_as_empty(tmp_path: Path) -> None:
+    (tmp_path / GLOFAS_DOWNLOAD_MANIFEST_FILENAME).write_text("{not json")
+
+    manifest = GlofasDownloadManifest.load(str(tmp_path))
+
+    assert manifest.entries == {}
@@ -5,6 +5,7 @@ from unittest.mock import MagicMock
 import numpy as np
 import pytest
 from PIL import Image
+from rasterio.transform import from_origin
 from shared.country_data import CountryCodeIso3
 
 from pipelines.constants import DEFAULT_CRS, POPULATION_NODATA_VALUE
@@ -15,7 +16,11 @@ from pipelines.infra.data_types.loaded_data_types import (
     LoadedDataSource,
     RasterData,
 )
+from pipelines.infra.data_types.population_raster_provider import (
+    PopulationRasterProvider,
+)
 from pipelines.infra.utils.data_provider_fetchers import _load_ibf_api_population_data
+from pipelines.infra.utils.exposure import compute_population_exposed
 
 
 def _make_config(
@@ -68,54 +73,232 @@ def _make_api_metadata_response() -> dict:
     }
 
 
-class TestLoadIbfApiPopulationData:
-    def test_produces_raster_data_with_correct_values(self):
-        population_values = np.array([[1.5, 2.0], [0.0, 3.5]], dtype=np.float64)
-        png_bytes = _make_rgba_png_bytes(population_values)
-        api_metadata = _make_api_metadata_response()
+def _make_loaded_provider(
+    population_values: np.ndarray,
+) -> tuple[PopulationRasterProvider, MagicMock]:
+    config = _make_config()
+    container = _make_container()
+
+    api_client = MagicMock()
+    api_client.get_static_raster_metadata.return_value = _make_api_metadata_response()
+    api_client.get_static_raster_data_image.return_value = _make_rgba_png_bytes(
+        population_values
+    )
+
+    _load_ibf_api_population_data(config, container, api_client)
+    assert isinstance(container.data, PopulationRasterProvider)
+    return container.data, api_client
+
 
+def _make_hazard_extent(
+    xmin: float, ymax: float, width: int, height: int, crs: str = DEFAULT_CRS
+) -> RasterData:
+    return RasterData(
+        array=np.ones((height, width), dtype=np.float32),
+        transform=from_origin(xmin, ymax, 10.0, 10.0),
+        crs=crs,
+        nodata=0,
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_cache_dir(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("DATA_CACHE_DIR", raising=False)
+
+
+class TestLoadIbfApiPopulationData:
+    def test_loads_provider_without_downloading(self):
         config = _make_config()
         container = _make_container()
-
         api_client = MagicMock()
-        api_client.get_static_raster_metadata.return_value = api_metadata
-        api_client.get_static_raster_data_image.return_value = png_bytes
 
         _load_ibf_api_population_data(config, container, api_client)
 
-        assert container.data_type == DataType.RASTER_DATA
-        assert isinstance(container.data, RasterData)
-        assert container.data.crs == DEFAULT_CRS
-        assert container.data.array.shape == (2, 2)
-        assert container.data.nodata == POPULATION_NODATA_VALUE
-        np.testing.assert_allclose(container.data.array, population_values, atol=0.01)
+        assert container.data_type == DataType.POPULATION_RASTER_PROVIDER
+        assert isinstance(container.data, PopulationRasterProvider)
+        api_client.get_static_raster_metadata.assert_not_called()
+        api_client.get_static_raster_data_image.assert_not_called()
 
-    def test_raises_when_metadata_request_fails(self):
-        config = _make_config()
-        container = _make_container()
+    def test_produces_raster_data_with_correct_values(self):
+        population_values = np.array([[1.5, 2.0], [0.0, 3.5]], dtype=np.float64)
+        provider, _ = _make_loaded_provider(population_values)
 
-        api_client = MagicMock()
+        raster = provider.get_raster()
+
+        assert isinstance(raster, RasterData)
+        assert raster.crs == DEFAULT_CRS
+        assert raster.array.shape == (2, 2)
+        assert raster.array.dtype == np.float32
+        assert raster.nodata == POPULATION_NODATA_VALUE
+        assert raster.transform == from_origin(0.0, 0.0, 100.0, 100.0)
+        np.testing.assert_allclose(raster.array, population_values, atol=0.01)
+
+    def test_raises_when_metadata_request_fails(self):
+        provider, api_client = _make_loaded_provider(np.zeros((2, 2)))
         api_client.get_static_raster_metadata.return_value = None
 
         with pytest.raises(
             ValueError, match="Failed to download population raster metadata"
         ):
-            _load_ibf_api_population_data(config, container, api_client)
-
-        assert container.error is not None
+            provider.get_raster()
 
     def test_raises_when_data_image_request_fails(self):
-        config = _make_config()
-        container = _make_container()
-        api_metadata = _make_api_metadata_response()
-
-        api_client = MagicMock()
-        api_client.get_static_raster_metadata.return_value = api_metadata
+        provider, api_client = _make_loaded_provider(np.zeros((2, 2)))
         api_client.get_static_raster_data_image.return_value = None
 
         with pytest.raises(
             ValueError, match="Failed to download population raster data"
         ):
-            _load_ibf_api_population_data(config, container, api_client)
+            provider.get_raster()
+
+
+class TestPopulationRasterProviderWindows:
+    def _values(self) -> np.ndarray:
+        return np.arange(400, dtype=np.float64).reshape(20, 20) / 4
+
+    def test_window_matches_full_raster(self):
+        provider, api_client = _make_loaded_provider(self._values())
+        full = _make_loaded_provider(self._values())[0].get_raster()
+        hazard_extent = _make_hazard_extent(xmin=65.0, ymax=-95.0, width=3, height=2)
+
+        window = provider.get_raster_for_hazard_extent(hazard_extent)
+
+        # The pixels covering the hazard extent, plus one around them
+        assert window.array.shape == (5, 6)
+        assert window.transform == from_origin(50.0, -80.0, 10.0, 10.0)
+        np.testing.assert_array_equal(window.array, full.array[8:13, 5:11])
+        assert provider.get_content_hash() == full.content_hash
+
+        # A second window reuses the downloaded PNG
+        provider.get_raster_for_hazard_extent(hazard_extent)
+        provider.get_grid()
+        api_client.get_static_raster_metadata.assert_called_once()
+        api_client.get_static_raster_data_image.assert_called_once()
+
+    def test_exposure_of_window_matches_full_raster(self):
+        provider, _ = _make_loaded_provider(self._values())
+        full = provider.get_raster()
+        hazard_extent = _make_hazard_extent(xmin=65.0, ymax=-95.0, width=3, height=2)
+        lazy_provider, _ = _make_loaded_provider(self._values())
+
+        from_window = compute_population_exposed(
+            lazy_provider.get_raster_for_hazard_extent(hazard_extent), hazard_extent
+        )
+        from_full = compute_population_exposed(full, hazard_extent)
+
+        assert from_window is not None and from_full is not None
+        assert float(from_window.array.sum()) == float(from_full.array.sum()) > 0
+
+    def test_hazard_extent_in_another_crs(self):
+        provider, _ = _make_loaded_provider(self._values())
+        full = _make_loaded_provider(self._values())[0].get_raster()
+        # x 65-95 and y -45 to -65 in WGS84
+        hazard_extent = RasterData(
+            array=np.ones((2, 3), dtype=np.float32),
+            transform=from_origin(7235766.9, -5621521.5, 1113194.9, 1993425.0),
+            crs=EPSG.WEB_MERCATOR,
+            nodata=0,
+        )
+
+        raster = provider.get_raster_for_hazard_extent(hazard_extent)
+
+        assert raster.array.shape[0] < 20 and raster.array.shape[1] < 20
+        from_window = compute_population_exposed(raster, hazard_extent)
+        from_full = compute_population_exposed(full, hazard_extent)
+        assert from_window is not None and from_full is not None
+        assert float(from_window.array.sum()) == float(from_full.array.sum()) > 0
+
+
+class TestPopulationRasterProviderCache:
+    def _values(self) -> np.ndarray:
+        return np.arange(400, dtype=np.float64).reshape(20, 20) / 4
+
+    def test_repeat_run_reads_cached_raster_without_downloading_png(
+        self, tmp_path, monkeypatch: pytest.MonkeyPatch
+    ):
+        monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+        first, _ = _make_loaded_provider(self._values())
+        expected = first.get_raster()
+
+        second, api_client = _make_loaded_provider(self._values())
+        hazard_extent = _make_hazard_extent(xmin=65.0, ymax=-95.0, width=3, height=2)
+        window = second.get_raster_for_hazard_extent(hazard_extent)
+        raster = second.get_raster()
+
+        api_client.get_static_raster_metadata.assert_called_once()
+        api_client.get_static_raster_data_image.assert_not_called()
+        assert isinstance(raster.array, np.memmap)
+        np.testing.assert_array_equal(raster.array, expected.array)
+        assert raster.transform == expected.transform
+        assert raster.nodata == expected.nodata
+        assert second.get_content_hash() == first.get_content_hash()
+        np.testing.assert_array_equal(window.array, expected.array[8:13, 5:11])
+
+    def test_changed_metadata_downloads_png_again(
+        self, tmp_path, monkeypatch: pytest.MonkeyPatch
+    ):
+        monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+        _make_loaded_provider(self._values())[0].get_grid()
+
+        provider, api_client = _make_loaded_provider(self._values() * 2)
+        metadata = _make_api_metadata_response()
+        metadata["id"] = 2
+        api_client.get_static_raster_metadata.return_value = metadata
+
+        raster = provider.get_raster()
+
+        api_client.get_static_raster_data_image.assert_called_once()
+        np.testing.assert_allclose(raster.array, self._values() * 2)
+        # The raster of the earlier metadata is replaced
+        cache_dir = tmp_path / "population" / "KEN"
+        assert len(list(cache_dir.glob("*.npy"))) == 1
+
+    def test_keeps_temporary_files_of_other_jobs(
+        self, tmp_path, monkeypatch: pytest.MonkeyPatch
+    ):
+        monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+        cache_dir = tmp_path / "population" / "KEN"
+        cache_dir.mkdir(parents=True)
+        other_job_path = cache_dir / "population_0123456789abcdef.npy.999.tmp"
+        other_job_path.write_bytes(b"")
+
+        _make_loaded_provider(self._values())[0].get_grid()
+
+        assert other_job_path.exists()
+        assert len(list(cache_dir.glob("*.npy"))) == 1
+
+    def test_incomplete_sidecar_downloads_png_again(
+        self, tmp_path, monkeypatch: pytest.MonkeyPatch
+    ):
+        monkeypatch.setenv("DATA_CACHE_DIR", str(tmp_path))
+        _make_loaded_provider(self._values())[0].get_grid()
+        (sidecar_path,) = (tmp_path / "population" / "KEN").glob("*.json")
+        sidecar_path.write_text("{}")
+
+        provider, api_client = _make_loaded_provider(self._values())
+        raster = provider.get_raster()
+
+        api_client.get_static_raster_data_image.assert_called_once()
+        np.testing.assert_allclose(raster.array, self._values())
+
+
+class TestPopulationRasterProviderMetadataHash:
+    def test_metadata_hash_does_not_download_png(self):
+        provider, api_client = _make_loaded_provider(np.ones((20, 20)))
+
+        metadata_hash = provider.get_metadata_hash()
+        api_client.get_static_raster_data_image.assert_not_called()
+
+        # The metadata is downloaded once, also when the raster is needed later
+        provider.get_grid()
+        assert provider.get_metadata_hash() == metadata_hash
+        api_client.get_static_raster_metadata.assert_called_once()
+
+    def test_metadata_hash_changes_with_metadata(self):
+        first, _ = _make_loaded_provider(np.ones((20, 20)))
+        second, api_client = _make_loaded_provider(np.ones((20, 20)))
+        metadata = _make_api_metadata_response()
+        metadata["id"] = 2
+        api_client.get_static_raster_metadata.return_value = metadata
 
-        assert container.error is not None
+        assert first.get_metadata_hash() != second.get_metadata_hash()
@@ -0,0 +1,82 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+from shared.image_helpers import (
+    iter_rgba_png_float32_blocks,
+    rgba_png_to_float32_array,
+    rgba_png_to_float_array,
+)
+
+
+def _encoded_values() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 2**32, size=(37, 11), dtype=np.uint64)
+    values[0, :3] = [0, 1, 2**32 - 1]
+    return values
+
+
+def _make_rgba_png_bytes(values: np.ndarray) -> bytes:
+    rgba = np.dstack(
+        [((values >> shift) & 0xFF).astype(np.uint8) for shift in (24, 16, 8, 0)]
+    )
+    buf = io.BytesIO()
+    Image.fromarray(rgba, mode="RGBA").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_float_array_matches_encoding_formula() -> None:
+    values = _encoded_values()
+
+    decoded = rgba_png_to_float_array(_make_rgba_png_bytes(values))
+
+    assert decoded.dtype == np.float64
+    np.testing.assert_array_equal(
+        decoded, np.round(values.astype(np.float64) / 1000, 3)
+    )
+
+
+@pytest.mark.parametrize("block_rows", [1, 5, 37, 256])
+def test_float32_array_matches_float_array(block_rows: int) -> None:
+    png_bytes = _make_rgba_png_bytes(_encoded_values())
+
+    decoded = rgba_png_to_float32_array(png_bytes, block_rows=block_rows)
+
+    assert decoded.dtype == np.float32
+    np.testing.assert_array_equal(
+        decoded, rgba_png_to_float_array(png_bytes).astype(np.float32)
+    )
+
+
+def test_streamed_blocks_cover_the_raster() -> None:
+    png_bytes = _make_rgba_png_bytes(_encoded_values())
+
+    blocks = list(iter_rgba_png_float32_blocks(png_bytes, block_rows=10))
+
+    assert [row_off for row_off, _ in blocks] == [0, 10, 20, 30]
+    assert [block.shape for _, block in blocks][-1] == (7, 11)
+    np.testing.assert_array_equal(
+        np.concatenate([block for _, block in blocks]),
+        rgba_png_to_float32_array(png_bytes),
+    )
+
+
+@pytest.mark.parametrize("mode", ["L", "RGB", "P", "LA"])
+def test_float32_array_converts_other_pngs_to_rgba(mode: str) -> None:
+    rng = np.random.default_rng(1)
+    rgb = rng.integers(0, 256, size=(9, 7, 3), dtype=np.uint8)
+    buf = io.BytesIO()
+    Image.fromarray(rgb, mode="RGB").convert(mode).save(buf, "PNG")
+    png_bytes = buf.getvalue()
+
+    expected = rgba_png_to_float_array(png_bytes).astype(np.float32)
+    np.testing.assert_array_equal(
+        rgba_png_to_float32_array(png_bytes, block_rows=4), expected
+    )
+    np.testing.assert_array_equal(
+        np.concatenate(
+            [block for _, block in iter_rgba_png_float32_blocks(png_bytes, 4)]
+        ),
+        expected,
+    )
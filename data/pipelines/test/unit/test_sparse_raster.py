@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from rasterio.transform import Affine, from_origin
+
+from pipelines.constants import DEFAULT_CRS
+from pipelines.infra.data_types.admin_area_types import (
+    AdminArea,
+    AdminAreaProperties,
+    AdminAreasSet,
+)
+from pipelines.infra.data_types.flood_exposure_table import get_flood_exposure_key
+from pipelines.infra.data_types.loaded_data_types import RasterData, SparseRasterData
+from pipelines.infra.utils.admin_area_labels import get_admin_area_labels
+from pipelines.infra.utils.exposure import (
+    aggregate_population_exposed,
+    clip_raster_to_admin_areas,
+    ClipCache,
+    compute_population_exposed,
+    ReprojectionCache,
+)
+from pipelines.infra.utils.raster import (
+    crop_raster_to_bounds,
+    crop_sparse_raster_to_bounds,
+    raster_to_base64_png,
+)
+
+
+def _flood_extent(factor: int = 1, crs: str = DEFAULT_CRS) -> RasterData:
+    # Mostly 0 (nodata, no flood), as flood extents are
+    rng = np.random.default_rng(factor)
+    array = rng.uniform(0, 3, size=(40, 50)).astype(np.float32)
+    array[rng.uniform(size=array.shape) < 0.9] = 0
+    return RasterData(
+        array=array,
+        transform=from_origin(0.02, 0.58, 0.01 * factor, 0.01 * factor),
+        crs=crs,
+        nodata=0,
+    )
+
+
+def _population() -> RasterData:
+    rng = np.random.default_rng(0)
+    array = rng.uniform(0, 100, size=(60, 80)).astype(np.float32)
+    array[array < 20] = 0
+    array[5, 5] = -9999.0
+    return RasterData(
+        array=array,
+        transform=from_origin(0.0, 0.6, 0.01, 0.01),
+        crs=DEFAULT_CRS,
+        nodata=-9999.0,
+    )
+
+
+def _area(pcode: str, min_x: float, min_y: float, size: float) -> AdminArea:
+    return AdminArea(
+        properties=AdminAreaProperties(
+            pcode=pcode, name=pcode, admin_level=2, country_code="KEN"
+        ),
+        geometry_type="Polygon",
+        coordinates=[
+            [
+                [min_x, min_y],
+                [min_x, min_y + size],
+                [min_x + size, min_y + size],
+                [min_x + size, min_y],
+                [min_x, min_y],
+            ]
+        ],
+    )
+
+
+def _admin_areas() -> AdminAreasSet:
+    return AdminAreasSet(
+        admin_areas={
+            "PC001": _area("PC001", 0.05, 0.2, 0.17),
+            "PC002": _area("PC002", 0.22, 0.2, 0.13),
+        }
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_cache_dir(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("DATA_CACHE_DIR", raising=False)
+
+
+# ---------------------------------------------------------------------------
+# SparseRasterData
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.parametrize("nodata", [0.0, -9999.0, np.nan])
+def test_round_trips_dense_raster(nodata: float) -> None:
+    raster = _flood_extent()
+    raster.array[raster.array == 0] = nodata
+    raster.nodata = nodata
+
+    sparse = SparseRasterData.from_raster_data(raster, block_rows=7)
+
+    assert sparse.indexes.size == np.count_nonzero(raster.array > 0)
+    assert np.all(np.diff(sparse.indexes) > 0)
+    np.testing.assert_array_equal(sparse.to_raster_data().array, raster.array)
+    assert sparse.grid == raster.grid
+
+
+def test_crop_matches_dense_crop() -> None:
+    raster = _flood_extent()
+    sparse = SparseRasterData.from_raster_data(raster)
+
+    for bounds in ((0.1, 0.3, 0.25, 0.45), (-1.0, -1.0, 0.05, 0.2)):
+        cropped = crop_sparse_raster_to_bounds(sparse, bounds)
+        expected = crop_raster_to_bounds(raster, bounds)
+
+        assert cropped.transform == expected.transform
+        np.testing.assert_array_equal(cropped.to_raster_data().array, expected.array)
+
+
+# ---------------------------------------------------------------------------
+# Clipping, exposure and encoding match the dense raster
+# ---------------------------------------------------------------------------
+
+
+def test_clip_matches_dense_clip() -> None:
+    raster = _flood_extent()
+    clip_cache = ClipCache()
+
+    clipped = clip_raster_to_admin_areas(
+        ["PC001", "PC002"], _admin_areas(), raster, clip_cache=clip_cache
+    )
+    sparse_clipped = clip_raster_to_admin_areas(
+        ["PC001", "PC002"],
+        _admin_areas(),
+        SparseRasterData.from_raster_data(raster),
+        clip_cache=clip_cache,
+    )
+
+    assert isinstance(sparse_clipped, SparseRasterData)
+    assert sparse_clipped.transform == clipped.transform
+    np.testing.assert_array_equal(sparse_clipped.to_raster_data().array, clipped.array)
+    assert len(clip_cache.windows) == 1
+
+
+@pytest.mark.parametrize(
+    "hazard",
+    [
+        _flood_extent(),
+        _flood_extent(factor=3),
+        _flood_extent(factor=1, crs="EPSG:4087"),
+    ],
+    ids=["same-grid", "coarser-grid", "other-crs"],
+)
+def test_exposure_matches_dense_exposure(hazard: RasterData) -> None:
+    population = _population()
+    if hazard.crs != DEFAULT_CRS:
+        # Roughly the same area, in meters
+        hazard.transform = Affine(1113.2, 0, 2226.4, 0, -1113.2, 64566.1)
+    elif hazard.transform.a == 0.01:
+        # Off the population grid
+        hazard.transform = hazard.transform * Affine.translation(0.5, 0.3)
+    sparse_hazard = SparseRasterData.from_raster_data(hazard)
+    expected = compute_population_exposed(population, hazard)
+    reprojection_cache = ReprojectionCache()
+
+    for _ in range(2):
+        exposed = compute_population_exposed(
+            population, sparse_hazard, reprojection_cache=reprojection_cache
+        )
+
+        assert expected is not None and exposed is not None
+        assert isinstance(exposed, SparseRasterData)
+        assert exposed.transform == expected.transform
+        np.testing.assert_array_equal(exposed.to_raster_data().array, expected.array)
+        assert exposed.indexes.size == np.count_nonzero(expected.array)
+
+
+def test_aggregated_exposure_matches_dense_exposure() -> None:
+    population = _population()
+    admin_areas = _admin_areas()
+    place_codes = ["PC001", "PC002"]
+    hazard = clip_raster_to_admin_areas(place_codes, admin_areas, _flood_extent())
+    exposed = compute_population_exposed(population, hazard)
+    sparse_exposed = compute_population_exposed(
+        population, SparseRasterData.from_raster_data(hazard)
+    )
+    assert exposed is not None and sparse_exposed is not None
+    labels = get_admin_area_labels(admin_areas, population.grid, "KEN", 2)
+
+    expected = aggregate_population_exposed(exposed, place_codes, admin_areas)
+    assert labels.sum_by_place_code(sparse_exposed, place_codes) == expected
+    assert (
+        aggregate_population_exposed(sparse_exposed, place_codes, admin_areas)
+        == expected
+    )
+
+
+def test_png_and_exposure_key_match_dense_raster() -> None:
+    raster = _flood_extent()
+    # Inside PC001
+    raster.array[28, 8] = np.nan
+    clipped = clip_raster_to_admin_areas(["PC001"], _admin_areas(), raster)
+    sparse_clipped = clip_raster_to_admin_areas(
+        ["PC001"], _admin_areas(), SparseRasterData.from_raster_data(raster)
+    )
+
+    assert raster_to_base64_png(sparse_clipped) == raster_to_base64_png(clipped)
+    assert get_flood_exposure_key(
+        sparse_clipped, ["PC001"], _admin_areas()
+    ) == get_flood_exposure_key(clipped, ["PC001"], _admin_areas())
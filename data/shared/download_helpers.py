@@ -44,6 +44,39 @@ def download_object(url: str) -> bytes | None:
     return None
 
 
+def download_object_if_none_match(
+    url: str, etag: str | None = None
+) -> tuple[bytes | None, str | None] | None:
+    """
+    Conditional HTTP download with retry logic, revalidating a cached copy by ETag.
+
+    Returns (None, etag) when the object is unchanged since etag (HTTP 304), and
+    (content, new_etag) otherwise; new_etag is None if the server sends no ETag.
+    Returns None when all attempts fail.
+    """
+    headers = {"If-None-Match": etag} if etag else {}
+    max_retries = 3
+    attempt = 0
+    while attempt < max_retries:
+        attempt += 1
+        logger.info(f"Download '{url}' (attempt {attempt}/{max_retries})")
+        try:
+            response = requests.get(url, headers=headers, timeout=60)
+            if response.status_code == 304:
+                return None, etag
+            response.raise_for_status()
+            return response.content, response.headers.get("ETag")
+        except requests.exceptions.RequestException as exc:
+            status_code = getattr(exc.response, "status_code", "N/A")
+            logger.error(
+                f"Attempt {attempt}/{max_retries} failed for '{url}'. "
+                f"Status: {status_code}, error: {exc}"
+            )
+
+    logger.error(f"All {max_retries} attempts failed for '{url}'")
+    return None
+
+
 def download_json_source(url: str, check_count: bool = True):
 
     content = download_object(url)
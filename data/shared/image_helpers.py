@@ -3,15 +3,20 @@ Helper functions relating to image processing
 """
 
 import io
+import warnings
+from collections.abc import Iterator
+from contextlib import contextmanager
 
 import numpy as np
 import rasterio
 import rasterio.crs
 from PIL import Image
 from pipelines.infra.data_types.enums import EPSG
-from rasterio.io import MemoryFile
+from rasterio.errors import NotGeoreferencedWarning
+from rasterio.io import DatasetReader, MemoryFile
 from rasterio.transform import array_bounds
 from rasterio.warp import calculate_default_transform, reproject, Resampling
+from rasterio.windows import Window
 
 Image.MAX_IMAGE_PIXELS = None
 
@@ -20,6 +25,9 @@ CRS = rasterio.crs.CRS
 # Allow PIL to open large images
 Image.MAX_IMAGE_PIXELS = None
 
+# Rows of an RGBA data PNG decoded at a time
+RGBA_PNG_BLOCK_ROWS = 256
+
 
 def colorize_image_from_file(
     png_in_bytes: bytes, color1: tuple, color2: tuple, steps: int, log_scale: bool
@@ -264,15 +272,129 @@ def rgba_png_to_float_array(png_in_bytes: bytes):
     The function returns a 2D array of floats.
     """
     img = Image.open(io.BytesIO(png_in_bytes)).convert("RGBA")
-    rgba = np.array(img, dtype=np.uint64)
+    rgba = np.asarray(img)
+
+    values = np.empty(rgba.shape[:2], dtype=np.float64)
+    _decode_rgba_values(rgba, values)
+    return values
+
 
-    r = rgba[:, :, 0]
-    g = rgba[:, :, 1]
-    b = rgba[:, :, 2]
-    a = rgba[:, :, 3]
+def rgba_png_to_float32_array(
+    png_in_bytes: bytes, block_rows: int = RGBA_PNG_BLOCK_ROWS
+) -> np.ndarray:
+    """
+    Like rgba_png_to_float_array, but decodes the PNG in blocks of rows straight into
+    one float32 array, so the peak memory is close to the size of the result. Values
+    are the float32 casts of rgba_png_to_float_array's.
+    """
+    with _open_rgba_png(png_in_bytes) as src:
+        return _read_rgba_window(
+            src,
+            Window.from_slices((0, src.height), (0, src.width)),
+            block_rows,
+        )
+
+
+def rgba_png_window_to_float32_array(
+    png_in_bytes: bytes,
+    window: tuple[int, int, int, int],
+    block_rows: int = RGBA_PNG_BLOCK_ROWS,
+) -> np.ndarray:
+    """
+    Like rgba_png_to_float32_array, for only a window (row_start, row_end, col_start,
+    col_end) of the PNG. Rows above the window are decoded but not kept, and rows
+    below it are not decoded at all.
+    """
+    row_start, row_end, col_start, col_end = window
+    with _open_rgba_png(png_in_bytes) as src:
+        return _read_rgba_window(
+            src,
+            Window.from_slices((row_start, row_end), (col_start, col_end)),
+            block_rows,
+        )
 
-    values = np.round(
-        ((r << 24) | (g << 16) | (b << 8) | a).astype(np.float64) / 1000, 3
-    )
 
+def get_png_shape(png_in_bytes: bytes) -> tuple[int, int]:
+    """(height, width) of a PNG, read from its header without decoding it."""
+    with Image.open(io.BytesIO(png_in_bytes)) as img:
+        width, height = img.size
+    return height, width
+
+
+def iter_rgba_png_float32_blocks(
+    png_in_bytes: bytes, block_rows: int = RGBA_PNG_BLOCK_ROWS
+) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Streaming variant of rgba_png_to_float32_array. Yields (row offset, float32
+    values) per block of rows, so a raster can be processed without ever holding it
+    in memory in full.
+    """
+    with _open_rgba_png(png_in_bytes) as src:
+        full = Window.from_slices((0, src.height), (0, src.width))
+        for row_off, rgba in _read_rgba_row_blocks(src, full, block_rows):
+            values = np.empty(rgba.shape[:2], dtype=np.float32)
+            _decode_rgba_values(rgba, values)
+            yield row_off, values
+
+
+@contextmanager
+def _open_rgba_png(png_in_bytes: bytes) -> Iterator[DatasetReader]:
+    # GDAL's PNG driver decodes scanline by scanline, so reading the rows in order
+    # never decodes the full image at once
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", NotGeoreferencedWarning)
+        with MemoryFile(png_in_bytes) as memfile, memfile.open() as src:
+            if src.count == 4 and src.dtypes[0] == "uint8":
+                yield src
+                return
+
+        # Other PNGs (e.g. palette or RGB) are converted to RGBA like
+        # rgba_png_to_float_array does, which decodes them in full
+        with Image.open(io.BytesIO(png_in_bytes)) as img:
+            rgba = np.asarray(img.convert("RGBA"))
+        height, width = rgba.shape[:2]
+        with MemoryFile() as rgba_memfile:
+            with rgba_memfile.open(
+                driver="GTiff", width=width, height=height, count=4, dtype="uint8"
+            ) as dst:
+                dst.write(np.moveaxis(rgba, -1, 0))
+            with rgba_memfile.open() as src:
+                yield src
+
+
+def _read_rgba_window(
+    src: DatasetReader, window: Window, block_rows: int
+) -> np.ndarray:
+    values = np.empty((int(window.height), int(window.width)), dtype=np.float32)
+    for row_off, rgba in _read_rgba_row_blocks(src, window, block_rows):
+        _decode_rgba_values(rgba, values[row_off : row_off + rgba.shape[0]])
     return values
+
+
+def _read_rgba_row_blocks(
+    src: DatasetReader, window: Window, block_rows: int
+) -> Iterator[tuple[int, np.ndarray]]:
+    # Yields (row offset in the window, pixel interleaved RGBA rows), reusing one
+    # buffer for every block
+    row_start, col_start = int(window.row_off), int(window.col_off)
+    height, width = int(window.height), int(window.width)
+    rgba = np.empty((min(block_rows, height), width, 4), dtype=np.uint8)
+    for row_off in range(0, height, block_rows):
+        rows = min(block_rows, height - row_off)
+        bands = src.read(
+            window=Window.from_slices(
+                (row_start + row_off, row_start + row_off + rows),
+                (col_start, col_start + width),
+            )
+        )
+        rgba[:rows] = np.moveaxis(bands, 0, -1)
+        yield row_off, rgba[:rows]
+
+
+def _decode_rgba_values(rgba: np.ndarray, out: np.ndarray) -> None:
+    # The R, G, B, A bytes of a pixel are the big-endian bytes of its uint32 value,
+    # so viewing them as ">u4" reads the values without shifting or copying
+    encoded = rgba.view(">u4")[..., 0]
+    # Divided in float64 and cast per buffered chunk, so the values match
+    # rgba_png_to_float_array without a float64 copy of the whole raster
+    np.divide(encoded, 1000, out=out, dtype=np.float64, casting="same_kind")